@@ -0,0 +1,104 @@
+# src/admission.py
+# Control de admisión por prioridad delante de la app Flask (middleware WSGI).
+# Cada clase de ruta tiene su cupo de peticiones en vuelo y un presupuesto de
+# espera en cola; el tráfico de baja prioridad se rechaza antes cuando el pool
+# de la base ya está saturado. Salud y métricas nunca esperan ni se rechazan.
+
+import threading
+import time
+
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import ClosingIterator
+
+from config import Config
+from database import espera_pool
+from metrics import Contador, Medidor
+
+# Primer prefijo que coincide; lo demás es 'normal'. 'exenta' no pasa por el control
+CLASES_RUTA = (
+    ('exenta', ('/salud', '/metrics')),
+    ('critica', ('/generar_pedido', '/admin/api/', '/admin/orders')),
+    ('baja', ('/menu', '/admin/menu_preview', '/product_image/', '/profile_picture/', '/static/')),
+)
+
+peticiones_admision = Contador('admission_requests_total', 'Peticiones por clase de ruta y resultado',
+                               ('class', 'result'))
+en_vuelo_admision = Medidor('admission_in_flight', 'Peticiones admitidas en curso por clase de ruta', ('class',))
+
+# campo de los contadores -> result de admission_requests_total
+RESULTADOS = {'admitidas': 'admitted', 'rechazadas_cola': 'shed_queue', 'rechazadas_pool': 'shed_pool'}
+
+def clasificar(ruta):
+    for clase, prefijos in CLASES_RUTA:
+        if ruta.startswith(prefijos):
+            return clase
+    return 'normal'
+
+class ControlAdmision:
+    """Envuelve app.wsgi_app"""
+
+    def __init__(self, wsgi_app, limites=None, presupuestos=None, umbral_pool=None):
+        self.wsgi_app = wsgi_app
+        limites = limites or Config.ADMISSION_LIMITS
+        self.presupuestos = presupuestos or Config.ADMISSION_QUEUE_BUDGET
+        self.umbral_pool = Config.ADMISSION_POOL_WAIT_THRESHOLD if umbral_pool is None else umbral_pool
+        self.cupos = {clase: threading.BoundedSemaphore(n) for clase, n in limites.items()}
+        self._lock = threading.Lock()
+        self.contadores = {
+            clase: {'admitidas': 0, 'rechazadas_cola': 0, 'rechazadas_pool': 0,
+                    'en_vuelo': 0, 'espera_total': 0.0}
+            for clase in limites
+        }
+
+    def _contar(self, clase, campo, valor=1):
+        with self._lock:
+            self.contadores[clase][campo] += valor
+        if campo == 'en_vuelo':
+            en_vuelo_admision.inc(valor, **{'class': clase})
+        else:
+            peticiones_admision.inc(valor, **{'class': clase, 'result': RESULTADOS[campo]})
+
+    def _rechazar(self, environ, start_response, motivo):
+        respuesta = Response(
+            'El servicio está muy ocupado, intenta de nuevo en unos segundos.',
+            status=503, headers={'Retry-After': '2', 'X-Shed-Reason': motivo}
+        )
+        return respuesta(environ, start_response)
+
+    def __call__(self, environ, start_response):
+        clase = clasificar(environ.get('PATH_INFO', ''))
+        if clase == 'exenta':
+            return self.wsgi_app(environ, start_response)
+
+        if clase == 'baja' and espera_pool() > self.umbral_pool:
+            self._contar(clase, 'rechazadas_pool')
+            return self._rechazar(environ, start_response, 'pool')
+
+        inicio = time.perf_counter()
+        cupo = self.cupos[clase]
+        if not cupo.acquire(timeout=self.presupuestos[clase]):
+            self._contar(clase, 'rechazadas_cola')
+            return self._rechazar(environ, start_response, 'cola')
+
+        with self._lock:
+            self.contadores[clase]['espera_total'] += time.perf_counter() - inicio
+        self._contar(clase, 'admitidas')
+        self._contar(clase, 'en_vuelo')
+
+        def liberar():
+            self._contar(clase, 'en_vuelo', -1)
+            cupo.release()
+
+        try:
+            # El cupo se libera hasta que termina de enviarse el cuerpo
+            return ClosingIterator(self.wsgi_app(environ, start_response), liberar)
+        except BaseException:
+            liberar()
+            raise
+
+    def metricas(self):
+        """Copia de los contadores por clase, con la espera actual del pool"""
+        with self._lock:
+            datos = {clase: dict(valores) for clase, valores in self.contadores.items()}
+        datos['espera_pool'] = espera_pool()
+        return datos
@@ -0,0 +1,106 @@
+# src/archive.py
+# Retención: mueve pedidos entregados/cancelados antiguos a las tablas de
+# archivo en lotes pequeños (una transacción corta por lote) y purga
+# notificaciones leídas que ya vencieron.
+
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+
+from config import Config
+from database.models import (
+    Pedido, DetallePedido, Notificacion, PedidoArchivado, DetallePedidoArchivado
+)
+
+ESTADOS_FINALES = ('entregado', 'cancelado')
+
+COLUMNAS_PEDIDO = ('id_pedido', 'codigo_pedido', 'id_usuario', 'total', 'estado', 'version',
+                   'notas', 'num_articulos', 'subtotal', 'impuestos', 'resumen_articulos',
+                   'nombre_entrega', 'telefono_entrega', 'calle_entrega', 'no_exterior_entrega',
+                   'colonia_entrega', 'fecha_creacion', 'fecha_actualizacion')
+COLUMNAS_DETALLE = ('id_detalle_pedido', 'id_pedido', 'id_producto', 'cantidad', 'precio_unitario', 'nota')
+
+def archivar_lote(db, limite, tamano_lote):
+    """Archiva hasta tamano_lote pedidos anteriores a limite. Devuelve cuántos movió."""
+    ids = db.execute(
+        select(Pedido.id_pedido)
+        .where(Pedido.estado.in_(ESTADOS_FINALES), Pedido.fecha_creacion < limite)
+        .order_by(Pedido.id_pedido)
+        .limit(tamano_lote)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    try:
+        # INSERT ... SELECT: las filas no pasan por Python
+        db.execute(insert(PedidoArchivado).from_select(
+            COLUMNAS_PEDIDO,
+            select(*(getattr(Pedido, c) for c in COLUMNAS_PEDIDO)).where(Pedido.id_pedido.in_(ids))
+        ))
+        db.execute(insert(DetallePedidoArchivado).from_select(
+            COLUMNAS_DETALLE,
+            select(*(getattr(DetallePedido, c) for c in COLUMNAS_DETALLE)).where(DetallePedido.id_pedido.in_(ids))
+        ))
+        # Las notificaciones conservan su texto pero dejan de apuntar al pedido vivo
+        db.execute(update(Notificacion).where(Notificacion.id_pedido.in_(ids)).values(id_pedido=None))
+        db.execute(delete(DetallePedido).where(DetallePedido.id_pedido.in_(ids)))
+        db.execute(delete(Pedido).where(Pedido.id_pedido.in_(ids)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(ids)
+
+def purgar_notificaciones_lote(db, limite, tamano_lote):
+    """Borra hasta tamano_lote notificaciones leídas anteriores a limite"""
+    ids = db.execute(
+        select(Notificacion.id_notificacion)
+        .where(Notificacion.leida.is_(True), Notificacion.fecha_creacion < limite)
+        .limit(tamano_lote)
+    ).scalars().all()
+    if not ids:
+        return 0
+    db.execute(delete(Notificacion).where(Notificacion.id_notificacion.in_(ids)))
+    db.commit()
+    return len(ids)
+
+def ejecutar_retencion(db, dias_pedidos=None, dias_notificaciones=None, tamano_lote=None,
+                       pausa=None, max_lotes=None, avisar=print):
+    """
+    Repite lotes hasta que no quede nada por mover. La pausa entre lotes deja
+    pasar las escrituras de la operación normal.
+    """
+    dias_pedidos = dias_pedidos or Config.ARCHIVE_ORDERS_AFTER_DAYS
+    dias_notificaciones = dias_notificaciones or Config.NOTIFICATION_TTL_DAYS
+    tamano_lote = tamano_lote or Config.ARCHIVE_BATCH_SIZE
+    pausa = Config.ARCHIVE_BATCH_PAUSE if pausa is None else pausa
+
+    ahora = datetime.utcnow()
+    totales = {'pedidos': 0, 'notificaciones': 0}
+    tareas = (
+        ('pedidos', archivar_lote, ahora - timedelta(days=dias_pedidos)),
+        ('notificaciones', purgar_notificaciones_lote, ahora - timedelta(days=dias_notificaciones)),
+    )
+    for nombre, lote, limite in tareas:
+        lotes = 0
+        while max_lotes is None or lotes < max_lotes:
+            movidos = lote(db, limite, tamano_lote)
+            if not movidos:
+                break
+            totales[nombre] += movidos
+            lotes += 1
+            avisar(f"Retención: {totales[nombre]} {nombre} procesados")
+            time.sleep(pausa)
+    return totales
+
+def buscar_pedido(db, id_pedido, id_usuario=None):
+    """Busca en la tabla viva y, si no está, en el archivo (mismos atributos para las plantillas)"""
+    for modelo in (Pedido, PedidoArchivado):
+        consulta = db.query(modelo).filter(modelo.id_pedido == id_pedido)
+        if id_usuario is not None:
+            consulta = consulta.filter(modelo.id_usuario == id_usuario)
+        pedido = consulta.first()
+        if pedido:
+            return pedido
+    return None
@@ -0,0 +1,115 @@
+# src/assets.py
+# Archivos estáticos: toda URL de url_for('static', ...) lleva la huella de su
+# contenido (?v=<hash>) y, si la huella es la vigente, se sirve con caché
+# inmutable; css/js/svg se sirven ya comprimidos (.br/.gz generados al desplegar).
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+# Extensiones que vale la pena comprimir; imágenes y video ya vienen comprimidos
+COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+# Orden de preferencia: brotli comprime mejor que gzip
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+
+# ruta -> (mtime, huella); se recalcula solo si el archivo cambia
+_huellas = {}
+
+def huella(ruta):
+    """Primeros 12 caracteres del sha256 del archivo"""
+    mtime = os.stat(ruta).st_mtime_ns
+    guardada = _huellas.get(ruta)
+    if guardada and guardada[0] == mtime:
+        return guardada[1]
+    with open(ruta, 'rb') as archivo:
+        valor = hashlib.sha256(archivo.read()).hexdigest()[:12]
+    _huellas[ruta] = (mtime, valor)
+    return valor
+
+def agregar_huella(endpoint, values):
+    """url_defaults: url_for('static', filename=...) agrega ?v=<huella>"""
+    if endpoint != 'static' or 'v' in values or 'filename' not in values:
+        return
+    try:
+        values['v'] = huella(os.path.join(current_app.static_folder, values['filename']))
+    except OSError:
+        pass
+
+def _variante(filename):
+    """Respuesta con la versión precomprimida que acepte el cliente, si existe y está al día"""
+    original = safe_join(current_app.static_folder, filename)
+    if original is None:
+        return None
+    for codificacion, sufijo in VARIANTES:
+        if not request.accept_encodings[codificacion]:
+            continue
+        try:
+            if os.stat(original + sufijo).st_mtime_ns < os.stat(original).st_mtime_ns:
+                continue
+            respuesta = send_from_directory(current_app.static_folder, filename + sufijo,
+                                            mimetype=mimetypes.guess_type(filename)[0])
+        except (OSError, NotFound):
+            continue
+        respuesta.headers['Content-Encoding'] = codificacion
+        return respuesta
+    return None
+
+def servir_estatico(filename):
+    """Reemplaza la vista static de Flask (los rangos para video los resuelve send_file)"""
+    comprimible = filename.lower().endswith(COMPRIMIBLES)
+    respuesta = (_variante(filename) if comprimible else None) or current_app.send_static_file(filename)
+    if comprimible:
+        respuesta.vary.add('Accept-Encoding')
+
+    # Con la huella vigente la URL nunca cambia de contenido: el navegador no revalida
+    v = request.args.get('v')
+    ruta = safe_join(current_app.static_folder, filename)
+    try:
+        vigente = bool(v and ruta) and v == huella(ruta)
+    except OSError:
+        vigente = False
+    if vigente:
+        respuesta.cache_control.no_cache = None
+        respuesta.cache_control.public = True
+        respuesta.cache_control.max_age = current_app.config['STATIC_MAX_AGE']
+        respuesta.cache_control.immutable = True
+    return respuesta
+
+def iniciar_assets(app):
+    app.url_defaults(agregar_huella)
+    app.view_functions['static'] = servir_estatico
+
+def comprimir_estaticos(directorio, avisar=print):
+    """Genera las variantes .gz (y .br si está instalado brotli) junto a cada archivo comprimible"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        avisar('brotli no está instalado; solo se generan variantes .gz')
+
+    totales = {'archivos': 0, 'original': 0, 'gzip': 0, 'br': 0}
+    for raiz, _, archivos in os.walk(directorio):
+        for nombre in archivos:
+            if not nombre.lower().endswith(COMPRIMIBLES):
+                continue
+            ruta = os.path.join(raiz, nombre)
+            with open(ruta, 'rb') as archivo:
+                datos = archivo.read()
+            # mtime=0: el .gz sale idéntico en cada despliegue si el archivo no cambió
+            variantes = {'gzip': ('.gz', gzip.compress(datos, compresslevel=9, mtime=0))}
+            if brotli:
+                variantes['br'] = ('.br', brotli.compress(datos, quality=11))
+            for codificacion, (sufijo, comprimido) in variantes.items():
+                if len(comprimido) >= len(datos):
+                    continue
+                with open(ruta + sufijo, 'wb') as archivo:
+                    archivo.write(comprimido)
+                totales[codificacion] += len(comprimido)
+            totales['archivos'] += 1
+            totales['original'] += len(datos)
+    return totales
@@ -0,0 +1,82 @@
+# Verifica que la exportación use memoria constante: llena una base SQLite con
+# líneas de pedido sintéticas y mide el pico de memoria (tracemalloc) al exportar;
+# termina con error si el pico al 100% pasa de CRECIMIENTO_MAXIMO veces el del 10%.
+# Uso (desde src/): python -m benchmarks.bench_export --lineas 1000000
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from database.models import Base, Rol, Usuario, Producto, Pedido, DetallePedido
+from exports import exportar
+
+LINEAS_POR_PEDIDO = 4
+CRECIMIENTO_MAXIMO = 1.25  # pico al 100% contra el pico al 10%
+
+def sembrar(engine, lineas, lote=20_000):
+    Base.metadata.create_all(engine)
+    inicio = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Rol), [{'id_rol': 1, 'nombre': 'cliente'}])
+        conn.execute(insert(Usuario), [{'id_usuario': 1, 'nombre_usuario': 'bench', 'contrasena_hash': 'x',
+                                        'telefono': '0', 'id_rol': 1}])
+        conn.execute(insert(Producto), [{'id_producto': i, 'nombre': f'Rollo {i}', 'precio': 100 + i}
+                                        for i in range(1, 41)])
+        pedidos = lineas // LINEAS_POR_PEDIDO
+        for base in range(0, pedidos, lote):
+            ids = range(base + 1, min(base + lote, pedidos) + 1)
+            conn.execute(insert(Pedido), [
+                {'id_pedido': i, 'codigo_pedido': f'B{i}', 'id_usuario': 1, 'total': 448, 'estado': 'entregado',
+                 'fecha_creacion': inicio + timedelta(minutes=i)}
+                for i in ids
+            ])
+            conn.execute(insert(DetallePedido), [
+                {'id_pedido': i, 'id_producto': (i + n) % 40 + 1, 'cantidad': 1, 'precio_unitario': 100}
+                for i in ids for n in range(LINEAS_POR_PEDIDO)
+            ])
+
+def medir(engine, formato, lineas):
+    """Exporta a /dev/null y reporta el pico de memoria al 10%, 50% y 100%"""
+    with Session(engine) as db:
+        tracemalloc.start()
+        puntos = {}
+        escritas = 0
+        inicio = time.perf_counter()
+        with open(os.devnull, 'w') as salida:
+            for trozo in exportar(db, formato):
+                salida.write(trozo)
+                escritas += trozo.count('\n')
+                for fraccion in (0.1, 0.5):
+                    if fraccion not in puntos and escritas >= lineas * fraccion:
+                        puntos[fraccion] = tracemalloc.get_traced_memory()[1]
+        puntos[1.0] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        segundos = time.perf_counter() - inicio
+    detalle = ', '.join(f'{int(f * 100)}%: {pico / 1024:.0f} KB' for f, pico in sorted(puntos.items()))
+    print(f'{formato:>5}: {escritas} líneas en {segundos:.1f}s ({escritas / segundos:,.0f}/s); pico {detalle}')
+    # Memoria plana: exportar todo no puede costar mucho más que exportar el primer 10%
+    plana = puntos[1.0] <= puntos[0.1] * CRECIMIENTO_MAXIMO
+    if not plana:
+        print(f'{formato:>5}: la memoria creció {puntos[1.0] / puntos[0.1]:.2f}x del 10% al 100%')
+    return plana
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lineas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine(f'sqlite:///{os.path.join(directorio, "export.db")}')
+        sembrar(engine, args.lineas)
+        planas = [medir(engine, formato, args.lineas) for formato in ('csv', 'jsonl')]
+    if not all(planas):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
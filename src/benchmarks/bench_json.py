@@ -0,0 +1,89 @@
+# Serialización de respuestas grandes de pedidos: el camino anterior (dicts
+# armados a mano con float() y el proveedor JSON por defecto de Flask) contra
+# serialization.py (serializadores precalculados + orjson) y MessagePack.
+# Los objetos son modelos en memoria, sin base de datos.
+# Uso (desde src/): python -m benchmarks.bench_json --pedidos 5000
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import serialization
+from database.models import Producto, Pedido, DetallePedido
+from serialization import ProveedorJSON, DETALLE, PEDIDO_RESUMEN
+
+def construir(pedidos, lineas):
+    productos = [Producto(id_producto=i, nombre=f'Rollo {i}', precio=Decimal('89.50') + i) for i in range(1, 41)]
+    inicio = datetime(2024, 1, 1)
+    resultado = []
+    for i in range(1, pedidos + 1):
+        pedido = Pedido(id_pedido=i, codigo_pedido=f'B{i}', estado='entregado', total=Decimal('448.00'),
+                        num_articulos=lineas, fecha_creacion=inicio + timedelta(minutes=i))
+        # nota=None explícito: como en una fila cargada de la base (leer un atributo sin valor es más lento)
+        pedido.detalles = [DetallePedido(producto=productos[(i + n) % 40], cantidad=n + 1, nota=None,
+                                      precio_unitario=productos[(i + n) % 40].precio)
+                        for n in range(lineas)]
+        resultado.append(pedido)
+    return resultado
+
+def anterior(pedidos):
+    """Como api_order_details/debug_pedidos antes de serialization.py"""
+    return {'pedidos': [{
+        'id': p.id_pedido, 'codigo': p.codigo_pedido, 'estado': p.estado,
+        'total': float(p.total), 'num_articulos': p.num_articulos,
+        'detalles': [{
+            'producto': d.producto.nombre, 'cantidad': d.cantidad,
+            'precio': float(d.precio_unitario), 'subtotal': float(d.cantidad * d.precio_unitario),
+        } for d in p.detalles],
+    } for p in pedidos]}
+
+def nuevo(pedidos):
+    return {'pedidos': [{**PEDIDO_RESUMEN(p), 'detalles': [DETALLE(d) for d in p.detalles]} for p in pedidos]}
+
+def medir(armar, codificar, repeticiones):
+    """Mejor tiempo de armar los dicts y de codificarlos, por separado"""
+    mejor_armado = mejor_codificado = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        datos = armar()
+        medio = time.perf_counter()
+        cuerpo = codificar(datos)
+        fin = time.perf_counter()
+        mejor_armado = min(mejor_armado, medio - inicio)
+        mejor_codificado = min(mejor_codificado, fin - medio)
+    return mejor_armado, mejor_codificado, len(cuerpo)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pedidos', type=int, default=5000)
+    parser.add_argument('--lineas', type=int, default=4)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    pedidos = construir(args.pedidos, args.lineas)
+    app = Flask(__name__)
+    por_defecto = DefaultJSONProvider(app)
+    rapido = ProveedorJSON(app)
+
+    casos = [('anterior (float + json)', lambda: anterior(pedidos), lambda d: por_defecto.response(d).get_data())]
+    if not serialization.orjson:
+        print('orjson no está instalado; se mide el proveedor con json estándar')
+    casos.append(('serialization.py', lambda: nuevo(pedidos), lambda d: rapido.response(d).get_data()))
+    if serialization.msgpack:
+        casos.append(('serialization.py msgpack', lambda: nuevo(pedidos),
+                      lambda d: serialization.msgpack.packb(d, default=serialization.convertir)))
+
+    print(f'{args.pedidos} pedidos x {args.lineas} líneas')
+    print(f'{"":26} {"armado":>9} {"codificado":>11} {"total":>9} {"tamaño":>9}')
+    with app.app_context():
+        for nombre, armar, codificar in casos:
+            armado, codificado, tamano = medir(armar, codificar, args.repeticiones)
+            print(f'{nombre:26} {armado * 1000:6.1f} ms {codificado * 1000:8.1f} ms '
+                  f'{(armado + codificado) * 1000:6.1f} ms {tamano / 1024:6.0f} KB')
+
+if __name__ == '__main__':
+    main()
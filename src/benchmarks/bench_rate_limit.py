@@ -0,0 +1,26 @@
+# Microbenchmark del limitador: costo por petición en el camino feliz.
+# Uso (desde src/): python -m benchmarks.bench_rate_limit
+
+import timeit
+
+from rate_limit import MemoriaBackend
+
+def main(n=200_000):
+    backend = MemoriaBackend()
+    # Capacidad enorme: todas las llamadas pasan, que es el caso a medir
+    llaves = [f'generar_pedido:u{i}' for i in range(1000)]
+
+    def una_llave():
+        backend.consumir('generar_pedido:u1', 10**9, 1000)
+
+    contador = iter(range(10**9))
+
+    def muchas_llaves():
+        backend.consumir(llaves[next(contador) % 1000], 10**9, 1000)
+
+    for nombre, fn in (('una llave', una_llave), ('1000 llaves', muchas_llaves)):
+        segundos = min(timeit.repeat(fn, number=n, repeat=3))
+        print(f'{nombre:>12}: {segundos / n * 1e9:8.0f} ns/consumo')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Tiempo de arranque en frío: importar app, create_app() y la primera petición,
+# cada corrida en un proceso nuevo para no heredar módulos ya importados.
+# Uso (desde src/): python -m benchmarks.bench_startup --corridas 10
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Se ejecuta en el proceso hijo; imprime una línea JSON con los tiempos en ms
+MEDICION = r'''
+import json, sys, time
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+aplicacion = app.create_app({'TESTING': True})
+creada = time.perf_counter()
+respuesta = aplicacion.test_client().get('/login')
+atendida = time.perf_counter()
+import database
+print(json.dumps({
+    'importar': (importado - inicio) * 1000,
+    'create_app': (creada - importado) * 1000,
+    'primera_peticion': (atendida - creada) * 1000,
+    'total': (atendida - inicio) * 1000,
+    'modulos': len(sys.modules),
+    'engine_creado': database._engine is not None,
+    'status': respuesta.status_code,
+}))
+'''
+
+def correr(entorno):
+    salida = subprocess.run([sys.executable, '-c', MEDICION], env=entorno, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío de la app")
+    parser.add_argument('--corridas', type=int, default=10)
+    args = parser.parse_args()
+
+    entorno = dict(os.environ)
+    # La primera petición no consulta la base; la URL solo debe ser válida
+    entorno.setdefault('DB_URL', 'sqlite:///:memory:')
+    entorno['RATE_LIMIT_ENABLED'] = '0'
+
+    correr(entorno)  # calienta los .pyc para medir arranque, no compilación
+    corridas = [correr(entorno) for _ in range(args.corridas)]
+    for clave in ('importar', 'create_app', 'primera_peticion', 'total'):
+        valores = [c[clave] for c in corridas]
+        print(f'{clave:>17}: mediana {statistics.median(valores):7.1f} ms  (min {min(valores):.1f}, max {max(valores):.1f})')
+    print(f'{"módulos cargados":>17}: {corridas[-1]["modulos"]}')
+    print(f'{"engine creado":>17}: {"sí" if any(c["engine_creado"] for c in corridas) else "no"}')
+
+if __name__ == '__main__':
+    main()
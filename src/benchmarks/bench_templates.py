@@ -0,0 +1,31 @@
+# Costo de la primera carga de cada plantilla en un worker nuevo: compilando
+# desde el fuente vs. leyendo el bytecode de TEMPLATE_CACHE_DIR.
+# Uso (desde src/): python -m benchmarks.bench_templates
+
+import os
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+PLANTILLAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+def cargar_todas(bytecode_cache=None):
+    """Entorno nuevo (como un worker recién creado) y carga de todas las plantillas"""
+    entorno = Environment(loader=FileSystemLoader(PLANTILLAS), bytecode_cache=bytecode_cache)
+    inicio = time.perf_counter()
+    for nombre in entorno.list_templates(extensions=['html']):
+        entorno.get_template(nombre)
+    return time.perf_counter() - inicio
+
+def main(repeticiones=5):
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = FileSystemBytecodeCache(directorio)
+        cargar_todas(cache)  # precompilación, como `flask precompilar-plantillas`
+        sin_cache = min(cargar_todas() for _ in range(repeticiones))
+        con_cache = min(cargar_todas(cache) for _ in range(repeticiones))
+    print(f'compilando: {sin_cache * 1000:7.1f} ms')
+    print(f'bytecode:   {con_cache * 1000:7.1f} ms  ({sin_cache / con_cache:.1f}x)')
+
+if __name__ == '__main__':
+    main()
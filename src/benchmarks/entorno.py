@@ -0,0 +1,17 @@
+# Base de los benchmarks. Se importa antes que la app: Config lee el entorno
+# al importarse, así que aquí no se importa nada del proyecto.
+
+import os
+import tempfile
+
+def base_temporal(nombre):
+    """
+    Sin base configurada (DB_URL, DATABASE_URL o DB_ENGINE) usa un SQLite en un
+    directorio temporal; devuelve ese directorio, o None si se usa la configurada.
+    """
+    if any(os.getenv(variable) for variable in ('DB_URL', 'DATABASE_URL', 'DB_ENGINE')):
+        return None
+    directorio = tempfile.mkdtemp(prefix=f'kinoa-{nombre}-')
+    os.environ['DB_ENGINE'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(directorio, f'{nombre}.db')
+    return directorio
@@ -0,0 +1,214 @@
+# Reinicio de un worker bajo carga. Levanta gunicorn (eventlet) con
+# gunicorn.conf.py, varios hilos generan pedidos sin parar y un cliente
+# Socket.IO (long-polling) escucha /notifications. A mitad de la prueba se
+# manda SIGHUP al maestro: arranca un worker nuevo y apaga el anterior con
+# SIGTERM (ver shutdown.py). Al final se compara lo que vieron los clientes con
+# lo que quedó en la base: ningún pedido aceptado puede faltar y ninguna
+# petición puede quedarse sin respuesta.
+#
+# Uso (desde src/): python -m benchmarks.reinicio --duracion 20 --hilos 8
+# Sin base configurada usa un SQLite temporal; una base propia (DB_URL) debe
+# estar vacía. Corre un solo worker: las sesiones en memoria no se comparten.
+
+import argparse
+import http.cookiejar
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+from benchmarks.entorno import base_temporal
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+def _cliente():
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                       _SinRedireccion())
+
+def _post(cliente, url, datos, timeout=30):
+    """(status, Location) sin seguir redirecciones"""
+    cuerpo = urllib.parse.urlencode(datos).encode()
+    try:
+        with cliente.open(url, cuerpo, timeout=timeout) as respuesta:
+            return respuesta.status, respuesta.headers.get('Location', '')
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get('Location', '')
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _hijos(pid):
+    salida = subprocess.run(['ps', '-o', 'pid=', '--ppid', str(pid)], capture_output=True, text=True).stdout
+    return {int(linea) for linea in salida.split()}
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+# ----------------------------------------------------------------------
+## Clientes
+# ----------------------------------------------------------------------
+
+def generar_pedidos(base, usuario, password, indice, fin, resultados, bloqueo):
+    """Un cliente que pide sin parar; cada pedido lleva su marca en las notas"""
+    cliente = _cliente()
+    _post(cliente, f'{base}/login', {'nombre_usuario': usuario, 'contraseña': password})
+    numero = 0
+    while time.monotonic() < fin:
+        numero += 1
+        marca = f'reinicio-{indice}-{numero}'
+        formulario = {'nombre': 'Prueba Reinicio', 'telefono': '5555555555', 'colonia': 'Centro',
+                      'calle': 'Calle', 'no_exterior': '1', 'notas': marca,
+                      'items[1][cantidad]': '2', 'items[1][precio]': '100.00'}
+        for _ in range(3):
+            try:
+                status, destino = _post(cliente, f'{base}/generar_pedido', formulario)
+            except (OSError, urllib.error.URLError) as e:
+                resultado = ('sin_respuesta', type(getattr(e, 'reason', e)).__name__)
+                break
+            if status == 302 and '/login' in destino:
+                # El worker nuevo no conoce la sesión (almacén en memoria): se vuelve a entrar
+                with bloqueo:
+                    resultados['sesiones_perdidas'] += 1
+                _post(cliente, f'{base}/login', {'nombre_usuario': usuario, 'contraseña': password})
+                continue
+            resultado = ('aceptado', None) if status == 302 and '/order_details/' in destino else ('rechazado', status)
+            break
+        else:
+            resultado = ('rechazado', 'login')
+        with bloqueo:
+            resultados['pedidos'].append((marca, *resultado))
+
+def escuchar_socket(base, fin, eventos):
+    """Cliente Engine.IO v4 por long-polling: registra los mensajes y cuándo lo cerró el servidor"""
+    url = f'{base}/socket.io/?EIO=4&transport=polling'
+    abridor = urllib.request.build_opener()
+    with abridor.open(url, timeout=10) as respuesta:
+        sid = json.loads(respuesta.read().decode()[1:])['sid']
+    url = f'{url}&sid={sid}'
+    abridor.open(urllib.request.Request(url, b'40/notifications,', method='POST'), timeout=10).read()
+    while time.monotonic() < fin:
+        try:
+            with abridor.open(url, timeout=60) as respuesta:
+                paquetes = respuesta.read().decode().split('\x1e')
+        except (OSError, urllib.error.URLError) as e:
+            eventos.append((time.monotonic(), 'cerrado', str(getattr(e, 'code', e))))
+            return
+        for paquete in paquetes:
+            if paquete == '2':
+                abridor.open(urllib.request.Request(url, b'3', method='POST'), timeout=10).read()
+            elif paquete == '1':
+                eventos.append((time.monotonic(), 'cerrado', 'close'))
+                return
+            elif paquete.startswith('42/notifications,'):
+                nombre, *datos = json.loads(paquete[len('42/notifications,'):])
+                eventos.append((time.monotonic(), nombre, datos[0] if datos else None))
+            elif paquete.startswith('41/notifications'):
+                eventos.append((time.monotonic(), 'cerrado', 'namespace'))
+                return
+
+# ----------------------------------------------------------------------
+## Prueba
+# ----------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duracion', type=float, default=20)
+    parser.add_argument('--reinicio-en', type=float, default=None, help='Segundos hasta el SIGHUP (mitad)')
+    parser.add_argument('--hilos', type=int, default=8)
+    args = parser.parse_args()
+
+    # Sin base configurada, un SQLite temporal (en WAL, por Config): durante el reinicio escriben dos workers
+    directorio = base_temporal('reinicio') or tempfile.mkdtemp(prefix='kinoa-reinicio-')
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    os.environ.setdefault('ADMISSION_ENABLED', '0')
+
+    from sqlalchemy import select
+    from database import engine
+    from database.models import Pedido
+    from benchmarks.seed import sembrar, PASSWORD
+    sembrar(engine, usuarios=args.hilos + 10, productos=5, pedidos=0, tamano_imagen=100, avisar=lambda m: None)
+
+    puerto = _puerto_libre()
+    base = f'http://127.0.0.1:{puerto}'
+    entorno = {**os.environ, 'GUNICORN_BIND': f'127.0.0.1:{puerto}', 'GUNICORN_WORKERS': '1'}
+    bitacora = os.path.join(directorio, 'gunicorn.log')
+    maestro = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+                               env=entorno, stdout=subprocess.DEVNULL, stderr=open(bitacora, 'w'))
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f'{base}/salud', timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            raise SystemExit(f'gunicorn no arrancó; ver {bitacora}')
+        worker_anterior = _hijos(maestro.pid)
+
+        inicio = time.monotonic()
+        fin = inicio + args.duracion
+        resultados = {'pedidos': [], 'sesiones_perdidas': 0}
+        eventos_socket = []
+        bloqueo = threading.Lock()
+        hilos = [threading.Thread(target=generar_pedidos,
+                                  args=(base, f'cliente{6 + i}', PASSWORD, i, fin, resultados, bloqueo))
+                 for i in range(args.hilos)]
+        hilos.append(threading.Thread(target=escuchar_socket, args=(base, fin, eventos_socket)))
+        for hilo in hilos:
+            hilo.start()
+
+        time.sleep(args.duracion / 2 if args.reinicio_en is None else args.reinicio_en)
+        reinicio = time.monotonic()
+        os.kill(maestro.pid, signal.SIGHUP)
+        while any(_vivo(pid) for pid in worker_anterior) and time.monotonic() < fin + 60:
+            time.sleep(0.05)
+        apagado = time.monotonic() - reinicio
+
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        maestro.send_signal(signal.SIGTERM)
+        try:
+            maestro.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            maestro.kill()
+
+    with engine.connect() as conn:
+        guardados = set(conn.execute(select(Pedido.notas).where(Pedido.notas.like('reinicio-%'))).scalars())
+
+    conteo = Counter(resultado for _, resultado, _ in resultados['pedidos'])
+    perdidos = [marca for marca, resultado, _ in resultados['pedidos'] if resultado == 'aceptado' and marca not in guardados]
+    fallas = Counter(f'{resultado}:{detalle}' for _, resultado, detalle in resultados['pedidos'] if resultado != 'aceptado')
+    print(f"{len(resultados['pedidos'])} pedidos enviados en {args.duracion:.0f}s con {args.hilos} hilos")
+    print(f"  aceptados: {conteo['aceptado']}  perdidos: {len(perdidos)}  guardados en la base: {len(guardados)}")
+    for falla, cantidad in fallas.items():
+        print(f'  {falla}: {cantidad}')
+    print(f"  sesiones perdidas (almacén en memoria): {resultados['sesiones_perdidas']}")
+    print(f'  worker anterior apagado {apagado:.1f}s después del SIGHUP')
+    for momento, nombre, datos in eventos_socket:
+        if nombre in ('reconectar', 'cerrado'):
+            print(f'  socket: {nombre} {datos} a los {momento - reinicio:+.1f}s del SIGHUP')
+    # Un rechazo es una respuesta de error que el cliente sí vio (p. ej. un codigo_pedido
+    # al azar repetido); lo inaceptable es perder un pedido aceptado o una respuesta
+    if perdidos or conteo['sin_respuesta']:
+        raise SystemExit(f'Pedidos perdidos o sin respuesta; bitácora de gunicorn en {bitacora}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+# Pruebas de carga reproducibles contra una base local sembrada.
+# Corre la app en proceso (cliente de pruebas de Flask) con varios hilos y
+# reporta p50/p95/p99, throughput y consultas por petición de cada escenario.
+# Cada escenario corre exactamente --muestras peticiones, intercaladas en un
+# orden fijo por la semilla, para que los percentiles de dos corridas sean
+# comparables aunque un escenario sea mucho más lento que otro.
+#
+# Uso (desde src/):
+#   python -m benchmarks.run --pedidos 10000 --muestras 200 --guardar benchmarks/baseline.json
+#   python -m benchmarks.run --comparar benchmarks/baseline.json
+# Sin base configurada usa un SQLite temporal. Contra Postgres (o un SQLite propio)
+# basta configurarla como la app (DB_URL, o DB_ENGINE y sus variables); esa base
+# se siembra solo con --sembrar y debe estar vacía:
+#   DB_URL=postgresql://kinoa@localhost/kinoa_bench python -m benchmarks.run --sembrar
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+from benchmarks.entorno import base_temporal
+
+ESCENARIOS = {}
+NAMESPACE = '/notifications'
+ESPERA_PUSH = 5.0  # segundos; más que eso cuenta como push perdido
+
+def escenario(nombre, rol='cliente'):
+    def registrar(fn):
+        ESCENARIOS[nombre] = {'rol': rol, 'fn': fn}
+        return fn
+    return registrar
+
+class _Resultado:
+    """Respuesta sintética de los escenarios que no terminan en una sola petición HTTP"""
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+@escenario('menu')
+def _menu(c, rnd, datos):
+    return c.get('/menu')
+
+@escenario('product_image')
+def _imagen(c, rnd, datos):
+    return c.get(f"/product_image/{rnd.randint(1, datos['productos'])}")
+
+@escenario('mis_pedidos')
+def _mis_pedidos(c, rnd, datos):
+    return c.get('/mis_pedidos')
+
+@escenario('generar_pedido')
+def _generar_pedido(c, rnd, datos):
+    formulario = {'nombre': 'Bench Cliente', 'telefono': '5555555555', 'colonia': 'Centro',
+                  'calle': 'Calle', 'no_exterior': '1', 'notas': ''}
+    for id_producto in rnd.sample(range(1, datos['productos'] + 1), rnd.randint(1, 4)):
+        formulario[f'items[{id_producto}][cantidad]'] = str(rnd.randint(1, 3))
+        formulario[f'items[{id_producto}][precio]'] = '120.00'
+    return c.post('/generar_pedido', data=formulario)
+
+@escenario('admin_orders', rol='admin')
+def _admin_orders(c, rnd, datos):
+    return c.get('/admin/orders')
+
+@escenario('api_order_details', rol='admin')
+def _detalle(c, rnd, datos):
+    return c.get(f"/admin/api/order_details/{rnd.randint(1, datos['pedidos'])}")
+
+@escenario('change_order_status', rol='admin')
+def _cambiar_estado(c, rnd, datos):
+    # Del otro extremo del mismo depósito que socket_cocina: cada muestra es una transición válida
+    try:
+        id_pedido = datos['pendiente'].pop()
+    except IndexError:
+        return _Resultado(410)
+    return c.post('/admin/api/change_order_status', data={'order_id': id_pedido, 'status': 'preparando'})
+
+def _push_tras_cambio(suscriptor, datos, origen, nuevo, evento):
+    """
+    Cambia de estado un pedido que está en `origen` y espera el push `evento` en
+    la sala a la que se unió el suscriptor. Mide del POST al push, incluida la
+    ventana LIVE_PUSH_DELAY_SECONDS en la que se juntan los cambios.
+    """
+    try:
+        id_pedido = datos[origen].popleft()
+    except IndexError:
+        return _Resultado(410)  # se acabaron los pedidos sembrados en ese estado
+    # Lo recibido antes del cambio son pushes de otros hilos
+    suscriptor['socket'].get_received(NAMESPACE)
+    respuesta = suscriptor['http'].post('/admin/api/change_order_status',
+                                        data={'order_id': id_pedido, 'status': nuevo})
+    respuesta.close()
+    if respuesta.status_code >= 400:
+        return respuesta
+    limite = time.monotonic() + ESPERA_PUSH
+    while time.monotonic() < limite:
+        if any(r['name'] == evento for r in suscriptor['socket'].get_received(NAMESPACE)):
+            return _Resultado(200)
+        time.sleep(0.005)
+    return _Resultado(504)
+
+@escenario('socket_cocina', rol='socket_cocina')
+def _socket_cocina(suscriptor, rnd, datos):
+    return _push_tras_cambio(suscriptor, datos, 'pendiente', 'preparando', 'cocina')
+
+@escenario('socket_reparto', rol='socket_reparto')
+def _socket_reparto(suscriptor, rnd, datos):
+    return _push_tras_cambio(suscriptor, datos, 'preparando', 'listo', 'reparto')
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+def preparar_entorno(args):
+    """Variables de entorno antes de importar la app (la base se elige al importar)"""
+    if base_temporal('bench'):
+        args.sembrar = True
+    # Se mide la app, no los límites de protección
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    os.environ.setdefault('ADMISSION_ENABLED', '0')
+
+def ejecutar(args):
+    preparar_entorno(args)
+
+    from sqlalchemy import event, select
+    from sqlalchemy.engine import Engine
+    from database import engine
+    from database.models import Pedido
+    from benchmarks.seed import sembrar, PASSWORD
+
+    if args.sembrar:
+        inicio = time.perf_counter()
+        sembrar(engine, args.usuarios, args.productos, args.pedidos, semilla=args.semilla, avisar=lambda m: None)
+        print(f'Base sembrada en {time.perf_counter() - inicio:.1f}s: {args.pedidos} pedidos')
+
+    from app import create_app
+    from extensions import socketio
+    app = create_app()
+
+    local = threading.local()
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def contar(*_):
+        local.consultas = getattr(local, 'consultas', 0) + 1
+
+    def sesion(usuario):
+        cliente = app.test_client()
+        cliente.post('/login', data={'nombre_usuario': usuario, 'contraseña': PASSWORD})
+        return cliente
+
+    def suscriptor(sala):
+        http = sesion('admin1')
+        socket = socketio.test_client(app, namespace=NAMESPACE, flask_test_client=http)
+        socket.emit(f'join_{sala}', namespace=NAMESPACE)
+        return {'http': http, 'socket': socket}
+
+    nombres = [n for n in ESCENARIOS if not args.escenarios or n in args.escenarios]
+    datos = {'productos': args.productos, 'pedidos': args.pedidos}
+    # Pedidos sembrados en el estado de origen de los escenarios que cambian
+    # estados; cada muestra consume uno (deque: pop/popleft son seguros entre hilos)
+    with engine.connect() as conexion:
+        for estado in ('pendiente', 'preparando'):
+            datos[estado] = deque(conexion.execute(
+                select(Pedido.id_pedido).where(Pedido.estado == estado).order_by(Pedido.id_pedido)
+            ).scalars())
+    # Exactamente args.muestras de cada escenario, en un orden fijo por la semilla
+    pendientes = [n for n in nombres for _ in range(args.muestras)]
+    random.Random(args.semilla).shuffle(pendientes)
+    pendientes = deque(pendientes)
+    muestras = defaultdict(list)
+    errores = defaultdict(int)
+    bloqueo = threading.Lock()
+
+    def trabajador(indice):
+        rnd = random.Random(args.semilla + indice)
+        clientes = {'cliente': sesion(f'cliente{6 + indice}'), 'admin': sesion('admin1')}
+        for sala in ('cocina', 'reparto'):
+            if f'socket_{sala}' in nombres:
+                clientes[f'socket_{sala}'] = suscriptor(sala)
+        propias = defaultdict(list)
+        fallidas = defaultdict(int)
+        while True:
+            try:
+                nombre = pendientes.popleft()
+            except IndexError:
+                break
+            definicion = ESCENARIOS[nombre]
+            local.consultas = 0
+            inicio = time.perf_counter()
+            respuesta = definicion['fn'](clientes[definicion['rol']], rnd, datos)
+            respuesta.close()
+            propias[nombre].append((time.perf_counter() - inicio, local.consultas))
+            if respuesta.status_code >= 400:
+                fallidas[nombre] += 1
+        for rol, cliente in clientes.items():
+            if rol.startswith('socket_'):
+                cliente['socket'].disconnect(namespace=NAMESPACE)
+        with bloqueo:
+            for nombre, valores in propias.items():
+                muestras[nombre].extend(valores)
+            for nombre, n in fallidas.items():
+                errores[nombre] += n
+
+    hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(args.hilos)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    resultados = {}
+    for nombre in nombres:
+        valores = muestras.get(nombre, [])
+        latencias = sorted(v[0] for v in valores)
+        resultados[nombre] = {
+            'peticiones': len(valores),
+            'errores': errores.get(nombre, 0),
+            'p50_ms': round(_percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(_percentil(latencias, 95) * 1000, 2),
+            'p99_ms': round(_percentil(latencias, 99) * 1000, 2),
+            # Con las muestras intercaladas, rps es la parte del throughput total que se llevó cada escenario
+            'rps': round(len(valores) / duracion, 1),
+            'consultas_por_peticion': round(sum(v[1] for v in valores) / len(valores), 1) if valores else 0,
+        }
+    return {
+        'config': {'usuarios': args.usuarios, 'productos': args.productos, 'pedidos': args.pedidos,
+                   'hilos': args.hilos, 'muestras': args.muestras, 'semilla': args.semilla,
+                   'motor': engine.dialect.name, 'duracion_s': round(duracion, 1)},
+        'escenarios': resultados,
+    }
+
+def imprimir(resultado, base=None):
+    print(f"{'escenario':<22}{'n':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}{'consultas':>10}")
+    for nombre, r in resultado['escenarios'].items():
+        linea = (f"{nombre:<22}{r['peticiones']:>7}{r['errores']:>5}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                 f"{r['p99_ms']:>9}{r['rps']:>8}{r['consultas_por_peticion']:>10}")
+        anterior = (base or {}).get('escenarios', {}).get(nombre)
+        if anterior and anterior['p95_ms']:
+            cambio = (r['p95_ms'] - anterior['p95_ms']) / anterior['p95_ms'] * 100
+            mas_consultas = r['consultas_por_peticion'] > anterior['consultas_por_peticion'] * 1.1
+            marca = '  REGRESIÓN' if cambio > 10 or mas_consultas else ''
+            linea += f"   p95 {cambio:+.0f}% consultas {anterior['consultas_por_peticion']}→{r['consultas_por_peticion']}{marca}"
+        print(linea)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--usuarios', type=int, default=500)
+    parser.add_argument('--productos', type=int, default=60)
+    parser.add_argument('--pedidos', type=int, default=10_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--hilos', type=int, default=4)
+    parser.add_argument('--muestras', type=int, default=200, help='Peticiones por escenario')
+    parser.add_argument('--sembrar', action='store_true', help='Sembrar la base configurada (vacía) antes de correr')
+    parser.add_argument('--escenarios', nargs='*', help=f"Subconjunto de: {', '.join(ESCENARIOS)}")
+    parser.add_argument('--guardar', help='Escribe los resultados como JSON (baseline)')
+    parser.add_argument('--comparar', help='Baseline JSON contra el cual comparar')
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args)
+    base = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+    imprimir(resultado, base)
+    if args.guardar:
+        # Formato estable para que las regresiones se vean en un diff
+        with open(args.guardar, 'w') as f:
+            json.dump(resultado, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# Datos sintéticos reproducibles para benchmarks: usuarios, productos con
+# imagen y un historial grande de pedidos. Mismo seed -> mismos datos.
+# Uso (desde src/): DB_URL=sqlite:///bench.db python -m benchmarks.seed --pedidos 200000
+# o sobre la base configurada: flask --app app sembrar (Postgres o SQLite, vacía)
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+
+from database.models import (
+    Base, Rol, Usuario, PerfilUsuario, Producto, Pedido, DetallePedido, Notificacion
+)
+from database.create_db import crear_esquema
+from order_summary import resumir
+
+PASSWORD = 'bench-123'
+ESTADOS = ('pendiente', 'preparando', 'listo', 'enviado', 'entregado', 'entregado', 'entregado', 'cancelado')
+
+def sembrar(engine, usuarios=2000, productos=60, pedidos=200_000, max_lineas=4,
+            tamano_imagen=40_000, semilla=42, lote=10_000, avisar=print):
+    rnd = random.Random(semilla)
+    crear_esquema(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(Usuario)).scalar():
+            raise ValueError('La base ya tiene usuarios; sembrar necesita una base vacía')
+    # Un solo hash para todos: sembrar no debe tardar lo que tarda scrypt por usuario
+    password_hash = generate_password_hash(PASSWORD)
+    ahora = datetime.utcnow().replace(microsecond=0)
+
+    with engine.begin() as conn:
+        # Los roles pueden existir ya (`flask crear-esquema` los crea)
+        roles = dict(conn.execute(select(Rol.nombre, Rol.id_rol)).all())
+        faltantes = [{'nombre': nombre} for nombre in ('cliente', 'admin') if nombre not in roles]
+        if faltantes:
+            conn.execute(insert(Rol), faltantes)
+            roles = dict(conn.execute(select(Rol.nombre, Rol.id_rol)).all())
+        conn.execute(insert(Usuario), [
+            {'id_usuario': i, 'nombre_usuario': f'admin{i}' if i <= 5 else f'cliente{i}',
+             'contrasena_hash': password_hash, 'telefono': f'55{i:08d}',
+             'id_rol': roles['admin'] if i <= 5 else roles['cliente'],
+             'activo': True, 'fecha_registro': ahora - timedelta(days=rnd.randint(0, 720))}
+            for i in range(1, usuarios + 1)
+        ])
+        conn.execute(insert(PerfilUsuario), [
+            {'id_usuario': i, 'nombre': f'Nombre{i}', 'apellidoP': 'Apellido', 'apellidoM': '',
+             'colonia': f'Colonia {i % 40}', 'calle': 'Calle', 'no_exterior': str(i)}
+            for i in range(1, usuarios + 1)
+        ])
+        imagen = rnd.randbytes(tamano_imagen)
+        conn.execute(insert(Producto), [
+            {'id_producto': i, 'sku': f'SKU-{i:04d}', 'nombre': f'Rollo {i}', 'descripcion': 'Rollo de prueba ' * 4,
+             'precio': Decimal(rnd.randint(80, 260)), 'imagen': imagen, 'disponible': i % 10 != 0,
+             'tiempo_preparacion': rnd.randint(5, 25)}
+            for i in range(1, productos + 1)
+        ])
+    avisar(f'{usuarios} usuarios y {productos} productos')
+
+    precios = {}
+    id_detalle = 0
+    for base in range(0, pedidos, lote):
+        filas_pedido, filas_detalle = [], []
+        for id_pedido in range(base + 1, min(base + lote, pedidos) + 1):
+            fecha = ahora - timedelta(minutes=(pedidos - id_pedido) * 3)
+            lineas = []
+            for id_producto in rnd.sample(range(1, productos + 1), rnd.randint(1, max_lineas)):
+                precio = precios.setdefault(id_producto, Decimal(80 + id_producto))
+                cantidad = rnd.randint(1, 3)
+                lineas.append((f'Rollo {id_producto}', cantidad, precio))
+                id_detalle += 1
+                filas_detalle.append({'id_detalle_pedido': id_detalle, 'id_pedido': id_pedido,
+                                      'id_producto': id_producto, 'cantidad': cantidad, 'precio_unitario': precio})
+            resumen = resumir(lineas)
+            filas_pedido.append({
+                'id_pedido': id_pedido, 'codigo_pedido': f'S{id_pedido}', 'id_usuario': rnd.randint(6, usuarios),
+                'total': resumen['subtotal'] + resumen['impuestos'], **resumen,
+                'estado': ESTADOS[rnd.randrange(len(ESTADOS))] if id_pedido < pedidos - 50 else 'pendiente',
+                'notas': 'Cliente: Bench. Dirección: Calle 1, Col. Centro.',
+                'fecha_creacion': fecha, 'fecha_actualizacion': fecha,
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Pedido), filas_pedido)
+            conn.execute(insert(DetallePedido), filas_detalle)
+            conn.execute(insert(Notificacion), [
+                {'id_usuario': p['id_usuario'], 'tipo': 'cambio_estado', 'titulo': 'Pedido',
+                 'mensaje': f"Tu pedido {p['codigo_pedido']}", 'id_pedido': p['id_pedido'],
+                 'leida': rnd.random() < 0.8, 'fecha_creacion': p['fecha_creacion']}
+                for p in filas_pedido[::4]
+            ])
+        avisar(f'{min(base + lote, pedidos)} pedidos')
+    ajustar_secuencias(engine)
+
+def ajustar_secuencias(engine):
+    """Los ids se insertan explícitos: en Postgres las secuencias se mueven tras el máximo"""
+    if engine.dialect.name != 'postgresql':
+        return
+    with engine.begin() as conn:
+        for tabla in Base.metadata.sorted_tables:
+            columna = tabla.autoincrement_column
+            if columna is None:
+                continue
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{tabla.name}', '{columna.name}'), "
+                f"COALESCE(MAX({columna.name}), 0) + 1, false) FROM {tabla.name}"
+            ))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--usuarios', type=int, default=2000)
+    parser.add_argument('--productos', type=int, default=60)
+    parser.add_argument('--pedidos', type=int, default=200_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    from database import engine
+    print(f'Sembrando {engine.url.render_as_string(hide_password=True)}')
+    try:
+        sembrar(engine, args.usuarios, args.productos, args.pedidos, semilla=args.semilla)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+# src/commands.py
+# Comandos de línea de comandos: flask --app app <comando>
+import json
+import signal
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from database import db_session, get_engine
+from database.create_db import crear_esquema
+from database.models import Rol
+from reports import reconstruir_resumenes
+from exports import exportar, FORMATOS
+from product_import import importar_productos
+from archive import ejecutar_retencion
+from assets import comprimir_estaticos
+from order_summary import rellenar_resumenes
+from order_events import reconstruir_etapas
+
+def inicializar_roles():
+    """Crea los roles básicos si no existen"""
+    roles_necesarios = ['cliente', 'admin', 'repartidor']
+    
+    for rol_nombre in roles_necesarios:
+        rol_existente = db_session.query(Rol).filter_by(nombre=rol_nombre).first()
+        if not rol_existente:
+            nuevo_rol = Rol(nombre=rol_nombre)
+            db_session.add(nuevo_rol)
+            print(f"Rol '{rol_nombre}' creado")
+    
+    try:
+        db_session.commit()
+        print("Roles inicializados correctamente")
+    except Exception as e:
+        db_session.rollback()
+        print(f"Error al crear roles: {e}")
+
+@click.command('inicializar-roles')
+@with_appcontext
+def inicializar_roles_command():
+    """Crea los roles básicos: flask --app app inicializar-roles"""
+    inicializar_roles()
+
+@click.command('crear-esquema')
+@with_appcontext
+def crear_esquema_command():
+    """Crea o pone al día las tablas y los roles en la base configurada: flask --app app crear-esquema"""
+    crear_esquema(get_engine())
+    inicializar_roles()
+
+@click.command('sembrar')
+@click.option('--usuarios', type=int, default=200)
+@click.option('--productos', type=int, default=60)
+@click.option('--pedidos', type=int, default=5000)
+@click.option('--semilla', type=int, default=42, help='Misma semilla, mismos datos')
+@with_appcontext
+def sembrar_command(usuarios, productos, pedidos, semilla):
+    """Datos sintéticos en una base vacía (los de los benchmarks): flask --app app sembrar"""
+    from benchmarks.seed import sembrar, PASSWORD
+    try:
+        sembrar(get_engine(), usuarios, productos, pedidos, semilla=semilla, avisar=click.echo)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Usuarios admin1-admin5 y cliente6-cliente{usuarios}, contraseña '{PASSWORD}'")
+
+@click.command('reconstruir-resumenes')
+@with_appcontext
+def reconstruir_resumenes_command():
+    """Recalcula los resúmenes de ventas desde cero: flask --app app reconstruir-resumenes"""
+    reconstruir_resumenes(db_session)
+
+@click.command('reconstruir-etapas')
+@with_appcontext
+def reconstruir_etapas_command():
+    """Recalcula duraciones y tiempos por etapa repitiendo la bitácora: flask --app app reconstruir-etapas"""
+    reconstruir_etapas(db_session)
+
+@click.command('exportar-pedidos')
+@click.option('--formato', type=click.Choice(list(FORMATOS)), default='csv')
+@click.option('--salida', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.option('--estado', multiple=True)
+@with_appcontext
+def exportar_pedidos_command(formato, salida, desde, hasta, estado):
+    """Exporta todo el historial: flask --app app exportar-pedidos --salida pedidos.csv"""
+    for trozo in exportar(db_session, formato, desde and desde.date(), hasta and hasta.date(), list(estado)):
+        salida.write(trozo)
+
+@click.command('importar-productos')
+@click.argument('archivo_csv', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--imagenes', type=click.File('rb'), help='Zip con las imágenes referenciadas')
+@click.option('--solo-validar', is_flag=True)
+@with_appcontext
+def importar_productos_command(archivo_csv, imagenes, solo_validar):
+    """Importa productos: flask --app app importar-productos menu.csv --imagenes fotos.zip"""
+    reporte = importar_productos(db_session, archivo_csv, imagenes, aplicar=not solo_validar)
+    for error in reporte['errores']:
+        click.echo(f"Línea {error['linea']} ({error.get('sku') or 'sin sku'}): {'; '.join(error['errores'])}", err=True)
+    click.echo(f"{reporte['filas']} filas, {reporte['creados']} creados, "
+               f"{reporte['actualizados']} actualizados, {len(reporte['errores'])} con errores")
+    if reporte['errores']:
+        raise SystemExit(1)
+
+@click.command('archivar-pedidos')
+@click.option('--dias', type=int, help='Antigüedad mínima de los pedidos (ARCHIVE_ORDERS_AFTER_DAYS)')
+@click.option('--dias-notificaciones', type=int, help='TTL de notificaciones leídas (NOTIFICATION_TTL_DAYS)')
+@click.option('--lote', type=int, help='Filas por transacción (ARCHIVE_BATCH_SIZE)')
+@with_appcontext
+def archivar_pedidos_command(dias, dias_notificaciones, lote):
+    """Archiva pedidos viejos y purga notificaciones: flask --app app archivar-pedidos"""
+    totales = ejecutar_retencion(db_session, dias, dias_notificaciones, lote)
+    click.echo(f"{totales['pedidos']} pedidos archivados, {totales['notificaciones']} notificaciones purgadas")
+
+@click.command('resumir-pedidos')
+@click.option('--lote', type=int, default=1000, help='Pedidos por transacción')
+@click.option('--pausa', type=float, default=0.0, help='Segundos entre lotes')
+@with_appcontext
+def resumir_pedidos_command(lote, pausa):
+    """Rellena el resumen de los pedidos que no lo tienen: flask --app app resumir-pedidos"""
+    totales = rellenar_resumenes(db_session, lote, pausa, avisar=lambda mensaje: None)
+    click.echo(', '.join(f'{cantidad} {nombre} resumidos' for nombre, cantidad in totales.items()))
+
+@click.command('precompilar-plantillas')
+@with_appcontext
+def precompilar_plantillas_command():
+    """Compila las plantillas al caché de bytecode (al desplegar): flask --app app precompilar-plantillas"""
+    entorno = current_app.jinja_env
+    if entorno.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR está vacío; no hay dónde guardar las plantillas compiladas')
+    nombres = entorno.list_templates(extensions=['html'])
+    for nombre in nombres:
+        entorno.get_template(nombre)
+    click.echo(f"{len(nombres)} plantillas compiladas en {current_app.config['TEMPLATE_CACHE_DIR']}")
+
+@click.command('comprimir-estaticos')
+@with_appcontext
+def comprimir_estaticos_command():
+    """Genera las variantes .br/.gz de css/js (al desplegar): flask --app app comprimir-estaticos"""
+    totales = comprimir_estaticos(current_app.static_folder, avisar=click.echo)
+    click.echo(f"{totales['archivos']} archivos, {totales['original']} bytes -> "
+               f"gzip {totales['gzip']} bytes, brotli {totales['br']} bytes")
+
+@click.command('trabajador')
+@click.option('--concurrencia', type=int, help='Tareas simultáneas (JOBS_CONCURRENCY)')
+@click.option('--una-vez', is_flag=True, help='Ejecuta lo pendiente y sale (para cron)')
+@with_appcontext
+def trabajador_command(concurrencia, una_vez):
+    """Ejecuta tareas en segundo plano, aparte de los procesos web: flask --app app trabajador"""
+    import maintenance  # registra las tareas periódicas
+    from jobs import Trabajador
+    trabajador = Trabajador(current_app._get_current_object(), concurrencia, avisar=click.echo)
+    # SIGTERM: deja de tomar tareas y termina las que están en curso
+    signal.signal(signal.SIGTERM, lambda *_: trabajador.detener())
+    try:
+        trabajador.correr(una_vez=una_vez)
+    except KeyboardInterrupt:
+        trabajador.detener()
+
+@click.command('encolar-tarea')
+@click.argument('nombre')
+@click.option('--args', 'argumentos', default='{}', help='Argumentos en JSON')
+@click.option('--en', 'retraso', type=float, default=0, help='Segundos de espera antes de ejecutarla')
+@with_appcontext
+def encolar_tarea_command(nombre, argumentos, retraso):
+    """Encola una tarea registrada: flask --app app encolar-tarea reconstruir-resumenes"""
+    import maintenance  # registra las tareas periódicas
+    from jobs import encolar
+    try:
+        encolar(db_session, nombre, json.loads(argumentos), retraso)
+    except (KeyError, ValueError) as e:
+        raise click.ClickException(str(e))
+    db_session.commit()
+    click.echo(f"Tarea '{nombre}' encolada")
+
+COMANDOS = (
+    crear_esquema_command,
+    sembrar_command,
+    inicializar_roles_command,
+    reconstruir_resumenes_command,
+    reconstruir_etapas_command,
+    exportar_pedidos_command,
+    importar_productos_command,
+    archivar_pedidos_command,
+    resumir_pedidos_command,
+    precompilar_plantillas_command,
+    comprimir_estaticos_command,
+    trabajador_command,
+    encolar_tarea_command,
+)
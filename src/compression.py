@@ -0,0 +1,57 @@
+# src/compression.py
+# Compresión gzip/brotli de respuestas dinámicas (HTML/JSON) a partir de
+# COMPRESS_MIN_SIZE bytes. Los archivos estáticos no pasan por aquí: ya se
+# sirven precomprimidos (ver assets.py) y send_file usa direct_passthrough.
+
+import gzip
+
+from flask import current_app, request
+
+def _brotli():
+    """Módulo brotli si está instalado (dependencia opcional); si no, solo gzip"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+brotli = _brotli()
+
+def _codificacion():
+    """Mejor codificación que acepta el cliente y sabemos producir"""
+    aceptadas = request.accept_encodings
+    if brotli and aceptadas['br']:
+        return 'br'
+    if aceptadas['gzip']:
+        return 'gzip'
+    return None
+
+def comprimir_respuesta(response):
+    """after_request: comprime el cuerpo si es texto, completo y lo bastante grande"""
+    config = current_app.config
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']):
+        return response
+    # Aunque esta respuesta no se comprima, depende de Accept-Encoding para las cachés intermedias
+    response.vary.add('Accept-Encoding')
+    datos = response.get_data()
+    codificacion = _codificacion()
+    if codificacion is None or len(datos) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    if codificacion == 'br':
+        comprimido = brotli.compress(datos, quality=config['COMPRESS_BROTLI_QUALITY'])
+    else:
+        comprimido = gzip.compress(datos, compresslevel=config['COMPRESS_LEVEL'])
+    response.set_data(comprimido)
+    response.headers['Content-Encoding'] = codificacion
+    # El ETag del cuerpo sin comprimir ya no describe estos bytes
+    if response.headers.get('ETag') and not response.headers['ETag'].startswith('W/'):
+        response.headers['ETag'] = 'W/' + response.headers['ETag']
+    return response
+
+def iniciar_compresion(app):
+    """Registrar antes que los demás after_request: Flask los corre en orden inverso y este debe ir al final"""
+    app.after_request(comprimir_respuesta)
@@ -1,16 +1,150 @@
 import os
+from decimal import Decimal
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _lista_env(nombre):
+    """Lee una variable de entorno con valores separados por comas"""
+    return [valor.strip() for valor in os.getenv(nombre, '').split(',') if valor.strip()]
+
+def _url_base_datos():
+    """
+    URL de la base principal: DB_URL (o DATABASE_URL) tal cual; si no, DB_ENGINE elige
+    'postgresql' (DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME) o 'sqlite' (SQLITE_PATH:
+    un archivo, o ':memory:' para una base que vive lo que el proceso)
+    """
+    url = os.getenv('DB_URL') or os.getenv('DATABASE_URL')
+    if url:
+        # Heroku y otros siguen dando postgres://, que SQLAlchemy 2 ya no acepta
+        return 'postgresql://' + url[len('postgres://'):] if url.startswith('postgres://') else url
+    if os.getenv('DB_ENGINE', 'postgresql') == 'sqlite':
+        ruta = os.getenv('SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'instance', 'kinoa.db'))
+        return 'sqlite://' if ruta == ':memory:' else f'sqlite:///{ruta}'
+    return (f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
+            f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}")
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-123')
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'mysql://root:@localhost/kinoa_rolls')
+    SQLALCHEMY_DATABASE_URI = _url_base_datos()
+    # SQLite (local, CI, perfilado): WAL deja leer mientras otro escribe; busy_timeout espera
+    # el candado en vez de fallar con "database is locked"
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000'))
+    SQLITE_CACHE_MB = int(os.getenv('SQLITE_CACHE_MB', '64'))
+    SQLITE_FOREIGN_KEYS = os.getenv('SQLITE_FOREIGN_KEYS', '1') == '1'
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max
     
+    # Réplicas de lectura (opcional): DB_REPLICA_URLS="postgresql://...,postgresql://..."
+    SQLALCHEMY_REPLICA_URIS = _lista_env('DB_REPLICA_URLS')
+    REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '5'))  # segundos de retraso tolerados
+    REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '10'))  # segundos entre revisiones
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '15'))  # lee de la primaria tras escribir
+    
+    # Contraseñas: método/costo de werkzeug; los hashes viejos se regeneran al iniciar sesión
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '4'))
+    PASSWORD_CACHE_TTL = float(os.getenv('PASSWORD_CACHE_TTL', '300'))
+    PASSWORD_CACHE_SIZE = int(os.getenv('PASSWORD_CACHE_SIZE', '1024'))
+    LOGIN_MAX_INTENTOS_IP = int(os.getenv('LOGIN_MAX_INTENTOS_IP', '30'))
+    LOGIN_MAX_INTENTOS_USUARIO = int(os.getenv('LOGIN_MAX_INTENTOS_USUARIO', '5'))
+    LOGIN_VENTANA_SEGUNDOS = float(os.getenv('LOGIN_VENTANA_SEGUNDOS', '300'))
+    # Proxies delante de la app (nginx, balanceador) cuyo X-Forwarded-For se cree; con 0
+    # la IP del cliente es la del socket y los límites por IP verían solo al proxy
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', '0'))
+    
+    # Límite de peticiones: nombre -> (capacidad del bucket, tokens por segundo)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL')  # redis://... para compartir entre workers
+    # Sesiones del servidor (ver sessions.py): tabla sesiones por defecto, redis://...
+    # o memory:// (solo con un worker: gunicorn se niega a arrancar más)
+    SESSION_STORAGE_URL = os.getenv('SESSION_STORAGE_URL')
+    SESSION_IDLE_SECONDS = int(os.getenv('SESSION_IDLE_SECONDS', str(7 * 24 * 3600)))
+    # LRU del proceso delante de la tabla o Redis: lo que tarda una revocación en llegar a los otros workers
+    SESSION_CACHE_SECONDS = float(os.getenv('SESSION_CACHE_SECONDS', '5'))
+    RATE_LIMITS = {
+        'login': (10, 10 / 60),
+        'generar_pedido': (5, 1 / 30),
+        'api_admin': (60, 5),
+        'api_cliente': (30, 2),
+    }
+    
+    # Control de admisión: peticiones en vuelo y segundos de espera en cola por clase de ruta
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', '1') == '1'
+    ADMISSION_LIMITS = {'critica': 64, 'normal': 32, 'baja': 16}
+    ADMISSION_QUEUE_BUDGET = {'critica': 5.0, 'normal': 1.0, 'baja': 0.2}
+    ADMISSION_POOL_WAIT_THRESHOLD = float(os.getenv('ADMISSION_POOL_WAIT_THRESHOLD', '0.05'))
+    
+    # Impuestos sobre el subtotal de cada pedido
+    TAX_RATE = Decimal(os.getenv('TAX_RATE', '0.12'))
+    
+    # Tablero de cocina: al pedirlo por la API se recalcula si la carga tiene más de
+    # estos segundos (los cambios de otros workers llegan además por Socket.IO)
+    KITCHEN_RESYNC_SECONDS = float(os.getenv('KITCHEN_RESYNC_SECONDS', '5'))
+    
+    # Reparto: pedidos listos de la misma colonia salen juntos si estuvieron listos
+    # dentro de la misma ventana, hasta DISPATCH_MAX_ORDERS por viaje
+    DISPATCH_WINDOW_MINUTES = float(os.getenv('DISPATCH_WINDOW_MINUTES', '10'))
+    DISPATCH_MAX_ORDERS = int(os.getenv('DISPATCH_MAX_ORDERS', '4'))
+    DISPATCH_RESYNC_SECONDS = float(os.getenv('DISPATCH_RESYNC_SECONDS', '5'))  # como KITCHEN_RESYNC_SECONDS
+    
+    # Tareas en segundo plano (ver jobs.py): `flask --app app trabajador` o dentro del proceso web
+    JOBS_IN_PROCESS = os.getenv('JOBS_IN_PROCESS', '0') == '1'
+    JOBS_CONCURRENCY = int(os.getenv('JOBS_CONCURRENCY', '4'))
+    JOBS_POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', '2'))
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+    JOBS_RETRY_BASE_SECONDS = float(os.getenv('JOBS_RETRY_BASE_SECONDS', '30'))
+    JOBS_TIMEOUT_SECONDS = float(os.getenv('JOBS_TIMEOUT_SECONDS', '900'))  # 'ejecutando' por más tiempo = worker caído
+    JOBS_KEEP_DAYS = int(os.getenv('JOBS_KEEP_DAYS', '7'))
+    STALE_CONNECTION_MINUTES = int(os.getenv('STALE_CONNECTION_MINUTES', '30'))
+    
+    # Bitácora de pedidos (ver order_events.py): duraciones y resumen_etapas por lotes
+    EVENTS_FLUSH_SECONDS = float(os.getenv('EVENTS_FLUSH_SECONDS', '1'))
+    EVENTS_BATCH_SIZE = int(os.getenv('EVENTS_BATCH_SIZE', '500'))
+    
+    # Apagado ordenado (ver shutdown.py): los sockets reciben una ventana al azar para reconectarse
+    SHUTDOWN_SOCKET_GRACE_SECONDS = float(os.getenv('SHUTDOWN_SOCKET_GRACE_SECONDS', '1'))
+    SOCKET_RECONNECT_MIN_MS = int(os.getenv('SOCKET_RECONNECT_MIN_MS', '1000'))
+    SOCKET_RECONNECT_MAX_MS = int(os.getenv('SOCKET_RECONNECT_MAX_MS', '15000'))
+    # Con más de un worker los emits pasan por esta cola (redis://...) para llegar
+    # también a los clientes conectados a los otros workers
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    # Tableros en vivo (cocina, reparto): los cambios de esta ventana salen en un solo recálculo
+    LIVE_PUSH_DELAY_SECONDS = float(os.getenv('LIVE_PUSH_DELAY_SECONDS', '0.25'))
+    
+    # Retención: pedidos entregados/cancelados pasan al archivo tras N días
+    ARCHIVE_ORDERS_AFTER_DAYS = int(os.getenv('ARCHIVE_ORDERS_AFTER_DAYS', '90'))
+    NOTIFICATION_TTL_DAYS = int(os.getenv('NOTIFICATION_TTL_DAYS', '30'))  # solo notificaciones leídas
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE', '0.2'))
+    
+    # Perfilado por petición (opcional)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0') == '1'
+    PROFILING_SLOW_MS = float(os.getenv('PROFILING_SLOW_MS', '500'))
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))  # fracción con cProfile, p. ej. 0.01
+    PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+    
+    # Métricas (/metrics): directorio compartido entre workers de gunicorn y token opcional
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')
+    METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # Plantillas: caché de bytecode en disco compartido por los workers ('' lo desactiva);
+    # se llena al desplegar con `flask --app app precompilar-plantillas`
+    TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'jinja'))
+    
+    # Compresión de HTML/JSON (brotli si está instalado, si no gzip) y caché de estáticos con huella
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))  # bytes
+    COMPRESS_MIMETYPES = ('text/html', 'application/json', 'text/plain')
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))  # gzip 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))  # 0-11; alto es lento por petición
+    STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', str(365 * 24 * 3600)))
+    
     # Configuración de notificaciones
     NOTIFICATION_SOUNDS = {
         'new_order': 'alert.mp3',
         'order_ready': 'ready.mp3'
-    }
\ No newline at end of file
+    }
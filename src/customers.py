@@ -0,0 +1,106 @@
+# src/customers.py
+# Directorio de usuarios para el admin: por cada cuenta, pedidos, gasto total,
+# último pedido y qué tan completo está su perfil, todo en una sola consulta
+# (usuarios + perfil + pedidos vivos y archivados agrupados por usuario) con
+# búsqueda y paginación en la base.
+
+from sqlalchemy import case, func, or_, select, union_all
+
+from database.models import Usuario, Rol, PerfilUsuario, Pedido, PedidoArchivado
+
+POR_PAGINA = 25
+
+# Campos del perfil que cuentan para la completitud
+CAMPOS_TEXTO = (PerfilUsuario.nombre, PerfilUsuario.apellidoP, PerfilUsuario.apellidoM, PerfilUsuario.email,
+                PerfilUsuario.colonia, PerfilUsuario.calle, PerfilUsuario.no_exterior)
+TOTAL_CAMPOS = len(CAMPOS_TEXTO) + 1  # + foto_perfil
+
+def _ventas_por_usuario():
+    """Pedidos no cancelados de ambas tablas, agrupados por usuario"""
+    pedidos = union_all(*(
+        select(modelo.id_usuario, modelo.total, modelo.fecha_creacion)
+        .where(modelo.estado.is_distinct_from('cancelado'))
+        for modelo in (Pedido, PedidoArchivado)
+    )).subquery()
+    return (
+        select(pedidos.c.id_usuario,
+               func.count().label('pedidos'),
+               func.sum(pedidos.c.total).label('gasto'),
+               func.max(pedidos.c.fecha_creacion).label('ultimo_pedido'))
+        .group_by(pedidos.c.id_usuario)
+        .subquery()
+    )
+
+def _campos_completos():
+    """Cuántos campos del perfil tienen valor (la foto se revisa sin leerla)"""
+    completos = case((PerfilUsuario.foto_perfil.is_not(None), 1), else_=0)
+    for campo in CAMPOS_TEXTO:
+        completos = completos + case((func.trim(func.coalesce(campo, '')) != '', 1), else_=0)
+    return completos
+
+def _consulta():
+    ventas = _ventas_por_usuario()
+    pedidos = func.coalesce(ventas.c.pedidos, 0).label('pedidos')
+    gasto = func.coalesce(ventas.c.gasto, 0).label('gasto')
+    consulta = (
+        select(Usuario.id_usuario, Usuario.nombre_usuario, Usuario.telefono, Usuario.fecha_registro,
+               Usuario.activo, Rol.nombre.label('rol'), pedidos, gasto, ventas.c.ultimo_pedido,
+               _campos_completos().label('campos_perfil'))
+        .join(Rol, Rol.id_rol == Usuario.id_rol)
+        .outerjoin(PerfilUsuario, PerfilUsuario.id_usuario == Usuario.id_usuario)
+        .outerjoin(ventas, ventas.c.id_usuario == Usuario.id_usuario)
+    )
+    return consulta, pedidos, gasto, ventas.c.ultimo_pedido
+
+def _fila(fila):
+    datos = fila._asdict()
+    datos.pop('total_filas', None)
+    datos['perfil_completo'] = round(100 * datos['campos_perfil'] / TOTAL_CAMPOS)
+    return datos
+
+def directorio(db, busqueda='', orden='registro', pagina=1, por_pagina=POR_PAGINA):
+    """
+    Una página del directorio. busqueda filtra por nombre_usuario o teléfono;
+    orden: registro, pedidos, gasto o ultimo (descendentes).
+    """
+    consulta, pedidos, gasto, ultimo_pedido = _consulta()
+    ordenes = {
+        'registro': Usuario.fecha_registro.desc(),
+        'pedidos': pedidos.desc(),
+        'gasto': gasto.desc(),
+        'ultimo': func.coalesce(ultimo_pedido, Usuario.fecha_registro).desc(),
+    }
+    busqueda = (busqueda or '').strip()
+    if busqueda:
+        patron = '%' + busqueda.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        consulta = consulta.where(or_(Usuario.nombre_usuario.ilike(patron, escape='\\'),
+                                      Usuario.telefono.like(patron, escape='\\')))
+
+    # El total sale en la misma consulta con una función de ventana
+    ordenada = (consulta.add_columns(func.count().over().label('total_filas'))
+                .order_by(ordenes.get(orden, ordenes['registro']), Usuario.id_usuario.desc()))
+    pagina = max(1, pagina)
+    filas = db.execute(ordenada.limit(por_pagina).offset((pagina - 1) * por_pagina)).all()
+    if filas:
+        total = filas[0].total_filas
+    elif pagina > 1:
+        # Página más allá del final: no hay filas que lleven el total; se cuenta
+        # aparte y se devuelve la última página
+        total = db.execute(select(func.count()).select_from(consulta.subquery())).scalar()
+        pagina = max(1, -(-total // por_pagina))
+        if total:
+            filas = db.execute(ordenada.limit(por_pagina).offset((pagina - 1) * por_pagina)).all()
+    else:
+        total = 0
+    return {
+        'usuarios': [_fila(fila) for fila in filas],
+        'total': total,
+        'pagina': pagina,
+        'paginas': max(1, -(-total // por_pagina)),
+    }
+
+def estadisticas_usuario(db, id_usuario):
+    """La fila del directorio de un solo usuario (para su perfil) o None"""
+    consulta, *_ = _consulta()
+    fila = db.execute(consulta.where(Usuario.id_usuario == id_usuario)).first()
+    return _fila(fila) if fila else None
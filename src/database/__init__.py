@@ -1,21 +1,204 @@
-# Base de datos Supabase
+# Base de datos: Postgres (Supabase) o SQLite
 
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import scoped_session, sessionmaker
+import logging
+import random
+import time
+
+from greenlet import getcurrent
+from sqlalchemy import create_engine, event, MetaData, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import Delete, Insert, Update
 
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+from config import Config
+from database.pool import QueuePoolMedido
+
+logger = logging.getLogger('kinoa.db')
+
+# Postgres en producción; SQLite para local, CI y perfilado (ver Config._url_base_datos)
+DB_URL = Config.SQLALCHEMY_DATABASE_URI
+
+# Los engines se crean en el primer uso: importar este módulo no abre nada
+# (arranque rápido de workers y `gunicorn --preload` sin sockets heredados)
+_engine = None
+_replicas = None
+
+def en_memoria(url):
+    """True para sqlite:// y sqlite:///:memory:"""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def crear_engine(url, **opciones):
+    """create_engine con los ajustes del motor; en SQLite se ignoran las opciones de pool"""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(url, **opciones)
+    if en_memoria(url):
+        # Cada conexión nueva a :memory: sería otra base vacía: todos comparten una
+        engine = create_engine(url, poolclass=StaticPool, connect_args={'check_same_thread': False})
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        engine = create_engine(url, connect_args={'timeout': Config.SQLITE_BUSY_TIMEOUT_MS / 1000})
+    event.listen(engine, 'connect', _pragmas_sqlite)
+    return engine
+
+def _pragmas_sqlite(conexion, registro):
+    cursor = conexion.cursor()
+    cursor.execute(f'PRAGMA busy_timeout = {Config.SQLITE_BUSY_TIMEOUT_MS}')
+    # En memoria el modo queda en 'memory' aunque se pida WAL
+    cursor.execute(f'PRAGMA journal_mode = {Config.SQLITE_JOURNAL_MODE}')
+    cursor.execute(f'PRAGMA synchronous = {Config.SQLITE_SYNCHRONOUS}')
+    cursor.execute(f"PRAGMA foreign_keys = {'ON' if Config.SQLITE_FOREIGN_KEYS else 'OFF'}")
+    cursor.execute(f'PRAGMA cache_size = {-Config.SQLITE_CACHE_MB * 1024}')
+    cursor.execute('PRAGMA temp_store = MEMORY')
+    cursor.close()
+
+def get_engine():
+    """Engine de la primaria; fuera de SQLite se mide la espera por conexión"""
+    global _engine
+    if _engine is None:
+        _engine = crear_engine(DB_URL, poolclass=QueuePoolMedido)
+        if en_memoria(DB_URL):
+            # La base en memoria nace vacía con cada proceso
+            from database.create_db import crear_esquema
+            crear_esquema(_engine)
+    return _engine
+
+def get_replicas():
+    """Engines de las réplicas de lectura configuradas"""
+    global _replicas
+    if _replicas is None:
+        _replicas = [crear_engine(url, pool_pre_ping=True) for url in Config.SQLALCHEMY_REPLICA_URIS]
+        for replica in _replicas:
+            event.listen(replica, 'handle_error', _marcar_caida)
+    return _replicas
+
+def __getattr__(nombre):
+    # `from database import engine` sigue funcionando, pero crea el engine al pedirlo
+    if nombre == 'engine':
+        return get_engine()
+    if nombre == 'replicas':
+        return get_replicas()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+def reiniciar_pool():
+    """
+    Olvida las conexiones heredadas del proceso padre sin cerrarlas (post_fork de
+    gunicorn con --preload): el padre sigue siendo su dueño y el hijo abre las suyas.
+    """
+    for eng in ([_engine] if _engine is not None else []) + (_replicas or []):
+        eng.dispose(close=False)
+
+def cerrar_pool():
+    """Cierra las conexiones de este proceso (al apagar un worker) en vez de dejarlas colgadas en el servidor"""
+    for eng in ([_engine] if _engine is not None else []) + (_replicas or []):
+        eng.dispose()
+
+def espera_pool():
+    """Espera promedio (segundos) por una conexión de la primaria"""
+    if _engine is None or not isinstance(_engine.pool, QueuePoolMedido):
+        return 0.0
+    return _engine.pool.espera_actual()
+
+# ----------------------------------------------------------------------
+## Réplicas de lectura
+# ----------------------------------------------------------------------
+
+# engine de réplica -> (sana, momento de la última revisión)
+_estado_replicas = {}
+
+def _medir_replica(replica):
+    """Revisa que la réplica responda y que su retraso esté dentro de REPLICA_MAX_LAG"""
+    try:
+        with replica.connect() as conn:
+            if replica.dialect.name == 'postgresql':
+                # Si ya aplicó todo lo recibido no hay retraso aunque no haya escrituras recientes
+                retraso = conn.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar()
+                return float(retraso or 0) <= Config.REPLICA_MAX_LAG
+            conn.execute(text('SELECT 1'))
+            return True
+    except Exception:
+        return False
+
+def replica_sana(replica):
+    """Estado de la réplica, revisado como máximo cada REPLICA_CHECK_INTERVAL segundos"""
+    ahora = time.monotonic()
+    sana, revisada = _estado_replicas.get(replica, (True, None))
+    if revisada is None or ahora - revisada >= Config.REPLICA_CHECK_INTERVAL:
+        sana = _medir_replica(replica)
+        _estado_replicas[replica] = (sana, ahora)
+    return sana
+
+def elegir_replica():
+    """Devuelve una réplica sana al azar o None si hay que usar la primaria"""
+    sanas = [replica for replica in get_replicas() if replica_sana(replica)]
+    return random.choice(sanas) if sanas else None
+
+def _marcar_caida(contexto):
+    """Si una réplica falla a mitad de petición, deja de usarse hasta la siguiente revisión"""
+    _estado_replicas[contexto.engine] = (False, time.monotonic())
+
+class RoutingSession(Session):
+    """
+    Sesión que manda las lecturas a una réplica cuando la petición se marcó
+    con info['solo_lectura']; cualquier escritura va siempre a la primaria.
+    """
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.info.get('solo_lectura') or self._flushing:
+            return get_engine()
+        if isinstance(clause, (Insert, Update, Delete)):
+            return get_engine()
+        return elegir_replica() or get_engine()
+
+def marcar_solo_lectura(session):
+    """Permite que las consultas de la sesión actual se atiendan desde una réplica"""
+    if get_replicas():
+        session.info['solo_lectura'] = True
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _registrar_escritura(session, flush_context):
+    session.info['escribio'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _registrar_escritura_masiva(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info['escribio'] = True
+
+def despues_de_commit(session, fn, una_vez=False):
+    """
+    Ejecuta fn() solo si la transacción actual de la sesión se confirma.
+    Con una_vez, fn se ejecuta una sola vez por transacción y después de las demás.
+    Un error de fn se registra y no sale del commit: lo confirmado ya no se
+    deshace y quien hizo el commit no debe responder como si hubiera fallado.
+    """
+    pendientes = session.info.setdefault('despues_de_commit', [])
+    if una_vez and fn in pendientes:
+        pendientes.remove(fn)
+    pendientes.append(fn)
 
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT')
-DB_NAME = os.getenv('DB_NAME')
+@event.listens_for(RoutingSession, 'after_commit')
+def _ejecutar_despues_de_commit(session):
+    for fn in session.info.pop('despues_de_commit', []):
+        try:
+            fn()
+        except Exception:
+            logger.exception('Falló %r después del commit', fn)
 
-engine = create_engine(f'postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _descartar_despues_de_commit(session, previous_transaction):
+    session.info.pop('despues_de_commit', None)
 
 
-db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
-metadata = MetaData()
\ No newline at end of file
+# Una sesión por greenlet (cada hilo tiene el suyo). Con gunicorn --preload este
+# módulo se importa en el maestro, antes de que el worker eventlet parche
+# threading: un threading.local sería el real y todas las peticiones del worker
+# compartirían la misma sesión.
+db_session = scoped_session(sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False),
+                            scopefunc=getcurrent)
+metadata = MetaData()
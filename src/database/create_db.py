@@ -1,7 +1,13 @@
-# Archivo para crear la base de datos
+# Archivo para crear la base de datos (Postgres o SQLite, según Config)
 from database.models import Base
-from database import engine
+from database.migrations import aplicar_migraciones
+from database import get_engine
 
-if __name__ == '__main__':
+def crear_esquema(engine):
+    """Crea las tablas que falten y pone al día las existentes; se puede repetir"""
     Base.metadata.create_all(bind=engine)
-    print("Base de datos creada correctamente.")
\ No newline at end of file
+    aplicar_migraciones(engine)
+
+if __name__ == '__main__':
+    crear_esquema(get_engine())
+    print("Base de datos creada correctamente.")
@@ -0,0 +1,91 @@
+# Cambios de esquema para bases creadas con versiones anteriores.
+# create_all() solo crea tablas nuevas; aquí se agregan columnas faltantes.
+
+from sqlalchemy import inspect, text
+
+# (tabla, nombre anterior, nombre nuevo); se renombra si aún tiene el anterior
+RENOMBRADAS = [
+    # Nombre ASCII: algunos clientes, drivers y herramientas de volcado no manejan la ñ
+    ('usuarios', 'contraseña_hash', 'contrasena_hash'),
+]
+
+# (tabla, columna, definición SQL)
+COLUMNAS = [
+    ('pedidos', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('productos', 'sku', 'VARCHAR(50)'),
+    # Resumen desnormalizado; los pedidos existentes se rellenan con `flask resumir-pedidos`
+    ('pedidos', 'num_articulos', 'INTEGER NOT NULL DEFAULT 0'),
+    ('pedidos', 'subtotal', 'NUMERIC(10, 2)'),
+    ('pedidos', 'impuestos', 'NUMERIC(10, 2)'),
+    ('pedidos', 'resumen_articulos', 'VARCHAR(255)'),
+    ('pedidos_archivo', 'num_articulos', 'INTEGER NOT NULL DEFAULT 0'),
+    ('pedidos_archivo', 'subtotal', 'NUMERIC(10, 2)'),
+    ('pedidos_archivo', 'impuestos', 'NUMERIC(10, 2)'),
+    ('pedidos_archivo', 'resumen_articulos', 'VARCHAR(255)'),
+    # Dirección de entrega estructurada; los pedidos anteriores quedan con NULL
+    ('pedidos', 'nombre_entrega', 'VARCHAR(100)'),
+    ('pedidos', 'telefono_entrega', 'VARCHAR(20)'),
+    ('pedidos', 'calle_entrega', 'VARCHAR(150)'),
+    ('pedidos', 'no_exterior_entrega', 'VARCHAR(20)'),
+    ('pedidos', 'colonia_entrega', 'VARCHAR(100)'),
+    ('pedidos_archivo', 'nombre_entrega', 'VARCHAR(100)'),
+    ('pedidos_archivo', 'telefono_entrega', 'VARCHAR(20)'),
+    ('pedidos_archivo', 'calle_entrega', 'VARCHAR(150)'),
+    ('pedidos_archivo', 'no_exterior_entrega', 'VARCHAR(20)'),
+    ('pedidos_archivo', 'colonia_entrega', 'VARCHAR(100)'),
+    # Los eventos escritos antes de la bandeja de salida ya están en resumen_etapas
+    ('eventos_pedido', 'acumulado', 'BOOLEAN NOT NULL DEFAULT TRUE'),
+]
+
+# (nombre, tabla, columnas); se crean si no hay ya un índice único sobre esas columnas
+INDICES_UNICOS = [
+    ('uq_productos_sku', 'productos', 'sku'),
+]
+
+# (nombre, tabla, columnas); se crean si no hay ya un índice con ese nombre
+INDICES = [
+    ('ix_pedidos_colonia_estado', 'pedidos', 'colonia_entrega, estado'),
+    # Reconstrucción de resúmenes por día (reports.reconstruir_resumenes)
+    ('ix_pedidos_fecha_creacion', 'pedidos', 'fecha_creacion'),
+    ('ix_eventos_pedido_acumulado', 'eventos_pedido', 'acumulado, id_evento'),
+]
+
+# Ajustes de datos idempotentes
+DATOS = [
+    # Estados antiguos al catálogo de order_status.TRANSICIONES
+    "UPDATE pedidos SET estado = 'pendiente' WHERE estado = 'recibido'",
+    "UPDATE pedidos SET estado = 'preparando' WHERE estado = 'en_preparacion'",
+]
+
+def aplicar_migraciones(engine):
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for tabla, anterior, nuevo in RENOMBRADAS:
+            existentes = {c['name'] for c in inspector.get_columns(tabla)}
+            if anterior in existentes and nuevo not in existentes:
+                citar = conn.dialect.identifier_preparer.quote
+                conn.execute(text(f'ALTER TABLE {tabla} RENAME COLUMN {citar(anterior)} TO {citar(nuevo)}'))
+                print(f"Columna {tabla}.{anterior} renombrada a {nuevo}")
+        for tabla, columna, definicion in COLUMNAS:
+            existentes = {c['name'] for c in inspector.get_columns(tabla)}
+            if columna not in existentes:
+                conn.execute(text(f'ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}'))
+                print(f"Columna {tabla}.{columna} agregada")
+        for nombre, tabla, columnas in INDICES_UNICOS:
+            if not _columna_unica(inspector, tabla, columnas):
+                conn.execute(text(f'CREATE UNIQUE INDEX {nombre} ON {tabla} ({columnas})'))
+                print(f"Índice {nombre} creado")
+        for nombre, tabla, columnas in INDICES:
+            if nombre not in {i['name'] for i in inspector.get_indexes(tabla)}:
+                conn.execute(text(f'CREATE INDEX {nombre} ON {tabla} ({columnas})'))
+                print(f"Índice {nombre} creado")
+        for sentencia in DATOS:
+            conn.execute(text(sentencia))
+
+def _columna_unica(inspector, tabla, columnas):
+    """True si ya existe una restricción o índice único sobre esas columnas"""
+    buscadas = [c.strip() for c in columnas.split(',')]
+    restricciones = inspector.get_unique_constraints(tabla) + [
+        i for i in inspector.get_indexes(tabla) if i.get('unique')
+    ]
+    return any(r['column_names'] == buscadas for r in restricciones)
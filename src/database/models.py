@@ -1,7 +1,7 @@
 # models.py
 from sqlalchemy import (
     Column, Integer, String, Text, ForeignKey, DateTime, Boolean, 
-    LargeBinary, Numeric
+    LargeBinary, Numeric, Float, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -19,7 +19,7 @@ class Usuario(Base):
     __tablename__ = 'usuarios'
     id_usuario = Column(Integer, primary_key=True)
     nombre_usuario = Column(String(50), nullable=False, unique=True)
-    contraseña_hash = Column(Text, nullable=False)
+    contrasena_hash = Column(Text, nullable=False)
     telefono = Column(String(20), nullable=False)
     fecha_registro = Column(DateTime, default=datetime.utcnow)
     activo = Column(Boolean, default=True)
@@ -29,10 +29,10 @@ class Usuario(Base):
     rol = relationship('Rol', backref='usuarios')
     
     def set_password(self, password):
-        self.contraseña_hash = generate_password_hash(password)
+        self.contrasena_hash = generate_password_hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.contraseña_hash, password)
+        return check_password_hash(self.contrasena_hash, password)
 
 class PerfilUsuario(Base):
     __tablename__ = 'perfiles_usuarios'
@@ -52,6 +52,7 @@ class PerfilUsuario(Base):
 class Producto(Base):
     __tablename__ = 'productos'
     id_producto = Column(Integer, primary_key=True)
+    sku = Column(String(50), unique=True)
     nombre = Column(String(100), nullable=False)
     descripcion = Column(Text)
     precio = Column(Numeric(10, 2), nullable=False)
@@ -66,12 +67,27 @@ class Pedido(Base):
     id_usuario = Column(Integer, ForeignKey('usuarios.id_usuario'), nullable=False)
     total = Column(Numeric(10, 2), nullable=False)
     estado = Column(String(20), default='pendiente')
+    version = Column(Integer, nullable=False, default=1, server_default='1')
     notas = Column(Text)
+    # Resumen desnormalizado (ver order_summary.py); subtotal NULL = pedido aún sin rellenar
+    num_articulos = Column(Integer, nullable=False, default=0, server_default='0')
+    subtotal = Column(Numeric(10, 2))
+    impuestos = Column(Numeric(10, 2))
+    resumen_articulos = Column(String(255))
+    # Dirección de entrega por campos (ver dispatch.py); los pedidos anteriores la tienen solo dentro de notas
+    nombre_entrega = Column(String(100))
+    telefono_entrega = Column(String(20))
+    calle_entrega = Column(String(150))
+    no_exterior_entrega = Column(String(20))
+    colonia_entrega = Column(String(100))
     fecha_creacion = Column(DateTime, default=datetime.utcnow)
     fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     cliente = relationship('Usuario', backref='pedidos')
 
+    __table_args__ = (Index('ix_pedidos_colonia_estado', 'colonia_entrega', 'estado'),
+                      Index('ix_pedidos_fecha_creacion', 'fecha_creacion'))
+
 class DetallePedido(Base):
     __tablename__ = 'detalles_pedido'
     id_detalle_pedido = Column(Integer, primary_key=True)
@@ -106,4 +122,138 @@ class Conexion(Base):
     tipo = Column(String(20), nullable=False)
     ultima_actividad = Column(DateTime, default=datetime.utcnow)
     
-    usuario = relationship('Usuario', backref='conexiones')
\ No newline at end of file
+    usuario = relationship('Usuario', backref='conexiones')
+
+# Resúmenes de ventas (datos derivados, ver reports.py)
+
+class ResumenVentas(Base):
+    """Pedidos e ingresos (total con impuestos) por periodo y estado"""
+    __tablename__ = 'resumen_ventas'
+    id_resumen = Column(Integer, primary_key=True)
+    periodo = Column(String(4), nullable=False)  # 'hora' o 'dia'
+    inicio = Column(DateTime, nullable=False)
+    estado = Column(String(20), nullable=False)
+    pedidos = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(12, 2), nullable=False, default=0)
+    
+    __table_args__ = (UniqueConstraint('periodo', 'inicio', 'estado', name='uq_resumen_ventas'),)
+
+class ResumenVentasProducto(Base):
+    """Pedidos, unidades e ingresos (subtotal) por producto, periodo y estado"""
+    __tablename__ = 'resumen_ventas_producto'
+    id_resumen = Column(Integer, primary_key=True)
+    periodo = Column(String(4), nullable=False)
+    inicio = Column(DateTime, nullable=False)
+    id_producto = Column(Integer, nullable=False)
+    estado = Column(String(20), nullable=False)
+    pedidos = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(12, 2), nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint('periodo', 'inicio', 'id_producto', 'estado', name='uq_resumen_ventas_producto'),
+    )
+
+# Bitácora de pedidos (ver order_events.py). Sin llave foránea: los eventos
+# sobreviven al archivo de sus pedidos.
+
+class EventoPedido(Base):
+    """Un cambio de estado; duracion_segundos es el tiempo que el pedido pasó en estado_anterior"""
+    __tablename__ = 'eventos_pedido'
+    id_evento = Column(Integer, primary_key=True)
+    id_pedido = Column(Integer, nullable=False)
+    estado_anterior = Column(String(20))  # NULL en el evento de creación
+    estado_nuevo = Column(String(20), nullable=False)
+    fecha = Column(DateTime, nullable=False)
+    id_usuario = Column(Integer)  # quién hizo el cambio, si fue desde una petición
+    duracion_segundos = Column(Float)
+    # False mientras la duración no se ha calculado ni sumado a resumen_etapas
+    acumulado = Column(Boolean, nullable=False, default=False)
+    
+    __table_args__ = (Index('ix_eventos_pedido_pedido_fecha', 'id_pedido', 'fecha'),
+                      Index('ix_eventos_pedido_acumulado', 'acumulado', 'id_evento'))
+
+class ResumenEtapas(Base):
+    """Pedidos que salieron de cada estado y segundos acumulados en él, por periodo"""
+    __tablename__ = 'resumen_etapas'
+    id_resumen = Column(Integer, primary_key=True)
+    periodo = Column(String(4), nullable=False)  # 'hora' o 'dia'
+    inicio = Column(DateTime, nullable=False)
+    estado = Column(String(20), nullable=False)
+    pedidos = Column(Integer, nullable=False, default=0)
+    segundos = Column(Float, nullable=False, default=0)
+    
+    __table_args__ = (UniqueConstraint('periodo', 'inicio', 'estado', name='uq_resumen_etapas'),)
+
+# Archivo histórico (ver archive.py): pedidos entregados o cancelados antiguos.
+# Mismas columnas que las tablas vivas, sin restricciones de unicidad.
+
+class PedidoArchivado(Base):
+    __tablename__ = 'pedidos_archivo'
+    id_pedido = Column(Integer, primary_key=True, autoincrement=False)
+    codigo_pedido = Column(String(20), nullable=False)
+    id_usuario = Column(Integer, ForeignKey('usuarios.id_usuario'), nullable=False, index=True)
+    total = Column(Numeric(10, 2), nullable=False)
+    estado = Column(String(20))
+    version = Column(Integer, nullable=False, default=1)
+    notas = Column(Text)
+    num_articulos = Column(Integer, nullable=False, default=0, server_default='0')
+    subtotal = Column(Numeric(10, 2))
+    impuestos = Column(Numeric(10, 2))
+    resumen_articulos = Column(String(255))
+    nombre_entrega = Column(String(100))
+    telefono_entrega = Column(String(20))
+    calle_entrega = Column(String(150))
+    no_exterior_entrega = Column(String(20))
+    colonia_entrega = Column(String(100))
+    fecha_creacion = Column(DateTime, index=True)
+    fecha_actualizacion = Column(DateTime)
+    fecha_archivado = Column(DateTime, default=datetime.utcnow)
+    
+    cliente = relationship('Usuario')
+    detalles = relationship('DetallePedidoArchivado', back_populates='pedido')
+
+class DetallePedidoArchivado(Base):
+    __tablename__ = 'detalles_pedido_archivo'
+    id_detalle_pedido = Column(Integer, primary_key=True, autoincrement=False)
+    id_pedido = Column(Integer, ForeignKey('pedidos_archivo.id_pedido'), nullable=False, index=True)
+    id_producto = Column(Integer, ForeignKey('productos.id_producto'), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+    precio_unitario = Column(Numeric(10, 2), nullable=False)
+    nota = Column(Text)
+    
+    pedido = relationship('PedidoArchivado', back_populates='detalles')
+    producto = relationship('Producto')
+
+# Tareas en segundo plano (ver jobs.py)
+
+class Tarea(Base):
+    """Una ejecución pendiente, en curso o terminada de una tarea registrada"""
+    __tablename__ = 'tareas'
+    id_tarea = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    argumentos = Column(Text, nullable=False, default='{}')  # JSON
+    estado = Column(String(20), nullable=False, default='pendiente')  # pendiente, ejecutando, hecha, fallida
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False, default=1)
+    ejecutar_en = Column(DateTime, nullable=False, default=datetime.utcnow)
+    iniciada_en = Column(DateTime)
+    terminada_en = Column(DateTime)
+    error = Column(Text)
+    # Evita encolar dos veces la misma ejecución periódica ('nombre@ranura')
+    clave_unica = Column(String(150), unique=True)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index('ix_tareas_estado_ejecutar_en', 'estado', 'ejecutar_en'),)
+
+# Sesiones del servidor (ver sessions.py)
+
+class SesionServidor(Base):
+    """Registro de una sesión abierta; la cookie solo lleva el sid"""
+    __tablename__ = 'sesiones'
+    sid = Column(String(64), primary_key=True)
+    id_usuario = Column(Integer, ForeignKey('usuarios.id_usuario'), nullable=False, index=True)
+    nombre_usuario = Column(String(50), nullable=False)
+    rol = Column(String(50), nullable=False)
+    activo = Column(Boolean, nullable=False, default=True)
+    vence = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,32 @@
+# Pool de conexiones que mide cuánto esperan las peticiones por una conexión
+
+import time
+
+from sqlalchemy.pool import QueuePool
+
+class QueuePoolMedido(QueuePool):
+    """
+    QueuePool que guarda un promedio móvil (EWMA) del tiempo de espera al
+    sacar una conexión. El control de admisión lo usa para detectar saturación.
+    Sin conexiones nuevas el promedio no se actualizaría nunca (y lo que se
+    rechaza por él no saca conexiones): decae a la mitad cada VIDA_MEDIA segundos.
+    """
+    espera_promedio = 0.0
+    ultima_muestra = 0.0
+    ALFA = 0.2
+    VIDA_MEDIA = 1.0
+
+    def espera_actual(self):
+        """El promedio decaído por el tiempo desde la última muestra"""
+        transcurrido = time.monotonic() - self.ultima_muestra
+        return self.espera_promedio * 0.5 ** (transcurrido / self.VIDA_MEDIA)
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera = time.perf_counter() - inicio
+            actual = self.espera_actual()
+            self.espera_promedio = actual + self.ALFA * (espera - actual)
+            self.ultima_muestra = time.monotonic()
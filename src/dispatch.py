@@ -0,0 +1,131 @@
+# src/dispatch.py
+# Reparto: agrupa los pedidos listos en viajes por colonia. Dentro de una
+# colonia, un viaje junta los pedidos que estuvieron listos dentro de la misma
+# ventana (DISPATCH_WINDOW_MINUTES) hasta DISPATCH_MAX_ORDERS. Se calcula con
+# una consulta de los pedidos listos. Los commits que entran o salen de listo
+# programan un recálculo desde la base en segundo plano, uno por ventana de
+# LIVE_PUSH_DELAY_SECONDS (como la cocina), y el resultado se emite a la sala 'reparto'.
+
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import Config
+from database import despues_de_commit, get_engine
+from database.models import Pedido
+from order_status import al_cambiar_estado
+
+ESTADO_LISTO = 'listo'
+SALA = 'reparto'
+NAMESPACE = '/notifications'
+SIN_COLONIA = 'Sin colonia'
+
+# fecha_actualizacion de un pedido listo es el momento en que pasó a listo:
+# mientras está en ese estado nada más lo modifica
+PedidoListo = namedtuple('PedidoListo', 'id_pedido codigo nombre telefono calle no_exterior colonia '
+                                        'resumen num_articulos total listo')
+
+COLUMNAS = (Pedido.id_pedido, Pedido.codigo_pedido, Pedido.nombre_entrega, Pedido.telefono_entrega,
+            Pedido.calle_entrega, Pedido.no_exterior_entrega, Pedido.colonia_entrega,
+            Pedido.resumen_articulos, Pedido.num_articulos, Pedido.total, Pedido.fecha_actualizacion)
+
+def normalizar_colonia(texto):
+    """Espacios de más fuera: ' Centro  Histórico ' -> 'Centro Histórico'"""
+    return ' '.join((texto or '').split())
+
+def clave_colonia(colonia):
+    """Colonias que solo difieren en mayúsculas van al mismo viaje; None = no se puede agrupar"""
+    return normalizar_colonia(colonia).casefold() or None
+
+def agrupar(pedidos, ventana, maximo):
+    """Parte los pedidos (de una misma colonia) en viajes por orden de listo"""
+    viajes = []
+    for pedido in sorted(pedidos, key=lambda p: (p.listo or datetime.min, p.id_pedido)):
+        actual = viajes[-1] if viajes else None
+        if (actual is None or len(actual) >= maximo
+                or (pedido.listo and actual[0].listo and pedido.listo - actual[0].listo > ventana)):
+            viajes.append([pedido])
+        else:
+            actual.append(pedido)
+    return viajes
+
+class Despacho:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cargado = None  # monotonic de la última carga completa; None = nunca
+        self._viajes = []
+
+    def cargar(self, db):
+        """Recalcula todos los viajes desde los pedidos listos"""
+        por_colonia = defaultdict(list)
+        for fila in db.execute(select(*COLUMNAS).where(Pedido.estado == ESTADO_LISTO)):
+            pedido = PedidoListo(*fila)
+            por_colonia[clave_colonia(pedido.colonia)].append(pedido)
+        ventana = timedelta(minutes=Config.DISPATCH_WINDOW_MINUTES)
+        viajes = []
+        for clave, pedidos in por_colonia.items():
+            if clave is None:
+                # Sin colonia (pedidos anteriores a la dirección por campos): uno por viaje
+                viajes.extend([pedido] for pedido in pedidos)
+            else:
+                viajes.extend(agrupar(pedidos, ventana, Config.DISPATCH_MAX_ORDERS))
+        with self._lock:
+            self._viajes = viajes
+            self._cargado = time.monotonic()
+
+    def instantanea(self, db):
+        """Viajes actuales; recarga desde la base si pasó DISPATCH_RESYNC_SECONDS"""
+        if self._cargado is None or time.monotonic() - self._cargado >= Config.DISPATCH_RESYNC_SECONDS:
+            self.cargar(db)
+        return self.serializar()
+
+    def serializar(self):
+        with self._lock:
+            viajes = list(self._viajes)
+        # El viaje que lleva más tiempo esperando va primero
+        viajes.sort(key=lambda v: (v[0].listo or datetime.min, v[0].id_pedido))
+        return {
+            'viajes': [{
+                'colonia': normalizar_colonia(viaje[0].colonia) or SIN_COLONIA,
+                'listo_desde': _iso(viaje[0].listo),
+                'articulos': sum(p.num_articulos or 0 for p in viaje),
+                'pedidos': [{
+                    'id_pedido': p.id_pedido,
+                    'codigo': p.codigo,
+                    'nombre': p.nombre,
+                    'telefono': p.telefono,
+                    'calle': p.calle,
+                    'no_exterior': p.no_exterior,
+                    'resumen': p.resumen,
+                    'total': p.total,
+                    'listo': _iso(p.listo),
+                } for p in viaje],
+            } for viaje in viajes],
+            'actualizado': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        }
+
+def _iso(fecha):
+    return fecha.isoformat(timespec='seconds') + 'Z' if fecha else None
+
+despacho = Despacho()
+
+def _emitir_viajes():
+    """Recarga desde la base y emite: lo emitido nunca es la foto vieja de este worker"""
+    from extensions import emitir
+    with Session(get_engine()) as db:
+        despacho.cargar(db)
+    emitir('reparto', despacho.serializar(), namespace=NAMESPACE, to=SALA)
+
+def _programar_emision():
+    # Import diferido: extensions arrastra Flask-SocketIO y aquí solo se necesita al emitir
+    from extensions import emitir_aplazado
+    emitir_aplazado(SALA, _emitir_viajes)
+
+@al_cambiar_estado
+def mover_pedido(db, id_pedido, anterior, nuevo):
+    if ESTADO_LISTO in (anterior, nuevo):
+        despues_de_commit(db, _programar_emision, una_vez=True)
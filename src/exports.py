@@ -0,0 +1,107 @@
+# src/exports.py
+# Exportación de pedidos (vivos y archivados) y sus líneas en CSV o JSONL. Las
+# filas se leen con un cursor del lado del servidor (yield_per) y se emiten una
+# por una, así que la memoria no crece con el tamaño del historial.
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, union_all
+
+from database.models import (
+    Pedido, DetallePedido, PedidoArchivado, DetallePedidoArchivado, Producto, Usuario
+)
+
+COLUMNAS = (
+    'id_pedido', 'codigo_pedido', 'fecha_creacion', 'estado', 'cliente', 'total_pedido',
+    'id_detalle_pedido', 'id_producto', 'producto', 'cantidad', 'precio_unitario', 'nota',
+)
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+def _lineas(modelo_pedido, modelo_detalle, desde, hasta, estados):
+    consulta = (
+        select(
+            modelo_pedido.id_pedido, modelo_pedido.codigo_pedido, modelo_pedido.fecha_creacion,
+            modelo_pedido.estado, Usuario.nombre_usuario.label('cliente'),
+            modelo_pedido.total.label('total_pedido'),
+            modelo_detalle.id_detalle_pedido, modelo_detalle.id_producto,
+            Producto.nombre.label('producto'), modelo_detalle.cantidad,
+            modelo_detalle.precio_unitario, modelo_detalle.nota,
+        )
+        .join(modelo_detalle, modelo_detalle.id_pedido == modelo_pedido.id_pedido)
+        .join(Producto, Producto.id_producto == modelo_detalle.id_producto)
+        .join(Usuario, Usuario.id_usuario == modelo_pedido.id_usuario)
+    )
+    if desde:
+        consulta = consulta.where(modelo_pedido.fecha_creacion >= datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        consulta = consulta.where(
+            modelo_pedido.fecha_creacion < datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+        )
+    if estados:
+        consulta = consulta.where(modelo_pedido.estado.in_(estados))
+    return consulta
+
+def consulta_lineas(desde=None, hasta=None, estados=None):
+    """Una fila por línea de pedido, vivo o archivado, ordenadas por pedido"""
+    lineas = union_all(*(
+        _lineas(modelo_pedido, modelo_detalle, desde, hasta, estados)
+        for modelo_pedido, modelo_detalle in ((Pedido, DetallePedido), (PedidoArchivado, DetallePedidoArchivado))
+    )).subquery()
+    return select(*(lineas.c[columna] for columna in COLUMNAS)).order_by(
+        lineas.c.id_pedido, lineas.c.id_detalle_pedido
+    )
+
+def iterar_lineas(db, desde=None, hasta=None, estados=None, lote=1000):
+    resultado = db.execute(
+        consulta_lineas(desde, hasta, estados).execution_options(yield_per=lote)
+    )
+    for fila in resultado:
+        yield fila
+
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if valor is None or isinstance(valor, (int, str)):
+        return valor
+    return str(valor)  # Decimal: se conserva exacto como texto
+
+def generar_csv(filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS)
+    for fila in filas:
+        escritor.writerow(fila)
+        # Se vacía por cada ~64 KB para no mandar miles de trozos diminutos
+        if buffer.tell() > 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def generar_jsonl(filas):
+    partes = []
+    tamano = 0
+    for fila in filas:
+        linea = json.dumps(
+            {columna: _valor_json(valor) for columna, valor in zip(COLUMNAS, fila)},
+            ensure_ascii=False
+        ) + '\n'
+        partes.append(linea)
+        tamano += len(linea)
+        if tamano > 65536:
+            yield ''.join(partes)
+            partes.clear()
+            tamano = 0
+    yield ''.join(partes)
+
+def exportar(db, formato, desde=None, hasta=None, estados=None):
+    """Generador de texto en el formato pedido"""
+    filas = iterar_lineas(db, desde, hasta, estados)
+    return generar_csv(filas) if formato == 'csv' else generar_jsonl(filas)
@@ -1,5 +1,50 @@
 # src/extensions.py
+import logging
+import threading
+
+from flask import json
 from flask_socketio import SocketIO
 
+from config import Config
+from metrics import observar_emit
+
+logger = logging.getLogger('kinoa.sockets')
+
 # permitir CORS si el frontend está en el mismo dominio no es problema
-socketio = SocketIO(cors_allowed_origins="*", async_mode="eventlet")
+# json=flask.json: los pushes pasan por el proveedor JSON de la app (Decimal exacto, fechas ISO)
+socketio = SocketIO(cors_allowed_origins="*", async_mode="eventlet", json=json)
+
+def emitir(evento, datos, namespace=None, to=None, solo_local=False):
+    """
+    socketio.emit que además registra a cuántos clientes llega. Con solo_local
+    va directo a los clientes de este proceso, sin pasar por la cola
+    (SOCKETIO_MESSAGE_QUEUE) que lo repartiría a los de todos los workers.
+    """
+    observar_emit(evento, namespace, to)
+    socketio.emit(evento, datos, namespace=namespace, to=to, ignore_queue=solo_local)
+
+# Claves con una emisión ya programada
+_aplazadas = set()
+
+def emitir_aplazado(clave, fn):
+    """
+    Ejecuta fn (que recalcula y emite) en segundo plano tras LIVE_PUSH_DELAY_SECONDS.
+    Los cambios que llegan mientras tanto se juntan en esa misma ejecución: con
+    muchos pedidos por segundo se recalcula unas pocas veces por segundo y no
+    una vez por commit, y nada de esto corre dentro de la petición.
+    """
+    if clave in _aplazadas:
+        return
+    _aplazadas.add(clave)
+
+    def correr():
+        # Se libera antes de recalcular: un cambio que llegue durante fn programa otra vuelta
+        _aplazadas.discard(clave)
+        try:
+            fn()
+        except Exception:
+            logger.exception('No se pudo emitir %s', clave)
+
+    temporizador = threading.Timer(Config.LIVE_PUSH_DELAY_SECONDS, correr)
+    temporizador.daemon = True
+    temporizador.start()
@@ -0,0 +1,75 @@
+# src/gunicorn.conf.py
+# gunicorn -c gunicorn.conf.py "app:create_app()"
+# Con preload_app el maestro importa y construye la app una sola vez y los
+# workers la heredan con fork; cada worker abre sus propias conexiones.
+# Con SIGTERM (o `kill -HUP` al maestro para reiniciar los workers) cada worker
+# termina lo que tiene en curso en hasta graceful_timeout segundos (ver shutdown.py).
+import os
+import signal
+from types import SimpleNamespace
+
+import gunicorn
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'eventlet')
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Versión de gunicorn para la que se escribió el parche de worker.handle (ver post_worker_init)
+VERSION_PARCHE_HANDLE = (23, 0, 0)
+
+def on_starting(server):
+    from config import Config
+    from sessions import MemoriaSesiones, almacen
+    if server.cfg.workers > 1 and isinstance(almacen, MemoriaSesiones):
+        # Cada worker tendría sus propias sesiones: logins y revocaciones a medias
+        server.log.error('Las sesiones en memoria no se comparten entre %d workers: usar la tabla '
+                         '(sin SESSION_STORAGE_URL) o redis://', server.cfg.workers)
+        raise SystemExit(1)
+    if server.cfg.workers > 1 and not Config.SOCKETIO_MESSAGE_QUEUE:
+        server.log.warning('%d workers sin SOCKETIO_MESSAGE_QUEUE: los eventos en vivo (cocina, reparto) '
+                           'solo llegan a los clientes del worker que los emite', server.cfg.workers)
+
+def post_fork(server, worker):
+    # Si el maestro llegó a consultar la base (p. ej. al precargar), sus
+    # conexiones no se comparten con el hijo
+    from database import reiniciar_pool
+    reiniciar_pool()
+
+def post_worker_init(worker):
+    # SIGTERM: lo de gunicorn (dejar de aceptar y esperar lo que está en curso) y además
+    # despedir los sockets y detener el trabajo en segundo plano
+    from shutdown import iniciar_drenado
+    salir = worker.handle_exit
+
+    def handle_exit(sig, frame):
+        salir(sig, frame)
+        iniciar_drenado()
+
+    signal.signal(signal.SIGTERM, handle_exit)
+    signal.siginterrupt(signal.SIGTERM, False)
+
+    # Las conexiones aceptadas justo antes del apagado se atienden cuando el
+    # socket de escucha ya se cerró: getsockname() falla (EBADF) y el cliente
+    # recibe un reset. El nombre se guarda mientras el socket sigue abierto.
+    # Depende de AsyncWorker.handle(listener, client, addr), que es interno:
+    # solo se aplica con la versión fijada en requirements.txt
+    if gunicorn.version_info != VERSION_PARCHE_HANDLE:
+        worker.log.warning('gunicorn %s: sin el parche de handle (escrito para %s); las conexiones '
+                           'aceptadas al apagar pueden recibir un reset', gunicorn.__version__,
+                           '.'.join(map(str, VERSION_PARCHE_HANDLE)))
+        return
+    atender = worker.handle
+    nombres = {}
+
+    def handle(listener, client, addr):
+        if listener not in nombres:
+            nombres[listener] = SimpleNamespace(getsockname=lambda nombre=listener.getsockname(): nombre)
+        atender(nombres[listener], client, addr)
+
+    worker.handle = handle
+
+def worker_exit(server, worker):
+    from shutdown import finalizar
+    finalizar()
@@ -0,0 +1,107 @@
+# src/helpers.py
+# Decoradores y funciones auxiliares compartidos por los blueprints de routes/
+from flask import redirect, url_for, flash, current_app, jsonify
+from functools import wraps
+from database import db_session
+from database.models import Usuario, PerfilUsuario
+from sessions import sesion_actual
+import os
+import random
+import string
+from itsdangerous import URLSafeTimedSerializer as Serializer
+
+# Directorio de imágenes por defecto
+DEFAULT_IMAGE_PATH = os.path.join('static', 'images', 'default_profile.png')
+
+# Configuración para imágenes
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+MAX_FILE_SIZE = 5 * 1024 * 1024
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def validate_image(file):
+    """Valida solo la extensión, la validación de tamaño se realiza en profile_edit."""
+    if file and file.filename:
+        if not allowed_file(file.filename):
+            return False
+        return True
+    return False
+
+def get_usuario_actual():
+    """Obtiene el usuario actual de la sesión; solo consulta la base si la sesión sigue vigente"""
+    sesion = sesion_actual()
+    if sesion:
+        # Usar Session.get() en lugar de Query.get()
+        return db_session.get(Usuario, sesion.id_usuario)
+    return None
+
+def get_perfil_usuario_actual():
+    """Obtiene el perfil del usuario actual"""
+    usuario = get_usuario_actual()
+    if usuario:
+        return db_session.query(PerfilUsuario).filter_by(id_usuario=usuario.id_usuario).first()
+    return None
+
+def get_rol_usuario():
+    """Obtiene el rol del usuario actual (del almacén de sesiones, sin consultar la base)"""
+    sesion = sesion_actual()
+    return sesion.rol if sesion else None
+
+def es_admin():
+    """Verifica si el usuario es administrador"""
+    return get_rol_usuario() == 'admin'
+
+def requiere_login(f):
+    """Decorador para requerir inicio de sesión"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not sesion_actual():
+            flash('Por favor inicia sesión', 'warning')
+            return redirect(url_for('auth.login'))
+        return f(*args, **kwargs)
+    return decorated
+
+def requiere_admin(f):
+    """Decorador para requerir rol de administrador"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not es_admin():
+            flash('Acceso restringido a administradores', 'danger')
+            return redirect(url_for('products.menu'))
+        return f(*args, **kwargs)
+    return decorated
+
+def es_repartidor():
+    """Repartidores y administradores pueden usar la API de reparto"""
+    return get_rol_usuario() in ('repartidor', 'admin')
+
+def requiere_repartidor(f):
+    """Decorador para la API de reparto (responde JSON: la usan las apps de los repartidores)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not es_repartidor():
+            return jsonify({'success': False, 'error': 'Acceso restringido a repartidores'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+# Funciones de TOKEN para Restablecimiento de Contraseña
+def generate_reset_token(usuario):
+    """Genera un token seguro para restablecer la contraseña."""
+    s = Serializer(current_app.config['SECRET_KEY'], salt='password-reset-salt') 
+    return s.dumps({'user_id': usuario.id_usuario})
+
+def verify_reset_token(token, expires_sec=1800):
+    """Verifica el token y retorna el objeto Usuario si es válido."""
+    s = Serializer(current_app.config['SECRET_KEY'], salt='password-reset-salt')
+    try:
+        data = s.loads(token, max_age=expires_sec)
+        user_id = data['user_id']
+    except:
+        return None
+    # Usar Session.get() en lugar de Query.get()
+    return db_session.get(Usuario, user_id)
+
+def generar_codigo_pedido():
+    """Genera un código único para el pedido (Ej: A7492)"""
+    return f"{random.choice(string.ascii_uppercase)}{random.randint(1000, 9999)}"
@@ -0,0 +1,274 @@
+# src/jobs.py
+# Tareas en segundo plano con una tabla 'tareas' como cola persistente. Las
+# funciones se registran con @tarea (opcionalmente periódicas); encolar()
+# agrega la fila dentro de la transacción de quien la pide, así que una tarea
+# solo existe si esa transacción se confirmó. Un Trabajador toma las tareas
+# vencidas con un UPDATE condicionado (dos workers nunca toman la misma), las
+# ejecuta en un pool de greenlets (eventlet) o de hilos y reintenta con espera
+# exponencial. Se corre aparte con `flask --app app trabajador` o dentro del
+# proceso web con JOBS_IN_PROCESS=1.
+
+import json
+import os
+import threading
+import time
+import traceback
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+import metrics
+from config import Config
+from database import db_session
+from database.models import Tarea
+from shutdown import al_drenar
+
+Definicion = namedtuple('Definicion', 'fn max_intentos limite')
+
+_registradas = {}  # nombre -> Definicion
+_periodicas = {}   # nombre -> timedelta
+
+ESPERA_MAXIMA = 3600  # tope del reintento exponencial, en segundos
+
+tareas_ejecutadas = metrics.Contador('background_jobs_total', 'Tareas en segundo plano ejecutadas', ('job', 'result'))
+duracion_tareas = metrics.Histograma('background_job_duration_seconds', 'Duración de las tareas en segundo plano', ('job',))
+
+def tarea(nombre, max_intentos=None, limite=None, cada=None):
+    """
+    Registra fn(db, **argumentos). limite: cuántas a la vez por worker;
+    cada (timedelta): se encola sola una vez por periodo.
+    """
+    def registrar(fn):
+        _registradas[nombre] = Definicion(fn, max_intentos or Config.JOBS_MAX_ATTEMPTS, limite)
+        if cada:
+            _periodicas[nombre] = cada
+        return fn
+    return registrar
+
+def encolar(db, nombre, argumentos=None, retraso=0, clave_unica=None):
+    """Agrega la tarea en la transacción actual de db; no hace commit. Con clave_unica no se duplica."""
+    if nombre not in _registradas:
+        raise KeyError(f'Tarea no registrada: {nombre}')
+    valores = {
+        'nombre': nombre,
+        'argumentos': json.dumps(argumentos or {}),
+        'estado': 'pendiente',
+        'intentos': 0,
+        'max_intentos': _registradas[nombre].max_intentos,
+        'ejecutar_en': datetime.utcnow() + timedelta(seconds=retraso),
+        'clave_unica': clave_unica,
+        'fecha_creacion': datetime.utcnow(),
+    }
+    dialecto = db.get_bind().dialect.name
+    if clave_unica and dialecto in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+        db.execute(insert(Tarea).values(**valores).on_conflict_do_nothing(index_elements=['clave_unica']))
+        return
+    if clave_unica and db.execute(select(Tarea.id_tarea).where(Tarea.clave_unica == clave_unica)).first():
+        return
+    db.execute(Tarea.__table__.insert().values(**valores))
+
+def espera_reintento(intentos):
+    """Segundos antes del siguiente intento: base, 2x base, 4x base... hasta una hora"""
+    return min(ESPERA_MAXIMA, Config.JOBS_RETRY_BASE_SECONDS * 2 ** max(0, intentos - 1))
+
+# ----------------------------------------------------------------------
+## Trabajador
+# ----------------------------------------------------------------------
+
+class _Pool:
+    """GreenPool si eventlet parchó los hilos (como en el proceso web); si no, hilos reales"""
+
+    def __init__(self, tamano):
+        try:
+            from eventlet import GreenPool, patcher
+        except ImportError:
+            GreenPool = patcher = None
+        if patcher and patcher.is_monkey_patched('thread'):
+            self._verde, self._hilos = GreenPool(tamano), None
+        else:
+            self._verde, self._hilos = None, ThreadPoolExecutor(tamano, thread_name_prefix='tarea')
+
+    def lanzar(self, fn, *args):
+        if self._verde:
+            self._verde.spawn_n(fn, *args)
+        else:
+            self._hilos.submit(fn, *args)
+
+    def esperar(self):
+        if self._verde:
+            self._verde.waitall()
+        else:
+            self._hilos.shutdown(wait=True)
+
+class Trabajador:
+    def __init__(self, app, concurrencia=None, avisar=print):
+        self.app = app
+        self.concurrencia = concurrencia or Config.JOBS_CONCURRENCY
+        self.avisar = avisar
+        self._pool = _Pool(self.concurrencia)
+        self._lock = threading.Lock()
+        self._en_curso = Counter()
+        self._detener = threading.Event()
+        self._ranuras = {}  # nombre periódico -> última ranura encolada por este worker
+
+    def detener(self):
+        """Deja de tomar tareas; las que están en curso terminan"""
+        self._detener.set()
+
+    def correr(self, una_vez=False):
+        """Ciclo principal. una_vez: toma lo vencido, espera a que termine y sale."""
+        while not self._detener.is_set():
+            try:
+                with self.app.app_context():
+                    self.programar_periodicas(db_session)
+                    self.recuperar_colgadas(db_session)
+                    tomadas = self.tomar(db_session)
+            except Exception:
+                # Un error de la base no mata al ciclo: se descarta la sesión y se reintenta en la siguiente vuelta
+                tomadas = []
+                with self.app.app_context():
+                    db_session.remove()
+                self.avisar(f'Error en el ciclo del trabajador, se reintenta:\n{traceback.format_exc(limit=5)}')
+            for fila in tomadas:
+                self._pool.lanzar(self._ejecutar, fila)
+            if una_vez:
+                break
+            self._detener.wait(Config.JOBS_POLL_SECONDS)
+        self._pool.esperar()
+
+    def programar_periodicas(self, db):
+        """Encola cada tarea periódica una vez por ranura; clave_unica evita duplicados entre workers"""
+        ahora = datetime.utcnow()
+        nuevas = {}
+        for nombre, periodo in _periodicas.items():
+            ranura = int(ahora.timestamp() // periodo.total_seconds())
+            if self._ranuras.get(nombre) == ranura:
+                continue
+            encolar(db, nombre, clave_unica=f'{nombre}@{ranura}')
+            nuevas[nombre] = ranura
+        if nuevas:
+            db.commit()
+            # Solo tras el commit: si falla, la siguiente vuelta las vuelve a encolar
+            self._ranuras.update(nuevas)
+
+    def recuperar_colgadas(self, db):
+        """Tareas 'ejecutando' por más de JOBS_TIMEOUT_SECONDS: su worker murió, vuelven a la cola"""
+        limite = datetime.utcnow() - timedelta(seconds=Config.JOBS_TIMEOUT_SECONDS)
+        recuperadas = db.execute(
+            update(Tarea)
+            .where(Tarea.estado == 'ejecutando', Tarea.iniciada_en < limite)
+            .values(estado='pendiente', error='Tiempo de ejecución agotado')
+        ).rowcount
+        db.commit()
+        if recuperadas:
+            self.avisar(f'{recuperadas} tareas colgadas vuelven a la cola')
+
+    def tomar(self, db):
+        """Reclama tareas vencidas hasta llenar los cupos libres; devuelve las filas tomadas"""
+        with self._lock:
+            libres = self.concurrencia - sum(self._en_curso.values())
+            reservadas = Counter(self._en_curso)
+        if libres <= 0:
+            return []
+
+        ahora = datetime.utcnow()
+        candidatas = db.execute(
+            select(Tarea.id_tarea, Tarea.nombre)
+            .where(Tarea.estado == 'pendiente', Tarea.ejecutar_en <= ahora)
+            .order_by(Tarea.ejecutar_en, Tarea.id_tarea)
+            .limit(libres * 4)
+        ).all()
+        tomadas = []
+        for id_tarea, nombre in candidatas:
+            if len(tomadas) >= libres:
+                break
+            definicion = _registradas.get(nombre)
+            # Una tarea que este worker no conoce (otra versión del código) se deja para otro
+            if definicion is None or (definicion.limite and reservadas[nombre] >= definicion.limite):
+                continue
+            # Como en order_status: el UPDATE condicionado decide quién se la lleva
+            if db.execute(
+                update(Tarea)
+                .where(Tarea.id_tarea == id_tarea, Tarea.estado == 'pendiente')
+                .values(estado='ejecutando', iniciada_en=ahora, intentos=Tarea.intentos + 1)
+            ).rowcount == 1:
+                tomadas.append(id_tarea)
+                reservadas[nombre] += 1
+        db.commit()
+        if not tomadas:
+            return []
+
+        filas = db.execute(
+            select(Tarea.id_tarea, Tarea.nombre, Tarea.argumentos, Tarea.intentos, Tarea.max_intentos)
+            .where(Tarea.id_tarea.in_(tomadas))
+        ).all()
+        with self._lock:
+            for fila in filas:
+                self._en_curso[fila.nombre] += 1
+        return filas
+
+    def _ejecutar(self, fila):
+        inicio = time.perf_counter()
+        error = None
+        try:
+            with self.app.app_context():
+                try:
+                    _registradas[fila.nombre].fn(db_session, **json.loads(fila.argumentos))
+                    db_session.commit()
+                except Exception:
+                    db_session.rollback()
+                    raise
+        except Exception:
+            error = traceback.format_exc(limit=5)
+        finally:
+            with self._lock:
+                self._en_curso[fila.nombre] -= 1
+                if not self._en_curso[fila.nombre]:
+                    del self._en_curso[fila.nombre]
+        duracion_tareas.observe(time.perf_counter() - inicio, job=fila.nombre)
+        self._terminar(fila, error)
+        metrics.volcar()
+
+    def _terminar(self, fila, error):
+        ahora = datetime.utcnow()
+        if error is None:
+            valores, resultado = {'estado': 'hecha', 'terminada_en': ahora, 'error': None}, 'ok'
+        elif fila.intentos < fila.max_intentos:
+            valores = {'estado': 'pendiente', 'error': error,
+                       'ejecutar_en': ahora + timedelta(seconds=espera_reintento(fila.intentos))}
+            resultado = 'reintento'
+        else:
+            valores, resultado = {'estado': 'fallida', 'terminada_en': ahora, 'error': error}, 'fallida'
+            self.avisar(f'Tarea {fila.nombre} #{fila.id_tarea} falló tras {fila.intentos} intentos')
+        tareas_ejecutadas.inc(job=fila.nombre, result=resultado)
+        with self.app.app_context():
+            db_session.execute(update(Tarea).where(Tarea.id_tarea == fila.id_tarea).values(**valores))
+            db_session.commit()
+
+def iniciar_en_proceso(app):
+    """
+    JOBS_IN_PROCESS: un trabajador por proceso web, arrancado con la primera
+    petición (con preload_app, un hilo creado en el maestro no sobrevive al fork)
+    """
+    import maintenance  # registra las tareas periódicas
+    iniciado = {'pid': None}
+    lock = threading.Lock()
+
+    def arrancar():
+        if iniciado['pid'] == os.getpid():
+            return
+        # Sin ceder el control dentro del lock: con --preload es un lock real, no de eventlet
+        with lock:
+            if iniciado['pid'] == os.getpid():
+                return
+            iniciado['pid'] = os.getpid()
+        trabajador = Trabajador(app, avisar=app.logger.info)
+        app.extensions['trabajador'] = trabajador
+        al_drenar(trabajador.detener)
+        threading.Thread(target=trabajador.correr, name='trabajador-tareas', daemon=True).start()
+
+    app.before_request(arrancar)
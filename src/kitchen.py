@@ -0,0 +1,116 @@
+# src/kitchen.py
+# Tablero de cocina: unidades por producto de todos los pedidos pendientes o
+# en preparación, calculadas con una consulta agrupada. Cada worker guarda la
+# última carga. Los commits que tocan la cocina programan un recálculo desde la
+# base (ve también lo que escribieron los otros workers) en segundo plano; los
+# de una misma ventana (LIVE_PUSH_DELAY_SECONDS) comparten uno solo, que se
+# emite completo a la sala 'cocina' de /notifications.
+
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import Config
+from database import despues_de_commit, get_engine
+from database.models import Pedido, DetallePedido, Producto
+from order_status import al_crear_pedido, al_cambiar_estado
+
+ESTADOS_COCINA = ('pendiente', 'preparando')
+SALA = 'cocina'
+NAMESPACE = '/notifications'
+
+class TableroCocina:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cargado = None  # monotonic de la última carga completa; None = nunca
+        self._nombres = {}
+        # id_producto -> estado -> unidades
+        self._unidades = defaultdict(lambda: defaultdict(int))
+        # id_producto -> nota -> unidades
+        self._notas = defaultdict(lambda: defaultdict(int))
+        self._pedidos = defaultdict(int)
+
+    def cargar(self, db):
+        """Recalcula todo con una consulta agrupada (más el conteo de pedidos por estado)"""
+        filas = db.execute(
+            select(DetallePedido.id_producto, Producto.nombre, Pedido.estado, DetallePedido.nota,
+                   func.sum(DetallePedido.cantidad).label('unidades'))
+            .join(Pedido, Pedido.id_pedido == DetallePedido.id_pedido)
+            .join(Producto, Producto.id_producto == DetallePedido.id_producto)
+            .where(Pedido.estado.in_(ESTADOS_COCINA))
+            .group_by(DetallePedido.id_producto, Producto.nombre, Pedido.estado, DetallePedido.nota)
+        ).all()
+        pedidos = db.execute(
+            select(Pedido.estado, func.count()).where(Pedido.estado.in_(ESTADOS_COCINA)).group_by(Pedido.estado)
+        ).all()
+        with self._lock:
+            self._nombres.clear()
+            self._unidades.clear()
+            self._notas.clear()
+            self._pedidos.clear()
+            for fila in filas:
+                self._nombres[fila.id_producto] = fila.nombre
+                self._unidades[fila.id_producto][fila.estado] += int(fila.unidades)
+                if fila.nota:
+                    self._notas[fila.id_producto][fila.nota] += int(fila.unidades)
+            for estado, cantidad in pedidos:
+                self._pedidos[estado] = cantidad
+            self._cargado = time.monotonic()
+
+    def instantanea(self, db):
+        """Estado actual; recarga desde la base si pasó KITCHEN_RESYNC_SECONDS"""
+        if self._cargado is None or time.monotonic() - self._cargado >= Config.KITCHEN_RESYNC_SECONDS:
+            self.cargar(db)
+        return self.serializar()
+
+    def serializar(self):
+        with self._lock:
+            productos = []
+            for id_producto, por_estado in self._unidades.items():
+                total = sum(por_estado.values())
+                if total <= 0:
+                    continue
+                productos.append({
+                    'id_producto': id_producto,
+                    'nombre': self._nombres.get(id_producto),
+                    'pendiente': por_estado.get('pendiente', 0),
+                    'preparando': por_estado.get('preparando', 0),
+                    'total': total,
+                    'notas': [{'nota': nota, 'unidades': unidades}
+                              for nota, unidades in sorted(self._notas[id_producto].items(), key=lambda n: -n[1])
+                              if unidades > 0],
+                })
+            productos.sort(key=lambda p: (-p['total'], p['nombre'] or ''))
+            return {
+                'productos': productos,
+                'pedidos': {estado: self._pedidos.get(estado, 0) for estado in ESTADOS_COCINA},
+                'actualizado': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            }
+
+tablero = TableroCocina()
+
+def _emitir_tablero():
+    """Recarga desde la base y emite: lo emitido nunca es la foto vieja de este worker"""
+    from extensions import emitir
+    with Session(get_engine()) as db:
+        tablero.cargar(db)
+    emitir('cocina', tablero.serializar(), namespace=NAMESPACE, to=SALA)
+
+def _programar_emision():
+    # Import diferido: extensions arrastra Flask-SocketIO y aquí solo se necesita al emitir
+    from extensions import emitir_aplazado
+    emitir_aplazado(SALA, _emitir_tablero)
+
+@al_crear_pedido
+def sumar_pedido_nuevo(db, pedido, detalles):
+    if pedido.estado in ESTADOS_COCINA:
+        despues_de_commit(db, _programar_emision, una_vez=True)
+
+@al_cambiar_estado
+def mover_pedido(db, id_pedido, anterior, nuevo):
+    if anterior in ESTADOS_COCINA or nuevo in ESTADOS_COCINA:
+        despues_de_commit(db, _programar_emision, una_vez=True)
@@ -0,0 +1,58 @@
+# src/maintenance.py
+# Tareas periódicas de mantenimiento para el trabajador de jobs.py. Cada una
+# es lo mismo que su comando de flask, pero programada: el trabajador las
+# encola solas (una vez por periodo entre todos los workers) y las reintenta
+# si fallan.
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from config import Config
+from database.models import Conexion, Tarea
+from jobs import tarea
+
+def _silencio(mensaje):
+    pass
+
+@tarea('inicializar-roles', cada=timedelta(days=1))
+def inicializar_roles_tarea(db):
+    """Al arrancar el primer trabajador (y luego a diario) los roles básicos existen, sin depender de __main__"""
+    from commands import inicializar_roles
+    inicializar_roles()
+
+@tarea('archivar-pedidos', cada=timedelta(days=1), limite=1)
+def archivar_pedidos(db):
+    """Archivo de pedidos viejos y purga de notificaciones leídas (ARCHIVE_*/NOTIFICATION_TTL_DAYS)"""
+    from archive import ejecutar_retencion
+    ejecutar_retencion(db, avisar=_silencio)
+
+@tarea('resumir-pedidos', cada=timedelta(hours=1), limite=1)
+def resumir_pedidos(db):
+    """Pedidos que quedaron sin resumen (p. ej. escritos por una versión anterior)"""
+    from order_summary import rellenar_resumenes
+    rellenar_resumenes(db, avisar=_silencio)
+
+@tarea('reconstruir-resumenes', cada=timedelta(days=1), limite=1)
+def reconstruir_resumenes(db):
+    """Recalcula los resúmenes de ventas para corregir cualquier desvío de los incrementos"""
+    from reports import reconstruir_resumenes
+    reconstruir_resumenes(db, avisar=_silencio)
+
+@tarea('limpiar-conexiones', cada=timedelta(minutes=15))
+def limpiar_conexiones(db):
+    """Conexiones sin actividad en STALE_CONNECTION_MINUTES (sockets que se cerraron sin avisar)"""
+    limite = datetime.utcnow() - timedelta(minutes=Config.STALE_CONNECTION_MINUTES)
+    db.execute(delete(Conexion).where(Conexion.ultima_actividad < limite))
+
+@tarea('purgar-tareas', cada=timedelta(hours=6))
+def purgar_tareas(db):
+    """Tareas hechas hace más de JOBS_KEEP_DAYS (las fallidas se quedan para revisarlas)"""
+    limite = datetime.utcnow() - timedelta(days=Config.JOBS_KEEP_DAYS)
+    db.execute(delete(Tarea).where(Tarea.estado == 'hecha', Tarea.terminada_en < limite))
+
+@tarea('purgar-sesiones', cada=timedelta(hours=1))
+def purgar_sesiones(db):
+    """Sesiones de la tabla vencidas por inactividad (SESSION_IDLE_SECONDS)"""
+    from sessions import purgar_vencidas
+    purgar_vencidas(db)
@@ -0,0 +1,245 @@
+# src/metrics.py
+# Métricas en formato de exposición de Prometheus sin dependencias externas.
+# Cada worker acumula en memoria; con METRICS_MULTIPROC_DIR cada worker vuelca
+# su copia a un archivo y /metrics suma las de todos (gunicorn con varios workers).
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from config import Config
+from database import despues_de_commit, espera_pool
+from order_status import al_crear_pedido, al_cambiar_estado
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_FANOUT = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+REGISTRO = {}
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.valores = {}
+        self._lock = threading.Lock()
+        REGISTRO[nombre] = self
+
+    def _clave(self, etiquetas):
+        return tuple(str(etiquetas.get(nombre, '')) for nombre in self.etiquetas)
+
+    def muestras(self):
+        """Copia de los valores actuales: {tupla de etiquetas: valor}"""
+        with self._lock:
+            return {clave: (list(valor) if isinstance(valor, list) else valor)
+                    for clave, valor in self.valores.items()}
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self.valores[clave] = self.valores.get(clave, 0) + valor
+
+class Medidor(Metrica):
+    """Gauge; con funcion el valor se calcula al momento de exponerlo"""
+    tipo = 'gauge'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None, descartar_ceros=False):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+        self.descartar_ceros = descartar_ceros
+
+    def set(self, valor, **etiquetas):
+        with self._lock:
+            self.valores[self._clave(etiquetas)] = valor
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            nuevo = self.valores.get(clave, 0) + valor
+            if nuevo == 0 and self.descartar_ceros:
+                self.valores.pop(clave, None)
+            else:
+                self.valores[clave] = nuevo
+
+    def dec(self, valor=1, **etiquetas):
+        self.inc(-valor, **etiquetas)
+
+    def valor(self, **etiquetas):
+        return self.valores.get(self._clave(etiquetas), 0)
+
+    def muestras(self):
+        if self.funcion:
+            return {self._clave(etiquetas): valor for etiquetas, valor in self.funcion()}
+        return super().muestras()
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observe(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        # [conteo por bucket..., +Inf, suma]; los buckets no son acumulativos aquí
+        indice = len(self.buckets)
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                indice = i
+                break
+        with self._lock:
+            datos = self.valores.get(clave)
+            if datos is None:
+                datos = self.valores[clave] = [0] * (len(self.buckets) + 2)
+            datos[indice] += 1
+            datos[-1] += valor
+
+# ----------------------------------------------------------------------
+## Métricas de la aplicación
+# ----------------------------------------------------------------------
+
+peticiones = Contador('http_requests_total', 'Peticiones HTTP atendidas', ('endpoint', 'method', 'status'))
+latencia = Histograma('http_request_duration_seconds', 'Latencia de peticiones HTTP', ('endpoint', 'method'))
+pedidos_creados = Contador('orders_created_total', 'Pedidos creados')
+transiciones = Contador('order_status_transitions_total', 'Cambios de estado aplicados', ('from_state', 'to_state'))
+sockets_conectados = Medidor('socketio_connected_clients', 'Clientes Socket.IO conectados', ('namespace',))
+# Las salas vacías se descartan para no acumular una serie por cada usuario que alguna vez se conectó
+sockets_en_sala = Medidor('socketio_room_members', 'Clientes por sala de Socket.IO', ('namespace', 'room'),
+                          descartar_ceros=True)
+fanout = Histograma('socketio_emit_fanout', 'Destinatarios por emit de Socket.IO', ('event', 'namespace'),
+                    buckets=BUCKETS_FANOUT)
+
+@al_crear_pedido
+def _contar_pedido(db, pedido, detalles):
+    despues_de_commit(db, pedidos_creados.inc)
+
+@al_cambiar_estado
+def _contar_transicion(db, id_pedido, anterior, nuevo):
+    despues_de_commit(db, lambda: transiciones.inc(from_state=anterior, to_state=nuevo))
+
+def registrar_pool(get_engine):
+    """Medidores del pool de conexiones calculados al exponer (get_engine evita crearlo antes de tiempo)"""
+    def estado():
+        pool = get_engine().pool
+        for nombre in ('checkedout', 'overflow', 'size'):
+            metodo = getattr(pool, nombre, None)
+            if metodo:
+                # QueuePool reporta overflow negativo mientras el pool no se llena
+                yield {'state': nombre}, max(0, metodo())
+    Medidor('db_pool_connections', 'Estado del pool de conexiones de la primaria', ('state',), funcion=estado)
+    Medidor('db_pool_wait_seconds', 'Espera promedio por una conexión', (),
+            funcion=lambda: [({}, espera_pool())])
+
+def observar_emit(evento, namespace, room=None):
+    """Registra a cuántos clientes llega un emit (sala o namespace completo)"""
+    if room is None:
+        destinatarios = sockets_conectados.valor(namespace=namespace)
+    else:
+        destinatarios = sockets_en_sala.valor(namespace=namespace, room=room)
+    fanout.observe(destinatarios, event=evento, namespace=namespace)
+
+# ----------------------------------------------------------------------
+## Varios procesos
+# ----------------------------------------------------------------------
+
+_ultimo_volcado = 0.0
+
+def volcar(forzar=False):
+    """Escribe la copia de este worker en METRICS_MULTIPROC_DIR (como máximo cada METRICS_FLUSH_SECONDS)"""
+    global _ultimo_volcado
+    directorio = Config.METRICS_MULTIPROC_DIR
+    ahora = time.monotonic()
+    if not directorio or (not forzar and ahora - _ultimo_volcado < Config.METRICS_FLUSH_SECONDS):
+        return
+    _ultimo_volcado = ahora
+    datos = {
+        'pid': os.getpid(),
+        'metricas': {
+            nombre: [[list(clave), valor] for clave, valor in metrica.muestras().items()]
+            for nombre, metrica in REGISTRO.items() if not getattr(metrica, 'funcion', None)
+        },
+    }
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(fd, 'w') as archivo:
+        json.dump(datos, archivo)
+    os.replace(temporal, os.path.join(directorio, f'worker_{os.getpid()}.json'))
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+def _sumar(destino, valor):
+    if isinstance(valor, list):
+        return [a + b for a, b in zip(destino, valor)] if destino is not None else list(valor)
+    return (destino or 0) + valor
+
+def recolectar():
+    """{nombre: {clave: valor}} sumando todos los workers (los gauges solo de workers vivos)"""
+    if not Config.METRICS_MULTIPROC_DIR:
+        return {nombre: metrica.muestras() for nombre, metrica in REGISTRO.items()}
+
+    volcar(forzar=True)
+    total = {nombre: {} for nombre in REGISTRO}
+    for archivo in os.listdir(Config.METRICS_MULTIPROC_DIR):
+        if not archivo.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(Config.METRICS_MULTIPROC_DIR, archivo)) as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            continue
+        vivo = _proceso_vivo(datos['pid'])
+        for nombre, muestras in datos['metricas'].items():
+            metrica = REGISTRO.get(nombre)
+            if metrica is None or (metrica.tipo == 'gauge' and not vivo):
+                continue
+            for clave, valor in muestras:
+                clave = tuple(clave)
+                total[nombre][clave] = _sumar(total[nombre].get(clave), valor)
+    for nombre, metrica in REGISTRO.items():
+        if getattr(metrica, 'funcion', None):
+            total[nombre] = metrica.muestras()
+    return total
+
+# ----------------------------------------------------------------------
+## Formato de exposición
+# ----------------------------------------------------------------------
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def exponer():
+    lineas = []
+    for nombre, muestras in recolectar().items():
+        metrica = REGISTRO[nombre]
+        lineas.append(f'# HELP {nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {nombre} {metrica.tipo}')
+        for clave, valor in sorted(muestras.items()):
+            if metrica.tipo != 'histogram':
+                lineas.append(f'{nombre}{_etiquetas(metrica.etiquetas, clave)} {valor}')
+                continue
+            acumulado = 0
+            for limite, conteo in zip(metrica.buckets + ('+Inf',), valor[:-1]):
+                acumulado += conteo
+                etiquetas = _etiquetas(metrica.etiquetas, clave, 'le="%s"' % limite)
+                lineas.append(f'{nombre}_bucket{etiquetas} {acumulado}')
+            lineas.append(f'{nombre}_sum{_etiquetas(metrica.etiquetas, clave)} {valor[-1]}')
+            lineas.append(f'{nombre}_count{_etiquetas(metrica.etiquetas, clave)} {acumulado}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,326 @@
+# src/order_events.py
+# Bitácora de pedidos: cada creación y cambio de estado se agrega a
+# eventos_pedido en la misma transacción del pedido (bandeja de salida: si el
+# pedido se confirma, su evento también). Un hilo por proceso toma cada
+# EVENTS_FLUSH_SECONDS los eventos aún no acumulados, calcula cuánto tiempo
+# pasó el pedido en el estado que deja y lo suma por lotes a resumen_etapas
+# (por hora y por día), que es lo que lee la API de tiempos de cocina.
+
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from config import Config
+from database import despues_de_commit, get_engine
+from database.models import EventoPedido, ResumenEtapas, Pedido, PedidoArchivado
+from metrics import Histograma
+from order_status import al_crear_pedido, al_cambiar_estado, ESTADOS
+from reports import PERIODOS, acumular, iniciar_reconstruccion, inicio_periodo
+from sessions import sesion_actual
+
+logger = logging.getLogger('kinoa.eventos')
+
+FILAS_POR_INSERT = 500
+
+duracion_etapa = Histograma(
+    'order_stage_seconds', 'Tiempo que un pedido pasó en cada estado', ('estado',),
+    buckets=(60, 120, 300, 600, 900, 1200, 1800, 2700, 3600, 7200),
+)
+
+# ----------------------------------------------------------------------
+## Duraciones
+# ----------------------------------------------------------------------
+
+def calcular_duraciones(eventos, anteriores, creados=None):
+    """
+    Completa duracion_segundos de cada evento (dicts) con el evento previo del
+    mismo pedido, buscado entre eventos y anteriores ((id_pedido, fecha,
+    estado_nuevo) ya escritos). Si el previo no deja al pedido en
+    estado_anterior (eventos de workers distintos escritos en desorden) la
+    duración queda vacía. creados: {id_pedido: fecha_creacion} para los
+    pedidos anteriores a la bitácora.
+    """
+    lineas = defaultdict(list)
+    for id_pedido, fecha, estado in anteriores:
+        lineas[id_pedido].append((fecha, estado))
+    for evento in eventos:
+        lineas[evento['id_pedido']].append((evento['fecha'], evento['estado_nuevo']))
+    for linea in lineas.values():
+        linea.sort()
+
+    for evento in eventos:
+        evento['duracion_segundos'] = None
+        if evento['estado_anterior'] is None:
+            continue
+        previos = [(fecha, estado) for fecha, estado in lineas[evento['id_pedido']] if fecha < evento['fecha']]
+        if previos:
+            fecha, estado = previos[-1]
+            if estado == evento['estado_anterior']:
+                evento['duracion_segundos'] = (evento['fecha'] - fecha).total_seconds()
+        elif evento['estado_anterior'] == 'pendiente' and creados and evento['id_pedido'] in creados:
+            evento['duracion_segundos'] = (evento['fecha'] - creados[evento['id_pedido']]).total_seconds()
+    return eventos
+
+def _acumular_etapas(db, eventos):
+    """Una escritura por (periodo, inicio, estado) del lote, no por evento"""
+    por_etapa = defaultdict(lambda: [0, 0.0])
+    for evento in eventos:
+        if evento['duracion_segundos'] is None:
+            continue
+        for periodo in PERIODOS:
+            fila = por_etapa[(periodo, inicio_periodo(evento['fecha'], periodo), evento['estado_anterior'])]
+            fila[0] += 1
+            fila[1] += evento['duracion_segundos']
+    for (periodo, inicio, estado), (pedidos, segundos) in por_etapa.items():
+        acumular(db, ResumenEtapas,
+                 {'periodo': periodo, 'inicio': inicio, 'estado': estado},
+                 {'pedidos': pedidos, 'segundos': segundos})
+
+def _tomar_lote(db, limite):
+    """
+    Los eventos más antiguos sin acumular, marcados como acumulados en la
+    transacción de db. Como en order_status, el UPDATE condicionado decide:
+    si otro proceso ya tomó alguno se devuelve [] (y db queda sin cambios).
+    """
+    eventos = [fila._asdict() for fila in db.execute(
+        select(EventoPedido.id_evento, EventoPedido.id_pedido, EventoPedido.estado_anterior,
+               EventoPedido.estado_nuevo, EventoPedido.fecha)
+        .where(EventoPedido.acumulado.is_(False))
+        .order_by(EventoPedido.id_evento)
+        .limit(limite)
+    )]
+    if not eventos:
+        return []
+    ids = [evento['id_evento'] for evento in eventos]
+    tomados = db.execute(
+        update(EventoPedido).where(EventoPedido.id_evento.in_(ids), EventoPedido.acumulado.is_(False))
+        .values(acumulado=True)
+    ).rowcount
+    if tomados != len(ids):
+        db.rollback()
+        return []
+    return eventos
+
+def acumular_lote(db, eventos):
+    """Calcula las duraciones de un lote ya escrito y las suma a resumen_etapas; no hace commit"""
+    ids = {evento['id_pedido'] for evento in eventos}
+    en_lote = [evento['id_evento'] for evento in eventos]
+    anteriores = db.execute(
+        select(EventoPedido.id_pedido, EventoPedido.fecha, EventoPedido.estado_nuevo)
+        .where(EventoPedido.id_pedido.in_(ids), EventoPedido.id_evento.not_in(en_lote))
+    ).all()
+    # Pedidos sin ningún evento previo: la fecha de creación marca la entrada a pendiente
+    sin_historia = {evento['id_pedido'] for evento in eventos if evento['estado_anterior'] == 'pendiente'}
+    sin_historia -= {fila.id_pedido for fila in anteriores}
+    sin_historia -= {evento['id_pedido'] for evento in eventos if evento['estado_anterior'] is None}
+    creados = dict(db.execute(
+        select(Pedido.id_pedido, Pedido.fecha_creacion).where(Pedido.id_pedido.in_(sin_historia))
+    ).all()) if sin_historia else {}
+
+    calcular_duraciones(eventos, anteriores, creados)
+    duraciones = [{'b_id': e['id_evento'], 'b_duracion': e['duracion_segundos']}
+                  for e in eventos if e['duracion_segundos'] is not None]
+    if duraciones:
+        db.connection().execute(
+            update(EventoPedido.__table__)
+            .where(EventoPedido.__table__.c.id_evento == bindparam('b_id'))
+            .values(duracion_segundos=bindparam('b_duracion')),
+            duraciones,
+        )
+    _acumular_etapas(db, eventos)
+
+# ----------------------------------------------------------------------
+## Acumulación por lotes
+# ----------------------------------------------------------------------
+
+class Bitacora:
+    """
+    Un hilo (greenlet con eventlet) por proceso acumula los eventos pendientes
+    de la tabla cada EVENTS_FLUSH_SECONDS, o antes si este proceso confirmó
+    EVENTS_BATCH_SIZE. Los eventos ya están escritos: si la acumulación falla
+    o el proceso muere, la retoma cualquier proceso en la siguiente vuelta.
+    """
+
+    def __init__(self):
+        self._nuevos = 0
+        self._pid = None
+        self._arranque = threading.Lock()
+
+    def _arrancar(self):
+        """
+        Primer evento del proceso. Los locks se crean aquí y no al importar: con
+        gunicorn --preload el módulo se importa antes de que eventlet parche
+        threading, y un Event real bloquearía al worker entero al esperar.
+        """
+        pid = os.getpid()
+        with self._arranque:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._nuevos = 0
+            self._escribiendo = threading.Lock()
+            self._despertar = threading.Event()
+        threading.Thread(target=self._ciclo, name='bitacora-pedidos', daemon=True).start()
+
+    def avisar(self, cantidad=1):
+        """Tras el commit de eventos nuevos"""
+        if self._pid != os.getpid():
+            self._arrancar()
+        self._nuevos += cantidad
+        if self._nuevos >= Config.EVENTS_BATCH_SIZE:
+            self._despertar.set()
+
+    def vaciar(self):
+        """Acumula lo pendiente por lotes; devuelve cuántos eventos acumuló este proceso"""
+        if self._pid != os.getpid():
+            return 0
+        total = 0
+        with self._escribiendo:
+            self._nuevos = 0
+            while True:
+                try:
+                    with Session(get_engine()) as db:
+                        eventos = _tomar_lote(db, Config.EVENTS_BATCH_SIZE)
+                        if not eventos:
+                            return total
+                        acumular_lote(db, eventos)
+                        db.commit()
+                except Exception:
+                    logger.exception('No se pudieron acumular los eventos de pedidos; se reintenta')
+                    return total
+                total += len(eventos)
+                for evento in eventos:
+                    if evento['duracion_segundos'] is not None:
+                        duracion_etapa.observe(evento['duracion_segundos'], estado=evento['estado_anterior'])
+                if len(eventos) < Config.EVENTS_BATCH_SIZE:
+                    return total
+
+    def _ciclo(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            self._despertar.wait(Config.EVENTS_FLUSH_SECONDS)
+            self._despertar.clear()
+            self.vaciar()
+
+bitacora = Bitacora()
+# Lo que quede pendiente al salir del proceso se intenta acumular
+atexit.register(bitacora.vaciar)
+
+def _programar(db, id_pedido, anterior, nuevo, fecha):
+    sesion = sesion_actual()
+    db.add(EventoPedido(
+        id_pedido=id_pedido, estado_anterior=anterior, estado_nuevo=nuevo,
+        fecha=fecha, id_usuario=sesion.id_usuario if sesion else None,
+    ))
+    despues_de_commit(db, bitacora.avisar)
+
+@al_crear_pedido
+def anotar_creacion(db, pedido, detalles):
+    _programar(db, pedido.id_pedido, None, pedido.estado, pedido.fecha_creacion or datetime.utcnow())
+
+@al_cambiar_estado
+def anotar_cambio(db, id_pedido, anterior, nuevo):
+    _programar(db, id_pedido, anterior, nuevo, datetime.utcnow())
+
+# ----------------------------------------------------------------------
+## Consultas y reconstrucción
+# ----------------------------------------------------------------------
+
+def historial(db, id_pedido):
+    """Eventos de un pedido en orden"""
+    return [fila._asdict() for fila in db.execute(
+        select(EventoPedido.estado_anterior, EventoPedido.estado_nuevo, EventoPedido.fecha,
+               EventoPedido.id_usuario, EventoPedido.duracion_segundos)
+        .where(EventoPedido.id_pedido == id_pedido)
+        .order_by(EventoPedido.fecha, EventoPedido.id_evento)
+    )]
+
+def tiempos_por_etapa(db, desde, hasta, periodo='dia'):
+    """
+    Tiempo promedio en cada estado entre desde y hasta (fechas, inclusive),
+    total y por periodo ('hora' o 'dia'), leyendo solo resumen_etapas.
+    """
+    filas = db.execute(
+        select(ResumenEtapas.inicio, ResumenEtapas.estado, ResumenEtapas.pedidos, ResumenEtapas.segundos)
+        .where(ResumenEtapas.periodo == periodo,
+               ResumenEtapas.inicio >= datetime.combine(desde, datetime.min.time()),
+               ResumenEtapas.inicio < datetime.combine(hasta + timedelta(days=1), datetime.min.time()))
+        .order_by(ResumenEtapas.inicio)
+    ).all()
+    totales = defaultdict(lambda: [0, 0.0])
+    serie = []
+    for fila in filas:
+        totales[fila.estado][0] += fila.pedidos
+        totales[fila.estado][1] += fila.segundos
+        serie.append({'periodo': fila.inicio.isoformat(), 'estado': fila.estado, 'pedidos': fila.pedidos,
+                      'promedio_segundos': round(fila.segundos / fila.pedidos, 1) if fila.pedidos else None})
+    etapas = {
+        estado: {'pedidos': pedidos, 'promedio_segundos': round(segundos / pedidos, 1) if pedidos else None}
+        for estado, (pedidos, segundos) in sorted(totales.items(), key=lambda par: ESTADOS.index(par[0]))
+    }
+    return {'etapas': etapas, 'serie': serie}
+
+def en_curso(db):
+    """Pedidos que están ahora en cada estado no final y cuánto lleva el más antiguo"""
+    ahora = datetime.utcnow()
+    return {
+        fila.estado: {'pedidos': fila.pedidos,
+                      'mayor_espera_segundos': round((ahora - fila.desde).total_seconds()) if fila.desde else None}
+        for fila in db.execute(
+            select(Pedido.estado, func.count().label('pedidos'), func.min(Pedido.fecha_actualizacion).label('desde'))
+            .where(Pedido.estado.in_(('pendiente', 'preparando', 'listo', 'enviado')))
+            .group_by(Pedido.estado)
+        )
+    }
+
+def reconstruir_etapas(db, tamano_lote=2000, avisar=print):
+    """
+    Repite la bitácora completa: recalcula cada duración en orden y rehace
+    resumen_etapas (corrige los eventos que llegaron en desorden). Una sola
+    transacción; mientras dura, la acumulación de eventos nuevos espera (ver
+    reports.iniciar_reconstruccion). Solo repite los ya acumulados: los que
+    aún no lo están los suma la bitácora después, sobre lo reconstruido.
+    """
+    iniciar_reconstruccion(db, (ResumenEtapas,))
+    ultimo_id = 0
+    procesados = 0
+    while True:
+        ids = db.execute(
+            select(EventoPedido.id_pedido)
+            .where(EventoPedido.id_pedido > ultimo_id, EventoPedido.acumulado.is_(True))
+            .group_by(EventoPedido.id_pedido).order_by(EventoPedido.id_pedido).limit(tamano_lote)
+        ).scalars().all()
+        if not ids:
+            break
+        eventos = [fila._asdict() for fila in db.execute(
+            select(EventoPedido.id_evento, EventoPedido.id_pedido, EventoPedido.estado_anterior,
+                   EventoPedido.estado_nuevo, EventoPedido.fecha, EventoPedido.duracion_segundos.label('guardada'))
+            .where(EventoPedido.id_pedido.in_(ids), EventoPedido.acumulado.is_(True))
+        )]
+        creados = {}
+        for modelo in (Pedido, PedidoArchivado):
+            creados.update(db.execute(
+                select(modelo.id_pedido, modelo.fecha_creacion).where(modelo.id_pedido.in_(ids))
+            ).all())
+        calcular_duraciones(eventos, [], creados)
+        cambios = [{'b_id': e['id_evento'], 'b_duracion': e['duracion_segundos']}
+                   for e in eventos if e['duracion_segundos'] != e['guardada']]
+        if cambios:
+            db.connection().execute(
+                update(EventoPedido.__table__)
+                .where(EventoPedido.__table__.c.id_evento == bindparam('b_id'))
+                .values(duracion_segundos=bindparam('b_duracion')),
+                cambios,
+            )
+        _acumular_etapas(db, eventos)
+        ultimo_id = ids[-1]
+        procesados += len(eventos)
+        avisar(f'Etapas: {procesados} eventos procesados')
+    db.commit()
+    return procesados
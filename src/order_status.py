@@ -0,0 +1,98 @@
+# src/order_status.py
+# Máquina de estados de los pedidos con concurrencia optimista: cada cambio es
+# un UPDATE condicionado al estado de origen y a la versión que vio el cliente.
+
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from database.models import Pedido
+
+# estado actual -> estados a los que puede pasar
+TRANSICIONES = {
+    'pendiente': {'preparando', 'cancelado'},
+    'preparando': {'listo', 'cancelado'},
+    'listo': {'enviado', 'entregado', 'cancelado'},
+    'enviado': {'entregado'},
+    'entregado': set(),
+    'cancelado': set(),
+}
+
+ESTADOS = tuple(TRANSICIONES)
+
+# estado destino -> estados desde los que se puede llegar
+ORIGENES = {
+    destino: tuple(origen for origen, destinos in TRANSICIONES.items() if destino in destinos)
+    for destino in TRANSICIONES
+}
+
+# Funciones que mantienen datos derivados dentro de la misma transacción
+_al_crear = []
+_al_cambiar = []
+
+def al_crear_pedido(fn):
+    """Registra fn(db, pedido, detalles); se llama antes del commit del pedido nuevo"""
+    _al_crear.append(fn)
+    return fn
+
+def al_cambiar_estado(fn):
+    """Registra fn(db, id_pedido, anterior, nuevo); se llama tras cada transición aplicada"""
+    _al_cambiar.append(fn)
+    return fn
+
+def registrar_creacion(db, pedido, detalles):
+    """Avisa a los oyentes de un pedido nuevo (ya con flush); no hace commit"""
+    for oyente in _al_crear:
+        oyente(db, pedido, detalles)
+
+def transicionar(db, id_pedido, nuevo_estado, version=None):
+    """
+    Cambia el estado del pedido sin leerlo antes. Si se pasa version, el cambio
+    solo aplica si nadie más lo modificó. No hace commit.
+    Devuelve un dict con ok, estado y version (o error con el estado actual).
+    """
+    resultado = {'id_pedido': id_pedido, 'ok': False}
+    if nuevo_estado not in TRANSICIONES:
+        resultado['error'] = 'estado_invalido'
+        return resultado
+
+    # Un UPDATE condicionado por cada origen posible (a lo más tres); el primero
+    # que afecta una fila dice de qué estado venía el pedido.
+    anterior = None
+    for origen in ORIGENES[nuevo_estado]:
+        condiciones = [Pedido.id_pedido == id_pedido, Pedido.estado == origen]
+        if version is not None:
+            condiciones.append(Pedido.version == version)
+        filas = db.execute(
+            update(Pedido)
+            .where(*condiciones)
+            .values(estado=nuevo_estado, version=Pedido.version + 1, fecha_actualizacion=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if filas == 1:
+            anterior = origen
+            break
+
+    if anterior is not None:
+        for oyente in _al_cambiar:
+            oyente(db, id_pedido, anterior, nuevo_estado)
+
+    if anterior is not None and version is not None:
+        resultado.update(ok=True, estado=nuevo_estado, anterior=anterior, version=version + 1)
+        return resultado
+
+    # Sin versión del cliente, o en conflicto: se informa el estado actual
+    actual = db.execute(
+        select(Pedido.estado, Pedido.version).where(Pedido.id_pedido == id_pedido)
+    ).first()
+    if anterior is not None:
+        resultado.update(ok=True, estado=actual.estado, anterior=anterior, version=actual.version)
+    elif actual is None:
+        resultado['error'] = 'no_encontrado'
+    else:
+        resultado.update(
+            error='version' if version is not None and actual.version != version else 'transicion_invalida',
+            estado=actual.estado,
+            version=actual.version,
+        )
+    return resultado
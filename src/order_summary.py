@@ -0,0 +1,111 @@
+# src/order_summary.py
+# Resumen desnormalizado de cada pedido (artículos, subtotal, impuestos y una
+# línea de texto) que se escribe junto con el pedido, para que los listados
+# lean solo la tabla pedidos y los detalles se carguen únicamente en la vista
+# de detalle.
+
+import time
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import bindparam, select, update
+
+from config import Config
+from database.models import Pedido, DetallePedido, Producto, PedidoArchivado, DetallePedidoArchivado
+
+CENTAVOS = Decimal('0.01')
+LARGO_RESUMEN = 255
+
+def calcular_impuestos(subtotal):
+    return (subtotal * Config.TAX_RATE).quantize(CENTAVOS, ROUND_HALF_UP)
+
+def texto_resumen(lineas):
+    """'2x California, 1x Philadelphia'; si no cabe en LARGO_RESUMEN termina en 'y N más'"""
+    partes = [f'{cantidad}x {nombre}' for nombre, cantidad in lineas]
+    texto = ', '.join(partes)
+    if len(texto) <= LARGO_RESUMEN:
+        return texto
+    for cuantas in range(len(partes) - 1, 0, -1):
+        texto = f"{', '.join(partes[:cuantas])} y {len(partes) - cuantas} más"
+        if len(texto) <= LARGO_RESUMEN:
+            return texto
+    return partes[0][:LARGO_RESUMEN - 1] + '…'
+
+def resumir(lineas):
+    """lineas: (nombre, cantidad, precio_unitario) -> columnas de resumen de Pedido"""
+    subtotal = sum((Decimal(cantidad) * Decimal(precio) for _, cantidad, precio in lineas),
+                   Decimal('0.00')).quantize(CENTAVOS)
+    return {
+        'num_articulos': sum(cantidad for _, cantidad, _ in lineas),
+        'subtotal': subtotal,
+        'impuestos': calcular_impuestos(subtotal),
+        'resumen_articulos': texto_resumen([(nombre, cantidad) for nombre, cantidad, _ in lineas]),
+    }
+
+def resumir_items(db, items):
+    """items de generar_pedido ({'id', 'cantidad', 'precio_unitario'}); una consulta para los nombres"""
+    nombres = dict(db.execute(
+        select(Producto.id_producto, Producto.nombre)
+        .where(Producto.id_producto.in_([item['id'] for item in items]))
+    ).all())
+    return resumir([(nombres.get(item['id'], f"Producto {item['id']}"), item['cantidad'], item['precio_unitario'])
+                    for item in items])
+
+# ----------------------------------------------------------------------
+## Relleno de pedidos anteriores
+# ----------------------------------------------------------------------
+
+TABLAS = (
+    ('pedidos', Pedido, DetallePedido),
+    ('pedidos archivados', PedidoArchivado, DetallePedidoArchivado),
+)
+
+def rellenar_lote(db, modelo, modelo_detalle, tamano_lote):
+    """Resume hasta tamano_lote pedidos sin resumen (subtotal NULL). Devuelve cuántos."""
+    ids = db.execute(
+        select(modelo.id_pedido).where(modelo.subtotal.is_(None))
+        .order_by(modelo.id_pedido).limit(tamano_lote)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    lineas = defaultdict(list)
+    for fila in db.execute(
+        select(modelo_detalle.id_pedido, Producto.nombre, modelo_detalle.cantidad, modelo_detalle.precio_unitario)
+        .join(Producto, Producto.id_producto == modelo_detalle.id_producto)
+        .where(modelo_detalle.id_pedido.in_(ids))
+        .order_by(modelo_detalle.id_pedido, modelo_detalle.id_detalle_pedido)
+    ):
+        lineas[fila.id_pedido].append((fila.nombre, fila.cantidad, fila.precio_unitario))
+
+    tabla = modelo.__table__
+    valores = {columna: bindparam(f'n_{columna}') for columna in ('num_articulos', 'subtotal', 'impuestos', 'resumen_articulos')}
+    if 'fecha_actualizacion' in tabla.c:
+        # Rellenar no es una modificación del pedido: sin esto correría el onupdate
+        valores['fecha_actualizacion'] = tabla.c.fecha_actualizacion
+    sentencia = update(tabla).where(tabla.c.id_pedido == bindparam('n_id')).values(**valores)
+    try:
+        db.execute(sentencia, [
+            {'n_id': id_pedido, **{f'n_{k}': v for k, v in resumir(lineas[id_pedido]).items()}}
+            for id_pedido in ids
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(ids)
+
+def rellenar_resumenes(db, tamano_lote=1000, pausa=0.0, avisar=print):
+    """Rellena por lotes (una transacción corta cada uno) los pedidos creados antes del resumen"""
+    totales = {}
+    for nombre, modelo, modelo_detalle in TABLAS:
+        totales[nombre] = 0
+        while True:
+            movidos = rellenar_lote(db, modelo, modelo_detalle, tamano_lote)
+            if not movidos:
+                break
+            totales[nombre] += movidos
+            avisar(f'{nombre}: {totales[nombre]} resumidos')
+            if pausa:
+                time.sleep(pausa)
+    return totales
@@ -0,0 +1,161 @@
+# src/passwords.py
+# Verificación de contraseñas fuera del hub de eventlet, rehash transparente
+# y límite de intentos de login por IP y por usuario.
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from config import Config
+
+_pool = ThreadPoolExecutor(max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+
+def _ejecutar(fn, *args):
+    """
+    Ejecuta fn en un hilo real del sistema. Con eventlet parchado los hilos de
+    ThreadPoolExecutor serían greenlets, así que se usa su tpool.
+    """
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return _pool.submit(fn, *args).result()
+    if patcher.is_monkey_patched('thread'):
+        return tpool.execute(fn, *args)
+    return _pool.submit(fn, *args).result()
+
+# ----------------------------------------------------------------------
+## Camino rápido para credenciales verificadas recientemente
+# ----------------------------------------------------------------------
+
+# Llave aleatoria por proceso: el caché nunca guarda contraseñas ni sirve fuera de este worker
+_LLAVE_CACHE = os.urandom(32)
+_verificadas = OrderedDict()  # (id_usuario, hash almacenado) -> (huella, expira)
+_lock_verificadas = threading.Lock()
+
+def _huella(password):
+    return hmac.new(_LLAVE_CACHE, password.encode('utf-8'), hashlib.sha256).digest()
+
+def _en_cache(clave, password):
+    with _lock_verificadas:
+        entrada = _verificadas.get(clave)
+        if not entrada:
+            return False
+        huella, expira = entrada
+        if expira < time.monotonic():
+            del _verificadas[clave]
+            return False
+        _verificadas.move_to_end(clave)
+    return hmac.compare_digest(huella, _huella(password))
+
+def _guardar_en_cache(clave, password):
+    with _lock_verificadas:
+        _verificadas[clave] = (_huella(password), time.monotonic() + Config.PASSWORD_CACHE_TTL)
+        _verificadas.move_to_end(clave)
+        while len(_verificadas) > Config.PASSWORD_CACHE_SIZE:
+            _verificadas.popitem(last=False)
+
+# ----------------------------------------------------------------------
+## Verificación y rehash
+# ----------------------------------------------------------------------
+
+def necesita_rehash(password_hash):
+    """True si el hash se generó con un método/costo distinto al configurado"""
+    metodo = password_hash.split('$', 1)[0]
+    return metodo != Config.PASSWORD_HASH_METHOD
+
+def generar_hash(password):
+    """Genera el hash con el método configurado, fuera del hub"""
+    return _ejecutar(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+
+def verificar_password(usuario, password):
+    """
+    Verifica la contraseña del usuario sin bloquear el worker. Si el hash usa un
+    costo anterior se regenera con el configurado; el llamador debe hacer commit.
+    """
+    if not password:
+        return False
+    clave = (usuario.id_usuario, usuario.contrasena_hash)
+    if _en_cache(clave, password):
+        return True
+    if not _ejecutar(check_password_hash, usuario.contrasena_hash, password):
+        return False
+    if necesita_rehash(usuario.contrasena_hash):
+        usuario.contrasena_hash = generar_hash(password)
+        clave = (usuario.id_usuario, usuario.contrasena_hash)
+    _guardar_en_cache(clave, password)
+    return True
+
+# ----------------------------------------------------------------------
+## Límite de intentos
+# ----------------------------------------------------------------------
+
+class LimiteIntentos:
+    """Ventana deslizante de intentos por llave (IP, o usuario e IP)"""
+
+    def __init__(self, maximo, ventana):
+        self.maximo = maximo
+        self.ventana = ventana
+        self._intentos = {}
+        self._lock = threading.Lock()
+        self._barrido = time.monotonic()
+
+    def _barrer(self, ahora):
+        """Una vez por ventana se quitan las llaves que no volvieron a intentar"""
+        if ahora - self._barrido < self.ventana:
+            return
+        self._barrido = ahora
+        for llave in list(self._intentos):
+            self._vigentes(llave, ahora)
+
+    def _vigentes(self, llave, ahora):
+        intentos = self._intentos.get(llave)
+        if intentos is None:
+            return None
+        while intentos and intentos[0] <= ahora - self.ventana:
+            intentos.popleft()
+        if not intentos:
+            del self._intentos[llave]
+            return None
+        return intentos
+
+    def bloqueado(self, llave):
+        with self._lock:
+            intentos = self._vigentes(llave, time.monotonic())
+            return intentos is not None and len(intentos) >= self.maximo
+
+    def registrar(self, llave):
+        with self._lock:
+            ahora = time.monotonic()
+            self._barrer(ahora)
+            intentos = self._vigentes(llave, ahora)
+            if intentos is None:
+                intentos = self._intentos[llave] = deque()
+            intentos.append(ahora)
+
+    def limpiar(self, llave):
+        with self._lock:
+            self._intentos.pop(llave, None)
+
+intentos_por_ip = LimiteIntentos(Config.LOGIN_MAX_INTENTOS_IP, Config.LOGIN_VENTANA_SEGUNDOS)
+intentos_por_usuario = LimiteIntentos(Config.LOGIN_MAX_INTENTOS_USUARIO, Config.LOGIN_VENTANA_SEGUNDOS)
+
+def login_bloqueado(ip, nombre_usuario):
+    """Se revisa antes de tocar la base o calcular hashes"""
+    return intentos_por_ip.bloqueado(ip) or intentos_por_usuario.bloqueado((nombre_usuario, ip))
+
+def registrar_intento(ip, nombre_usuario, exitoso):
+    """
+    Solo cuentan los fallidos. Por usuario la llave incluye la IP: desde otra
+    dirección no se puede dejar fuera a nadie, y cada IP ya tiene su propio límite.
+    """
+    if exitoso:
+        intentos_por_usuario.limpiar((nombre_usuario, ip))
+        return
+    intentos_por_ip.registrar(ip)
+    intentos_por_usuario.registrar((nombre_usuario, ip))
@@ -0,0 +1,166 @@
+# src/product_import.py
+# Alta y actualización masiva de productos desde CSV, identificados por SKU.
+# El CSV se lee fila por fila; si alguna fila es inválida no se aplica nada.
+#
+# Columnas: sku (obligatoria), nombre, descripcion, precio, tiempo_preparacion,
+# disponible, imagen (nombre del archivo dentro del zip de imágenes).
+# Solo se actualizan las columnas presentes, así que "sku,precio" cambia precios.
+
+import csv
+import io
+import zipfile
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import insert, select, update
+
+from database.models import Producto
+
+COLUMNAS = ('sku', 'nombre', 'descripcion', 'precio', 'tiempo_preparacion', 'disponible', 'imagen')
+EXTENSIONES_IMAGEN = {'png', 'jpg', 'jpeg'}
+MAX_IMAGEN = 5 * 1024 * 1024
+VERDADEROS = {'1', 'si', 'sí', 'true', 'x'}
+FALSOS = {'0', 'no', 'false', ''}
+
+def _validar_fila(fila, zip_imagenes):
+    """Devuelve (valores, errores) de una fila ya como dict"""
+    valores = {}
+    errores = []
+
+    sku = (fila.get('sku') or '').strip()
+    if not sku or len(sku) > 50:
+        errores.append('sku vacío o mayor a 50 caracteres')
+    valores['sku'] = sku
+
+    if 'nombre' in fila:
+        nombre = (fila['nombre'] or '').strip()
+        if not nombre or len(nombre) > 100:
+            errores.append('nombre vacío o mayor a 100 caracteres')
+        valores['nombre'] = nombre
+    if 'descripcion' in fila:
+        valores['descripcion'] = (fila['descripcion'] or '').strip()
+    if 'precio' in fila:
+        try:
+            precio = Decimal((fila['precio'] or '').strip())
+            if precio <= 0:
+                raise InvalidOperation
+            valores['precio'] = precio.quantize(Decimal('0.01'))
+        except InvalidOperation:
+            errores.append(f"precio inválido: {fila['precio']!r}")
+    if 'tiempo_preparacion' in fila:
+        try:
+            tiempo = int(fila['tiempo_preparacion'])
+            if tiempo <= 0:
+                raise ValueError
+            valores['tiempo_preparacion'] = tiempo
+        except (TypeError, ValueError):
+            errores.append(f"tiempo_preparacion inválido: {fila['tiempo_preparacion']!r}")
+    if 'disponible' in fila:
+        texto = (fila['disponible'] or '').strip().lower()
+        if texto in VERDADEROS:
+            valores['disponible'] = True
+        elif texto in FALSOS:
+            valores['disponible'] = False
+        else:
+            errores.append(f"disponible inválido: {fila['disponible']!r}")
+    if fila.get('imagen'):
+        imagen = fila['imagen'].strip()
+        extension = imagen.rsplit('.', 1)[-1].lower() if '.' in imagen else ''
+        if zip_imagenes is None:
+            errores.append('la fila trae imagen pero no se subió el zip de imágenes')
+        elif extension not in EXTENSIONES_IMAGEN:
+            errores.append(f'imagen con extensión no permitida: {imagen}')
+        else:
+            try:
+                info = zip_imagenes.getinfo(imagen)
+                if info.file_size > MAX_IMAGEN:
+                    errores.append(f'imagen mayor a 5MB: {imagen}')
+                valores['imagen'] = imagen  # se lee del zip al aplicar
+            except KeyError:
+                errores.append(f'imagen no encontrada en el zip: {imagen}')
+    return valores, errores
+
+def importar_productos(db, archivo_csv, archivo_zip=None, aplicar=True):
+    """
+    archivo_csv: archivo de texto abierto; archivo_zip: archivo binario o None.
+    Devuelve un reporte con creados, actualizados y errores por fila (línea del CSV).
+    Con errores, o con aplicar=False, no se escribe nada.
+    """
+    reporte = {'creados': 0, 'actualizados': 0, 'filas': 0, 'errores': []}
+    zip_imagenes = zipfile.ZipFile(archivo_zip) if archivo_zip else None
+
+    lector = csv.DictReader(archivo_csv)
+    encabezados = [c.strip().lower() for c in (lector.fieldnames or [])]
+    desconocidas = set(encabezados) - set(COLUMNAS)
+    if 'sku' not in encabezados or desconocidas:
+        reporte['errores'].append({
+            'linea': 1,
+            'errores': [f'encabezados inválidos; se esperan sku y algunas de: {", ".join(COLUMNAS)}']
+        })
+        return reporte
+    lector.fieldnames = encabezados
+
+    filas = {}
+    for fila in lector:
+        reporte['filas'] += 1
+        valores, errores = _validar_fila(fila, zip_imagenes)
+        if valores['sku'] in filas:
+            errores.append(f"sku repetido en el archivo: {valores['sku']}")
+        if errores:
+            reporte['errores'].append({'linea': lector.line_num, 'sku': valores['sku'], 'errores': errores})
+        else:
+            filas[valores['sku']] = (lector.line_num, valores)
+
+    # SKUs ya existentes, consultados en bloques
+    existentes = {}
+    skus = list(filas)
+    for i in range(0, len(skus), 500):
+        existentes.update(db.execute(
+            select(Producto.sku, Producto.id_producto).where(Producto.sku.in_(skus[i:i + 500]))
+        ).all())
+
+    for sku, (linea, valores) in filas.items():
+        if sku not in existentes and not {'nombre', 'precio'} <= valores.keys():
+            reporte['errores'].append({'linea': linea, 'sku': sku,
+                                       'errores': ['producto nuevo sin nombre o precio']})
+
+    if reporte['errores'] or not aplicar:
+        reporte['errores'].sort(key=lambda error: error['linea'])
+        return reporte
+
+    nuevos = []
+    cambios = []
+    for sku, (linea, valores) in filas.items():
+        if 'imagen' in valores:
+            valores['imagen'] = zip_imagenes.read(valores['imagen'])
+        if sku in existentes:
+            cambios.append({'id_producto': existentes[sku], **valores})
+        else:
+            nuevos.append({'descripcion': '', 'disponible': True, **valores})
+
+    # Un solo executemany por tipo y un solo commit
+    try:
+        if cambios:
+            for grupo in _agrupar_por_columnas(cambios):
+                db.execute(update(Producto), grupo)
+        if nuevos:
+            for grupo in _agrupar_por_columnas(nuevos):
+                db.execute(insert(Producto), grupo)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    reporte['creados'] = len(nuevos)
+    reporte['actualizados'] = len(cambios)
+    return reporte
+
+def _agrupar_por_columnas(registros):
+    """executemany requiere que todos los registros tengan las mismas llaves"""
+    grupos = {}
+    for registro in registros:
+        grupos.setdefault(tuple(sorted(registro)), []).append(registro)
+    return grupos.values()
+
+def abrir_texto(archivo_binario):
+    """Envuelve un archivo binario subido para leerlo como texto sin cargarlo completo"""
+    return io.TextIOWrapper(archivo_binario, encoding='utf-8-sig', newline='')
@@ -0,0 +1,123 @@
+# src/profiling.py
+# Perfilado opcional por petición: tiempo total, número de consultas y tiempo
+# en SQL (eventos del engine), tiempo de render de plantillas y tamaño de la
+# respuesta. Las peticiones lentas se registran con sus consultas más caras y
+# una fracción configurable se perfila con cProfile a un directorio; un solo
+# cProfile activo por proceso (el perfilador es global al hilo, y con eventlet
+# todos los greenlets comparten hilo): mientras corre uno no se muestrea.
+
+import cProfile
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+logger = logging.getLogger('kinoa.profiling')
+
+MAX_CONSULTAS_GUARDADAS = 50
+
+# Tomado mientras hay un cProfile activo en el proceso
+_cprofile_activo = threading.Lock()
+
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'perfil' in g:
+        conn.info.setdefault('inicios_perfil', []).append(time.perf_counter())
+
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'perfil' in g):
+        return
+    inicios = conn.info.get('inicios_perfil')
+    if not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    perfil = g.perfil
+    perfil['consultas'] += 1
+    perfil['sql'] += duracion
+    # Min-heap: se conservan las más lentas y la más rápida de ellas queda en [0]
+    consultas = perfil['sentencias']
+    if len(consultas) < MAX_CONSULTAS_GUARDADAS:
+        heapq.heappush(consultas, (duracion, statement))
+    elif duracion > consultas[0][0]:
+        heapq.heapreplace(consultas, (duracion, statement))
+
+def _antes_de_plantilla(sender, template, context, **extra):
+    if 'perfil' in g:
+        g.perfil['inicio_plantilla'] = time.perf_counter()
+
+def _plantilla_lista(sender, template, context, **extra):
+    if 'perfil' in g and g.perfil.get('inicio_plantilla'):
+        g.perfil['plantillas'] += time.perf_counter() - g.perfil.pop('inicio_plantilla')
+
+def iniciar_perfilado(app, umbral_lento_ms=None, muestreo=None, directorio=None):
+    """Registra los hooks en la app; sin llamar a esta función no hay ningún costo"""
+    umbral = (Config.PROFILING_SLOW_MS if umbral_lento_ms is None else umbral_lento_ms) / 1000
+    muestreo = Config.PROFILING_SAMPLE_RATE if muestreo is None else muestreo
+    directorio = directorio or Config.PROFILING_DIR
+    if muestreo:
+        os.makedirs(directorio, exist_ok=True)
+
+    event.listen(Engine, 'before_cursor_execute', _antes_de_consulta)
+    event.listen(Engine, 'after_cursor_execute', _despues_de_consulta)
+    before_render_template.connect(_antes_de_plantilla, app)
+    template_rendered.connect(_plantilla_lista, app)
+
+    @app.before_request
+    def empezar_perfil():
+        g.perfil = {'inicio': time.perf_counter(), 'consultas': 0, 'sql': 0.0,
+                    'plantillas': 0.0, 'sentencias': [], 'cprofile': None}
+        if muestreo and random.random() < muestreo and _cprofile_activo.acquire(blocking=False):
+            g.perfil['cprofile'] = cProfile.Profile()
+            g.perfil['cprofile'].enable()
+
+    @app.after_request
+    def terminar_perfil(response):
+        perfil = g.get('perfil')
+        if perfil is None:
+            return response
+        total = time.perf_counter() - perfil['inicio']
+        tamano = response.calculate_content_length()
+        response.headers['Server-Timing'] = (
+            f"app;dur={total * 1000:.1f}, db;dur={perfil['sql'] * 1000:.1f};desc=\"{perfil['consultas']} consultas\", "
+            f"tpl;dur={perfil['plantillas'] * 1000:.1f}"
+        )
+
+        if perfil['cprofile']:
+            perfil['cprofile'].disable()
+            try:
+                nombre = f"{request.endpoint or 'sin_endpoint'}_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}.prof"
+                perfil['cprofile'].dump_stats(os.path.join(directorio, nombre))
+            finally:
+                perfil['cprofile'] = None
+                _cprofile_activo.release()
+
+        if total >= umbral:
+            lentas = heapq.nlargest(5, perfil['sentencias'])
+            logger.warning(
+                "Petición lenta %s %s (%s): %.0f ms, %d consultas en %.0f ms, plantillas %.0f ms, %s bytes\n%s",
+                request.method, request.path, request.endpoint, total * 1000, perfil['consultas'],
+                perfil['sql'] * 1000, perfil['plantillas'] * 1000, tamano if tamano is not None else 'stream',
+                '\n'.join(f'  {d * 1000:.1f} ms: {s}' for d, s in lentas)
+            )
+        else:
+            logger.debug(
+                "%s %s: %.1f ms, %d consultas (%.1f ms), plantillas %.1f ms, %s bytes",
+                request.method, request.path, total * 1000, perfil['consultas'], perfil['sql'] * 1000,
+                perfil['plantillas'] * 1000, tamano
+            )
+        return response
+
+    @app.teardown_request
+    def soltar_perfil(exc):
+        # Si terminar_perfil no llegó a soltar el cProfile (excepción antes), se suelta aquí
+        perfil = g.pop('perfil', None)
+        if perfil and perfil['cprofile']:
+            perfil['cprofile'].disable()
+            _cprofile_activo.release()
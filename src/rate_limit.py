@@ -0,0 +1,137 @@
+# src/rate_limit.py
+# Límite de peticiones con token buckets por ruta y por usuario/IP.
+# Por defecto los buckets viven en memoria del worker; con RATE_LIMIT_STORAGE_URL
+# (redis://...) se comparten entre workers.
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+from config import Config
+from sessions import sesion_actual
+
+class MemoriaBackend:
+    """
+    Buckets en un OrderedDict llave -> (tokens, último acceso, capacidad, tasa),
+    del usado hace más tiempo al más reciente. Cada bucket guarda su capacidad y
+    tasa: rutas distintas rellenan a ritmos distintos.
+    """
+
+    def __init__(self, max_llaves=100_000):
+        self.max_llaves = max_llaves
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, llave, capacidad, tasa, costo=1):
+        """Devuelve (permitido, segundos a esperar)"""
+        ahora = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(llave)
+            if bucket is None:
+                tokens = capacidad
+            else:
+                tokens = min(capacidad, bucket[0] + (ahora - bucket[1]) * tasa)
+            permitido = tokens >= costo
+            if permitido:
+                tokens -= costo
+            self._buckets[llave] = (tokens, ahora, capacidad, tasa)
+            self._buckets.move_to_end(llave)
+            self._barrer(ahora)
+        if permitido:
+            return True, 0.0
+        return False, (costo - tokens) / tasa
+
+    def _barrer(self, ahora):
+        """
+        Quita del frente los buckets ya llenos (volver a crearlos da lo mismo) y,
+        pasando de max_llaves, los usados hace más tiempo aunque no estén llenos.
+        Se detiene en el primero que se queda: cada llave se revisa una vez.
+        """
+        while self._buckets:
+            llave, (tokens, ultimo, capacidad, tasa) = next(iter(self._buckets.items()))
+            if tokens + (ahora - ultimo) * tasa < capacidad and len(self._buckets) <= self.max_llaves:
+                return
+            del self._buckets[llave]
+
+class RedisBackend:
+    """Buckets compartidos entre workers; requiere el paquete redis"""
+
+    _SCRIPT = """
+local capacidad = tonumber(ARGV[1])
+local tasa = tonumber(ARGV[2])
+local costo = tonumber(ARGV[3])
+local ahora = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(bucket[1]) or capacidad
+local ultimo = tonumber(bucket[2]) or ahora
+tokens = math.min(capacidad, tokens + (ahora - ultimo) * tasa)
+local permitido = 0
+if tokens >= costo then
+    tokens = tokens - costo
+    permitido = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', ahora)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacidad / tasa) + 1)
+return {permitido, tostring(tokens)}
+"""
+
+    def __init__(self, url):
+        import redis
+        self._cliente = redis.Redis.from_url(url)
+        self._consumir = self._cliente.register_script(self._SCRIPT)
+
+    def consumir(self, llave, capacidad, tasa, costo=1):
+        permitido, tokens = self._consumir(
+            keys=[f'rl:{llave}'], args=[capacidad, tasa, costo, time.time()]
+        )
+        if permitido:
+            return True, 0.0
+        return False, (costo - float(tokens)) / tasa
+
+def crear_backend(url=None):
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    return MemoriaBackend()
+
+backend = crear_backend(Config.RATE_LIMIT_STORAGE_URL)
+
+def _identidad():
+    """Usuario de la sesión si existe (sin tocar la base), si no la IP"""
+    sesion = sesion_actual()
+    if sesion:
+        return f'u{sesion.id_usuario}'
+    return f'ip{request.remote_addr}'
+
+def respuesta_limite(espera):
+    """429 con Retry-After; JSON para las APIs y texto para las vistas"""
+    mensaje = 'Demasiadas solicitudes, intenta de nuevo en unos segundos.'
+    if request.path.startswith(('/api/', '/admin/api/')) or request.is_json:
+        respuesta = make_response(jsonify({'success': False, 'error': mensaje}), 429)
+    else:
+        respuesta = make_response(mensaje, 429)
+    respuesta.headers['Retry-After'] = str(max(1, math.ceil(espera)))
+    return respuesta
+
+def limitar(nombre, por='usuario', metodos=None):
+    """
+    Decorador de rutas. Los límites salen de Config.RATE_LIMITS[nombre] como
+    (capacidad, tokens por segundo); por='ip' ignora la sesión y metodos
+    restringe el límite a ciertos verbos (p. ej. solo el POST del login).
+    """
+    capacidad, tasa = Config.RATE_LIMITS[nombre]
+
+    def decorador(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if Config.RATE_LIMIT_ENABLED and (metodos is None or request.method in metodos):
+                quien = f'ip{request.remote_addr}' if por == 'ip' else _identidad()
+                permitido, espera = backend.consumir(f'{nombre}:{quien}', capacidad, tasa)
+                if not permitido:
+                    return respuesta_limite(espera)
+            return f(*args, **kwargs)
+        return decorated
+    return decorador
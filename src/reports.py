@@ -0,0 +1,253 @@
+# src/reports.py
+# Resúmenes de ventas por hora y por día, mantenidos al crear pedidos y al
+# cambiar su estado, y consultas de reporte que solo leen esos resúmenes.
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.models import (
+    Pedido, DetallePedido, PedidoArchivado, DetallePedidoArchivado, ResumenVentas, ResumenVentasProducto
+)
+from order_status import al_crear_pedido, al_cambiar_estado
+
+PERIODOS = ('hora', 'dia')
+
+def inicio_periodo(fecha, periodo):
+    if periodo == 'hora':
+        return fecha.replace(minute=0, second=0, microsecond=0)
+    return fecha.replace(hour=0, minute=0, second=0, microsecond=0)
+
+# ----------------------------------------------------------------------
+## Escritura incremental
+# ----------------------------------------------------------------------
+
+def acumular(db, modelo, claves, incrementos):
+    """Suma incrementos a la fila con esas claves, creándola si no existe (upsert)"""
+    tabla = modelo.__table__
+    dialecto = db.get_bind().dialect.name
+    if dialecto in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+        sentencia = insert(tabla).values(**claves, **incrementos)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=list(claves),
+            set_={columna: tabla.c[columna] + sentencia.excluded[columna] for columna in incrementos},
+        )
+        db.execute(sentencia)
+        return
+    filas = db.execute(
+        update(tabla)
+        .where(*(tabla.c[columna] == valor for columna, valor in claves.items()))
+        .values({columna: tabla.c[columna] + valor for columna, valor in incrementos.items()})
+    ).rowcount
+    if not filas:
+        db.execute(tabla.insert().values(**claves, **incrementos))
+
+def _aplicar(db, fecha, estado, total, lineas, signo):
+    """
+    Suma (signo=1) o resta (signo=-1) un pedido en los resúmenes.
+    lineas: {id_producto: (unidades, ingresos)}
+    """
+    for periodo in PERIODOS:
+        inicio = inicio_periodo(fecha, periodo)
+        acumular(db, ResumenVentas,
+                 {'periodo': periodo, 'inicio': inicio, 'estado': estado},
+                 {'pedidos': signo, 'ingresos': signo * total})
+        for id_producto, (unidades, ingresos) in lineas.items():
+            acumular(db, ResumenVentasProducto,
+                     {'periodo': periodo, 'inicio': inicio, 'id_producto': id_producto, 'estado': estado},
+                     {'pedidos': signo, 'unidades': signo * unidades, 'ingresos': signo * ingresos})
+
+def _agrupar_lineas(detalles):
+    lineas = defaultdict(lambda: [0, Decimal('0.00')])
+    for id_producto, cantidad, precio_unitario in detalles:
+        linea = lineas[id_producto]
+        linea[0] += cantidad
+        linea[1] += cantidad * Decimal(precio_unitario)
+    return {id_producto: tuple(linea) for id_producto, linea in lineas.items()}
+
+@al_crear_pedido
+def sumar_pedido_nuevo(db, pedido, detalles):
+    lineas = _agrupar_lineas((d.id_producto, d.cantidad, d.precio_unitario) for d in detalles)
+    _aplicar(db, pedido.fecha_creacion or datetime.utcnow(), pedido.estado, Decimal(pedido.total), lineas, 1)
+
+@al_cambiar_estado
+def mover_pedido(db, id_pedido, anterior, nuevo):
+    """Pasa el pedido de la fila de su estado anterior a la del nuevo"""
+    pedido = db.execute(
+        select(Pedido.fecha_creacion, Pedido.total).where(Pedido.id_pedido == id_pedido)
+    ).first()
+    detalles = db.execute(
+        select(DetallePedido.id_producto, DetallePedido.cantidad, DetallePedido.precio_unitario)
+        .where(DetallePedido.id_pedido == id_pedido)
+    ).all()
+    lineas = _agrupar_lineas(detalles)
+    _aplicar(db, pedido.fecha_creacion, anterior, pedido.total, lineas, -1)
+    _aplicar(db, pedido.fecha_creacion, nuevo, pedido.total, lineas, 1)
+
+# ----------------------------------------------------------------------
+## Reconstrucción completa
+# ----------------------------------------------------------------------
+
+def iniciar_reconstruccion(db, resumenes, bloquear=(), rango=None):
+    """
+    Abre la transacción de una reconstrucción y vacía los resúmenes (solo las
+    filas con inicio dentro de rango=(desde, hasta), si se da). Hasta el commit
+    nadie más escribe en ellos (ni en las tablas de bloquear): los incrementos
+    de los pedidos que llegan mientras tanto esperan y se aplican después, sobre
+    lo reconstruido. Todas las lecturas ven la misma foto de la base y los
+    reportes siguen viendo los resúmenes anteriores hasta el commit.
+    """
+    db.commit()
+    dialecto = db.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        # El LOCK va antes de cualquier consulta: la foto de REPEATABLE READ se toma después
+        db.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+        tablas = ', '.join(modelo.__tablename__ for modelo in (*resumenes, *bloquear))
+        db.execute(text(f'LOCK TABLE {tablas} IN EXCLUSIVE MODE'))
+    elif dialecto == 'mysql' and rango:
+        # InnoDB: FOR UPDATE bloquea las filas del rango y los huecos entre ellas
+        # (ningún incremento entra al rango); la foto se toma con la primera lectura normal
+        for modelo in resumenes:
+            db.execute(select(modelo.id_resumen)
+                       .where(modelo.inicio >= rango[0], modelo.inicio < rango[1]).with_for_update()).all()
+    # En SQLite la primera escritura toma el candado de la base para toda la transacción
+    for modelo in resumenes:
+        borrar = delete(modelo)
+        if rango:
+            borrar = borrar.where(modelo.inicio >= rango[0], modelo.inicio < rango[1])
+        db.execute(borrar)
+
+def _siguiente_dia(db, desde):
+    """Primer día con pedidos (vivos o archivados) o resúmenes desde esa fecha; None si no queda ninguno"""
+    fechas = []
+    for columna, condicion in ((Pedido.fecha_creacion, ()), (PedidoArchivado.fecha_creacion, ()),
+                               (ResumenVentas.inicio, (ResumenVentas.periodo == 'dia',)),
+                               (ResumenVentasProducto.inicio, (ResumenVentasProducto.periodo == 'dia',))):
+        consulta = select(func.min(columna)).where(*condicion)
+        if desde is not None:
+            consulta = consulta.where(columna >= desde)
+        fecha = db.execute(consulta).scalar()
+        if fecha is not None:
+            fechas.append(fecha)
+    return inicio_periodo(min(fechas), 'dia') if fechas else None
+
+def _reconstruir_rango(db, desde, hasta, tamano_lote):
+    """Escribe los resúmenes de los pedidos creados en [desde, hasta); devuelve cuántos pedidos leyó"""
+    por_pedido = defaultdict(lambda: [0, Decimal('0.00')])
+    por_producto = defaultdict(lambda: [0, 0, Decimal('0.00')])
+    procesados = 0
+    for modelo_pedido, modelo_detalle in ((Pedido, DetallePedido), (PedidoArchivado, DetallePedidoArchivado)):
+        pedidos = db.execute(
+            select(modelo_pedido.id_pedido, modelo_pedido.fecha_creacion, modelo_pedido.estado,
+                   modelo_pedido.total)
+            .where(modelo_pedido.fecha_creacion >= desde, modelo_pedido.fecha_creacion < hasta)
+        ).all()
+        for inicio in range(0, len(pedidos), tamano_lote):
+            lote = pedidos[inicio:inicio + tamano_lote]
+            lineas_por_pedido = defaultdict(list)
+            for d in db.execute(
+                select(modelo_detalle.id_pedido, modelo_detalle.id_producto,
+                       modelo_detalle.cantidad, modelo_detalle.precio_unitario)
+                .where(modelo_detalle.id_pedido.in_([p.id_pedido for p in lote]))
+            ):
+                lineas_por_pedido[d.id_pedido].append((d.id_producto, d.cantidad, d.precio_unitario))
+
+            for p in lote:
+                lineas = _agrupar_lineas(lineas_por_pedido[p.id_pedido])
+                for periodo in PERIODOS:
+                    inicio_p = inicio_periodo(p.fecha_creacion, periodo)
+                    fila = por_pedido[(periodo, inicio_p, p.estado)]
+                    fila[0] += 1
+                    fila[1] += Decimal(p.total)
+                    for id_producto, (unidades, ingresos) in lineas.items():
+                        fila = por_producto[(periodo, inicio_p, id_producto, p.estado)]
+                        fila[0] += 1
+                        fila[1] += unidades
+                        fila[2] += ingresos
+        procesados += len(pedidos)
+
+    if por_pedido:
+        db.execute(insert(ResumenVentas), [
+            {'periodo': periodo, 'inicio': inicio, 'estado': estado, 'pedidos': num, 'ingresos': ingresos}
+            for (periodo, inicio, estado), (num, ingresos) in por_pedido.items()
+        ])
+    if por_producto:
+        db.execute(insert(ResumenVentasProducto), [
+            {'periodo': periodo, 'inicio': inicio, 'id_producto': id_producto, 'estado': estado,
+             'pedidos': num, 'unidades': unidades, 'ingresos': ingresos}
+            for (periodo, inicio, id_producto, estado), (num, unidades, ingresos) in por_producto.items()
+        ])
+    return procesados
+
+def reconstruir_resumenes(db, tamano_lote=2000, avisar=print):
+    """
+    Recalcula los resúmenes desde los pedidos vivos y los archivados (siguen
+    contando en las ventas), un día por transacción (ver iniciar_reconstruccion):
+    los pedidos que llegan mientras tanto esperan como mucho a que termine el
+    día en curso, no la reconstrucción completa. Cada día se agrega en memoria
+    y se escribe con una fila por resumen.
+    """
+    procesados = 0
+    dia = _siguiente_dia(db, None)
+    while dia is not None:
+        siguiente = dia + timedelta(days=1)
+        iniciar_reconstruccion(db, (ResumenVentasProducto, ResumenVentas), rango=(dia, siguiente))
+        procesados += _reconstruir_rango(db, dia, siguiente, tamano_lote)
+        db.commit()
+        avisar(f"Resúmenes: {dia.date().isoformat()} listo, {procesados} pedidos procesados")
+        dia = _siguiente_dia(db, siguiente)
+    db.commit()
+    return procesados
+
+# ----------------------------------------------------------------------
+## Consultas de reporte
+# ----------------------------------------------------------------------
+
+def _clave_mes(inicio):
+    return inicio.strftime('%Y-%m')
+
+def reporte_ventas(db, desde, hasta, periodo='dia', estados=None, por_producto=False):
+    """
+    Serie de ventas entre desde y hasta (fechas, inclusive) leyendo solo los
+    resúmenes. periodo puede ser 'hora', 'dia' o 'mes' (sumando los días).
+    """
+    origen = 'hora' if periodo == 'hora' else 'dia'
+    modelo = ResumenVentasProducto if por_producto else ResumenVentas
+    columnas = [modelo.inicio, func.sum(modelo.pedidos), func.sum(modelo.ingresos)]
+    agrupacion = [modelo.inicio]
+    if por_producto:
+        columnas = [modelo.inicio, modelo.id_producto, func.sum(modelo.pedidos),
+                    func.sum(modelo.ingresos), func.sum(modelo.unidades)]
+        agrupacion.append(modelo.id_producto)
+
+    consulta = (
+        select(*columnas)
+        .where(modelo.periodo == origen,
+               modelo.inicio >= datetime.combine(desde, datetime.min.time()),
+               modelo.inicio < datetime.combine(hasta + timedelta(days=1), datetime.min.time()))
+        .group_by(*agrupacion)
+        .order_by(modelo.inicio)
+    )
+    if estados:
+        consulta = consulta.where(modelo.estado.in_(estados))
+
+    serie = {}
+    for fila in db.execute(consulta):
+        inicio = fila[0]
+        clave = _clave_mes(inicio) if periodo == 'mes' else inicio.isoformat()
+        if por_producto:
+            clave = (clave, fila[1])
+            punto = serie.setdefault(clave, {'periodo': clave[0], 'id_producto': fila[1],
+                                             'pedidos': 0, 'ingresos': Decimal('0.00'), 'unidades': 0})
+            punto['unidades'] += int(fila[4] or 0)
+            pedidos, ingresos = fila[2], fila[3]
+        else:
+            punto = serie.setdefault(clave, {'periodo': clave, 'pedidos': 0, 'ingresos': Decimal('0.00')})
+            pedidos, ingresos = fila[1], fila[2]
+        punto['pedidos'] += int(pedidos or 0)
+        punto['ingresos'] += Decimal(ingresos or 0)
+    return list(serie.values())
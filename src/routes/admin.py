@@ -1,24 +1,337 @@
 # src/routes/admin.py
-from flask import Blueprint, render_template, redirect, request, url_for
-from src.database import SessionLocal
-from src.database.models import Pedido, Notificacion, Usuario
-from src.extensions import socketio
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, Response, stream_with_context, current_app
+from sqlalchemy import func
+from database import db_session
+from rate_limit import limitar
+from order_status import transicionar
+from reports import reporte_ventas
+from exports import exportar, FORMATOS
+from archive import buscar_pedido
+from database.models import Usuario, Producto, Pedido, Notificacion, PerfilUsuario
+from helpers import requiere_login, requiere_admin
+from extensions import emitir
+from kitchen import tablero
+from customers import directorio, estadisticas_usuario
+from serialization import responder, DETALLE
+from order_events import historial, tiempos_por_etapa, en_curso
+from datetime import datetime, date
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
-@admin_bp.route("/dashboard")
-def dashboard():
-    db = SessionLocal()
-    pedidos = db.query(Pedido).order_by(Pedido.fecha_creacion.desc()).all()
-    return render_template("admin/dashboard.html", pedidos=pedidos)
+@admin_bp.route('')
+@requiere_login
+@requiere_admin
+def admin_dashboard():
+    hoy = date.today()
+    
+    stats = {
+        'total_pedidos': db_session.query(Pedido).count(),
+        'pedidos_hoy': db_session.query(Pedido).filter(
+            func.date(Pedido.fecha_creacion) == hoy
+        ).count(),
+        'pedidos_pendientes': db_session.query(Pedido).filter_by(estado='pendiente').count(),
+        'total_usuarios': db_session.query(Usuario).filter_by(activo=True).count(),
+        'total_productos': db_session.query(Producto).filter_by(disponible=True).count()
+    }
+    
+    pedidos_recientes = db_session.query(Pedido).order_by(
+        Pedido.fecha_creacion.desc()
+    ).limit(5).all()
+    
+    nuevos_usuarios = db_session.query(Usuario).order_by(
+        Usuario.fecha_registro.desc()
+    ).limit(5).all()
+    
+    return render_template('admin/dashboard.html',
+                            stats=stats,
+                            pedidos_recientes=pedidos_recientes,
+                            nuevos_usuarios=nuevos_usuarios)
+
+@admin_bp.route('/view_profile/<int:usuario_id>')
+@requiere_login
+@requiere_admin
+def view_profile(usuario_id):
+    usuario = db_session.get(Usuario, usuario_id)
+    if not usuario:
+        flash('Usuario no encontrado', 'danger')
+        return redirect(url_for('admin.admin_users'))
+    
+    perfil = db_session.query(PerfilUsuario).filter_by(id_usuario=usuario_id).first()
+    
+    return render_template('admin/view_profile.html', 
+                            usuario=usuario,
+                            perfil=perfil,
+                            estadisticas=estadisticas_usuario(db_session, usuario_id))
+
+@admin_bp.route('/orders')
+@requiere_login
+@requiere_admin
+def admin_orders():
+    pedidos = db_session.query(Pedido).order_by(Pedido.fecha_creacion.desc()).all()
+    return render_template('admin/orders.html', pedidos=pedidos)
+
+@admin_bp.route('/export/orders.<formato>')
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def export_orders(formato):
+    """Descarga pedidos y líneas en CSV o JSONL. Filtros: ?desde=&hasta=&estado="""
+    if formato not in FORMATOS:
+        abort(404)
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else None
+    except ValueError:
+        flash('Fechas con formato AAAA-MM-DD', 'danger')
+        return redirect(url_for('admin.admin_orders'))
+    
+    contenido = exportar(db_session, formato, desde, hasta, request.args.getlist('estado'))
+    nombre = f"pedidos_{date.today().isoformat()}.{formato}"
+    return Response(
+        stream_with_context(contenido),
+        content_type=FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename="{nombre}"'}
+    )
+
+@admin_bp.route('/users')
+@requiere_login
+@requiere_admin
+def admin_users():
+    """Directorio con pedidos, gasto y perfil de cada cuenta. ?q=&orden=&pagina="""
+    busqueda = request.args.get('q', '')
+    orden = request.args.get('orden', 'registro')
+    resultado = directorio(db_session, busqueda, orden, request.args.get('pagina', 1, type=int))
+    return render_template('admin/users.html', busqueda=busqueda, orden=orden, **resultado)
+
+@admin_bp.route('/api/order_details/<int:pedido_id>')
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def api_order_details(pedido_id):
+    pedido = buscar_pedido(db_session, pedido_id)
+    if not pedido:
+        return jsonify({'error': 'Pedido no encontrado'}), 404
+    
+    return responder({
+        'pedido_id': pedido.id_pedido,
+        'codigo': pedido.codigo_pedido,
+        'cliente': pedido.cliente.nombre_usuario,
+        'total': pedido.total,
+        'estado': pedido.estado,
+        'notas': pedido.notas or 'Sin notas',
+        'entrega': {
+            'nombre': pedido.nombre_entrega,
+            'telefono': pedido.telefono_entrega,
+            'calle': pedido.calle_entrega,
+            'no_exterior': pedido.no_exterior_entrega,
+            'colonia': pedido.colonia_entrega,
+        } if pedido.colonia_entrega else None,
+        'fecha': pedido.fecha_creacion.strftime('%d/%m/%Y %H:%M'),
+        'detalles': [DETALLE(detalle) for detalle in pedido.detalles]
+    })
+
+@admin_bp.route('/api/change_order_status', methods=['POST'])
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def change_order_status():
+    order_id = request.form.get('order_id', type=int)
+    new_status = request.form.get('status')
+    version = request.form.get('version', type=int)
+    
+    if not order_id or not new_status:
+        return jsonify({'success': False, 'error': 'Datos incompletos'}), 400
+    
+    resultado = transicionar(db_session, order_id, new_status, version)
+    if resultado['ok']:
+        db_session.commit()
+        return jsonify({'success': True, 'estado': resultado['estado'], 'version': resultado['version']})
+    
+    db_session.rollback()
+    return respuesta_conflicto(resultado)
+
+def respuesta_conflicto(resultado):
+    """Traduce un cambio de estado rechazado a la respuesta JSON correspondiente"""
+    errores = {
+        'estado_invalido': ('Estado no válido', 400),
+        'no_encontrado': ('Pedido no encontrado', 404),
+        'version': ('El pedido fue modificado por alguien más', 409),
+        'transicion_invalida': ('Ese cambio de estado no está permitido', 409),
+    }
+    mensaje, codigo = errores[resultado['error']]
+    return jsonify({
+        'success': False,
+        'error': mensaje,
+        'motivo': resultado['error'],
+        'estado_actual': resultado.get('estado'),
+        'version_actual': resultado.get('version'),
+    }), codigo
+
+@admin_bp.route('/api/bulk_change_order_status', methods=['POST'])
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def bulk_change_order_status():
+    """
+    Avanza varios pedidos en una sola petición. Acepta
+    {"cambios": [{"order_id": 1, "status": "listo", "version": 3}, ...]}
+    o {"order_ids": [1, 2], "status": "listo"}. Cada cambio se valida por separado.
+    """
+    data = request.get_json(silent=True) or {}
+    cambios = data.get('cambios')
+    if cambios is None:
+        cambios = [{'order_id': order_id, 'status': data.get('status')} for order_id in data.get('order_ids', [])]
+    
+    if not cambios or len(cambios) > 200:
+        return jsonify({'success': False, 'error': 'Se requieren entre 1 y 200 cambios'}), 400
+    
+    resultados = []
+    for cambio in cambios:
+        leido = _leer_cambio(cambio)
+        if leido is None:
+            # Un cambio mal formado se informa en su lugar; los demás siguen
+            id_pedido = cambio.get('order_id') if isinstance(cambio, dict) else None
+            resultados.append({'id_pedido': id_pedido, 'ok': False, 'error': 'formato_invalido'})
+            continue
+        resultados.append(transicionar(db_session, *leido))
+    db_session.commit()
+    
+    conflictos = sum(1 for resultado in resultados if not resultado['ok'])
+    return jsonify({'success': conflictos == 0, 'conflictos': conflictos, 'resultados': resultados})
+
+def _leer_cambio(cambio):
+    """(order_id, status, version) con los números ya convertidos, o None si no son válidos"""
+    if not isinstance(cambio, dict):
+        return None
+    try:
+        id_pedido = int(cambio['order_id'])
+        version = cambio.get('version')
+        return id_pedido, cambio.get('status'), None if version is None else int(version)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+@admin_bp.route('/api/toggle_user_status', methods=['POST'])
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def toggle_user_status():
+    # users.js manda JSON; el formulario de view_profile, form
+    user_id = (request.get_json(silent=True) or request.form).get('user_id')
+    
+    # Usar Session.get() en lugar de Query.get()
+    usuario = db_session.get(Usuario, user_id)
+    if usuario:
+        usuario.activo = not usuario.activo
+        db_session.commit()
+        return jsonify({'success': True, 'activo': usuario.activo})
+    
+    return jsonify({'success': False, 'error': 'Usuario no encontrado'})
+
+@admin_bp.route('/api/admission_stats')
+@requiere_login
+@requiere_admin
+def admission_stats():
+    """Peticiones admitidas y rechazadas por clase de ruta"""
+    control_admision = current_app.extensions.get('admision')
+    if not control_admision:
+        return jsonify({'success': False, 'error': 'Control de admisión desactivado'}), 404
+    return jsonify({'success': True, 'clases': control_admision.metricas()})
+
+@admin_bp.route('/cocina')
+@requiere_login
+@requiere_admin
+def kitchen():
+    """Tablero de cocina: unidades por preparar de todos los pedidos abiertos"""
+    return render_template('admin/kitchen.html')
+
+@admin_bp.route('/api/cocina')
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def kitchen_api():
+    """Unidades por producto de los pedidos pendientes y en preparación; en vivo por el evento 'cocina'"""
+    return responder({'success': True, **tablero.instantanea(db_session)})
+
+@admin_bp.route('/api/reportes/ventas')
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def reporte_ventas_api():
+    """
+    Ventas por periodo leyendo solo los resúmenes.
+    ?desde=2025-01-01&hasta=2025-03-31&periodo=hora|dia|mes&estado=entregado&por=producto
+    """
+    try:
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else date.today()
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else hasta.replace(day=1)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Fechas con formato AAAA-MM-DD'}), 400
+    
+    periodo = request.args.get('periodo', 'dia')
+    if periodo not in ('hora', 'dia', 'mes') or desde > hasta:
+        return jsonify({'success': False, 'error': 'Periodo o rango inválido'}), 400
+    
+    # Por defecto no se cuentan los cancelados
+    estados = request.args.getlist('estado') or ['pendiente', 'preparando', 'listo', 'enviado', 'entregado']
+    serie = reporte_ventas(db_session, desde, hasta, periodo, estados,
+                           por_producto=request.args.get('por') == 'producto')
+    return jsonify({
+        'success': True,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'periodo': periodo,
+        'serie': serie
+    })
+
+@admin_bp.route('/api/reportes/etapas')
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def reporte_etapas_api():
+    """
+    Tiempo promedio que pasan los pedidos en cada estado (de la bitácora) y
+    lo que hay ahora en cada uno. ?desde=2025-01-01&hasta=2025-01-31&periodo=hora|dia
+    """
+    try:
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else date.today()
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else hasta
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Fechas con formato AAAA-MM-DD'}), 400
+    
+    periodo = request.args.get('periodo', 'dia')
+    if periodo not in ('hora', 'dia') or desde > hasta:
+        return jsonify({'success': False, 'error': 'Periodo o rango inválido'}), 400
+    
+    return jsonify({
+        'success': True,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'periodo': periodo,
+        **tiempos_por_etapa(db_session, desde, hasta, periodo),
+        'en_curso': en_curso(db_session)
+    })
+
+@admin_bp.route('/api/pedidos/<int:pedido_id>/eventos')
+@requiere_login
+@requiere_admin
+def eventos_pedido_api(pedido_id):
+    """Historial de estados de un pedido (los últimos segundos pueden no estar escritos aún)"""
+    return jsonify({'success': True, 'id_pedido': pedido_id, 'eventos': historial(db_session, pedido_id)})
 
 @admin_bp.route("/pedido/<int:id>/estado", methods=["POST"])
+@requiere_login
+@requiere_admin
 def cambiar_estado(id):
-    db = SessionLocal()
-    pedido = db.query(Pedido).get(id)
-
     nuevo_estado = request.form.get("estado")
-    pedido.estado = nuevo_estado
+    version = request.form.get("version", type=int)
+
+    # UPDATE condicionado al estado de origen (y a la versión si el formulario la manda)
+    resultado = transicionar(db_session, id, nuevo_estado, version)
+    if not resultado["ok"]:
+        db_session.rollback()
+        return redirect(url_for("admin.admin_orders"))
+
+    pedido = db_session.get(Pedido, id)
 
     # Notificar al cliente (guardar en DB)
     noti = Notificacion(
@@ -28,16 +341,17 @@ def cambiar_estado(id):
         mensaje=f"Tu pedido {pedido.codigo_pedido} ahora está: {nuevo_estado}",
         id_pedido=id
     )
-    db.add(noti)
-    db.commit()
+    db_session.add(noti)
+    db_session.commit()
 
     # Emitir evento al cliente conectado (podrías emitir a room = f"user_{pedido.id_usuario}")
     payload = {
         "id_pedido": pedido.id_pedido,
         "codigo_pedido": pedido.codigo_pedido,
-        "nuevo_estado": nuevo_estado
+        "nuevo_estado": nuevo_estado,
+        "version": resultado["version"]
     }
     # Emitir evento general; en el cliente filtras por id_pedido / user
-    socketio.emit("order_update", payload, namespace="/notifications")
+    emitir("order_update", payload, namespace="/notifications")
 
-    return redirect(url_for("admin.dashboard"))
+    return redirect(url_for("admin.admin_orders"))
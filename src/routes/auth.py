@@ -1,60 +1,201 @@
-from flask import Blueprint, render_template, request, redirect, session, url_for, flash
-from src.database import SessionLocal
-from src.database.models import Usuario, Rol
-
-auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
-
-@auth_bp.route("/login", methods=["GET", "POST"])
+# src/routes/auth.py
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, send_from_directory, abort, current_app
+from database import db_session
+from rate_limit import limitar
+from passwords import verificar_password, generar_hash, login_bloqueado, registrar_intento
+from database.models import Rol, Usuario, PerfilUsuario
+from helpers import MAX_FILE_SIZE, allowed_file, get_usuario_actual, get_perfil_usuario_actual, es_admin, requiere_login
+from sessions import iniciar_sesion, cerrar_sesion
+import os
+import io
+
+auth_bp = Blueprint("auth", __name__)
+
+@auth_bp.route('/')
+def index(): 
+    usuario = get_usuario_actual()
+    if usuario:
+        return redirect(url_for('admin.admin_dashboard' if es_admin() else 'products.menu'))
+    return redirect(url_for('auth.login'))
+
+@auth_bp.route('/login', methods=['GET', 'POST'])
+@limitar('login', por='ip', metodos=('POST',))
 def login():
-    db = SessionLocal()
+    if request.method == 'POST':
+        nombre_usuario = request.form['nombre_usuario']
+        ip = request.remote_addr or 'desconocida'
+        
+        # Se corta antes de consultar la base o calcular hashes
+        if login_bloqueado(ip, nombre_usuario):
+            flash('Demasiados intentos. Espera unos minutos e inténtalo de nuevo.', 'danger')
+            return render_template('auth/login.html'), 429
+        
+        usuario = db_session.query(Usuario).filter_by(
+            nombre_usuario=nombre_usuario
+        ).first()
+        
+        valido = bool(usuario and usuario.activo and verificar_password(usuario, request.form['contraseña']))
+        registrar_intento(ip, nombre_usuario, valido)
+        
+        if valido:
+            if db_session.is_modified(usuario):
+                # verificar_password regeneró el hash con el costo configurado
+                db_session.commit()
+            iniciar_sesion(usuario)
+            
+            if es_admin():
+                flash(f'¡Bienvenido administrador {usuario.nombre_usuario}!', 'success')
+                return redirect(url_for('admin.admin_dashboard'))
+            else:
+                flash(f'¡Bienvenido {usuario.nombre_usuario}!', 'success')
+                return redirect(url_for('products.menu'))
+        
+        flash('Usuario o contraseña incorrectos', 'danger')
     
-    if request.method == "POST":
-        username = request.form.get("username")
-        password = request.form.get("password")
-
-        user = db.query(Usuario).filter_by(nombre_usuario=username).first()
-
-        if not user or not user.check_password(password):
-            flash("Usuario o contraseña incorrectos")
-            return redirect(url_for("auth.login"))
-
-        session["user_id"] = user.id_usuario
-        session["rol"] = user.rol.nombre
-
-        if user.rol.nombre == "admin":
-            return redirect(url_for("admin.dashboard"))
+    return render_template('auth/login.html')
 
-        return redirect(url_for("products.menu"))
-
-    return render_template("auth/login.html")
-
-
-@auth_bp.route("/register", methods=["GET", "POST"])
+@auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
-    db = SessionLocal()
-
-    if request.method == "POST":
-        username = request.form.get("username")
-        telefono = request.form.get("telefono")
-        password = request.form.get("password")
-
-        if db.query(Usuario).filter_by(nombre_usuario=username).first():
-            flash("Ese usuario ya existe")
-            return redirect(url_for("auth.register"))
-
-        cliente_rol = db.query(Rol).filter_by(nombre="cliente").first()
-
-        new_user = Usuario(
-            nombre_usuario=username,
-            telefono=telefono,
-            id_rol=cliente_rol.id_rol
+    if request.method == 'POST':
+        nombre_usuario = request.form.get('nombre_usuario', '').strip()
+        contraseña = request.form.get('contraseña', '').strip()
+        telefono = request.form.get('telefono', '').strip()
+        
+        if not all([nombre_usuario, contraseña, telefono]):
+            flash('Todos los campos son obligatorios', 'danger')
+            return render_template('auth/register.html')
+        
+        if len(contraseña) < 6:
+            flash('La contraseña debe tener al menos 6 caracteres', 'danger')
+            return render_template('auth/register.html')
+        
+        if db_session.query(Usuario).filter_by(nombre_usuario=nombre_usuario).first():
+            flash('El usuario ya existe', 'danger')
+            return render_template('auth/register.html')
+        
+        rol_cliente = db_session.query(Rol).filter_by(nombre='cliente').first()
+        if not rol_cliente:
+            rol_cliente = Rol(nombre='cliente')
+            db_session.add(rol_cliente)
+            db_session.commit()
+            rol_cliente = db_session.query(Rol).filter_by(nombre='cliente').first()
+        
+        try:
+            nuevo_usuario = Usuario(
+                nombre_usuario=nombre_usuario,
+                telefono=telefono,
+                id_rol=rol_cliente.id_rol,
+                activo=True
+            )
+            nuevo_usuario.contrasena_hash = generar_hash(contraseña)
+            
+            db_session.add(nuevo_usuario)
+            db_session.flush()
+            
+            perfil = PerfilUsuario(
+                nombre="",
+                apellidoP="",
+                apellidoM="",
+                id_usuario=nuevo_usuario.id_usuario
+            )
+            db_session.add(perfil)
+            
+            db_session.commit()
+            flash('Registro exitoso. Inicia sesión.', 'success')
+            return redirect(url_for('auth.login'))
+            
+        except Exception as e:
+            db_session.rollback()
+            flash(f'Error en el registro: {str(e)}', 'danger')
+    
+    return render_template('auth/register.html')
+
+@auth_bp.route('/logout')
+def logout():
+    cerrar_sesion()
+    flash('Sesión cerrada', 'info')
+    return redirect(url_for('auth.login'))
+
+@auth_bp.route('/profile')
+@requiere_login
+def profile():
+    usuario_actual = get_usuario_actual()
+    perfil = get_perfil_usuario_actual()
+    return render_template('client/profile.html', 
+                            usuario=usuario_actual,
+                            perfil=perfil)
+
+@auth_bp.route('/profile/edit', methods=['GET', 'POST'])
+@requiere_login
+def profile_edit():
+    usuario_actual = get_usuario_actual()
+    perfil = get_perfil_usuario_actual()
+    
+    if request.method == 'POST':
+        try:
+            telefono = request.form.get('telefono')
+            if telefono:
+                usuario_actual.telefono = telefono
+            
+            if perfil:
+                perfil.nombre = request.form.get('nombre', perfil.nombre)
+                perfil.apellidoP = request.form.get('apellidoP', perfil.apellidoP)
+                perfil.apellidoM = request.form.get('apellidoM', perfil.apellidoM)
+                perfil.email = request.form.get('email', perfil.email)
+                perfil.colonia = request.form.get('colonia', perfil.colonia)
+                perfil.calle = request.form.get('calle', perfil.calle)
+                perfil.no_exterior = request.form.get('no_exterior', perfil.no_exterior)
+                
+                if 'foto_perfil' in request.files:
+                    imagen = request.files['foto_perfil']
+                    if imagen.filename and allowed_file(imagen.filename):
+                        imagen.seek(0, os.SEEK_END)
+                        file_size = imagen.tell()
+                        imagen.seek(0)
+                        
+                        if file_size > MAX_FILE_SIZE:
+                            flash('La imagen es demasiado grande (máximo 5MB)', 'danger')
+                        else:
+                            perfil.foto_perfil = imagen.read() 
+                
+            db_session.commit()
+            flash('Perfil actualizado correctamente', 'success')
+            return redirect(url_for('auth.profile'))
+            
+        except Exception as e:
+            db_session.rollback()
+            flash(f'Error al actualizar perfil: {str(e)}', 'danger')
+    
+    return render_template('client/profile_edit.html', 
+                            usuario=usuario_actual, 
+                            perfil=perfil)
+
+@auth_bp.route('/profile/delete_picture', methods=['POST'])
+@requiere_login
+def delete_profile_picture():
+    perfil = get_perfil_usuario_actual()
+    if perfil:
+        perfil.foto_perfil = None
+        db_session.commit()
+        flash('Foto de perfil eliminada', 'success')
+    return redirect(url_for('auth.profile'))
+
+@auth_bp.route('/profile_picture/<int:usuario_id>')
+def profile_picture(usuario_id):
+    perfil = db_session.query(PerfilUsuario).filter_by(id_usuario=usuario_id).first()
+    
+    if perfil and perfil.foto_perfil:
+        return send_file(
+            io.BytesIO(perfil.foto_perfil),
+            mimetype='image/jpeg', 
+            as_attachment=False
         )
-        new_user.set_password(password)
-
-        db.add(new_user)
-        db.commit()
-
-        flash("Registro exitoso")
-        return redirect(url_for("auth.login"))
-
-    return render_template("auth/register.html")
+    
+    try:
+        image_directory = os.path.join(current_app.root_path, 'static', 'images')
+        return send_from_directory(
+            image_directory, 
+            'default_profile.png'
+        )
+    except Exception:
+        abort(404)
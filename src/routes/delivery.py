@@ -0,0 +1,58 @@
+# src/routes/delivery.py
+# API de reparto para las apps de los repartidores: viajes agrupados por
+# colonia (dispatch.py), salida de un viaje y entrega de cada pedido.
+from flask import Blueprint, request, jsonify
+from database import db_session
+from rate_limit import limitar
+from order_status import transicionar
+from dispatch import despacho
+from serialization import responder
+from helpers import requiere_login, requiere_repartidor
+from routes.admin import respuesta_conflicto
+
+delivery_bp = Blueprint("delivery", __name__, url_prefix="/reparto")
+
+@delivery_bp.route('/api/viajes')
+@limitar('api_admin')
+@requiere_login
+@requiere_repartidor
+def viajes():
+    """Pedidos listos agrupados en viajes; en vivo por el evento 'reparto'"""
+    return responder({'success': True, **despacho.instantanea(db_session)})
+
+@delivery_bp.route('/api/viajes/salida', methods=['POST'])
+@limitar('api_admin')
+@requiere_login
+@requiere_repartidor
+def salida():
+    """
+    El repartidor sale con los pedidos {"order_ids": [1, 2]}: pasan a enviado en
+    una sola transacción. Si otro repartidor ya se llevó alguno, viene como conflicto.
+    """
+    data = request.get_json(silent=True) or {}
+    order_ids = data.get('order_ids') or []
+    if not isinstance(order_ids, list) or not 0 < len(order_ids) <= 50:
+        return jsonify({'success': False, 'error': 'Se requieren entre 1 y 50 pedidos'}), 400
+    
+    try:
+        resultados = [transicionar(db_session, int(order_id), 'enviado') for order_id in order_ids]
+        db_session.commit()
+    except (TypeError, ValueError):
+        db_session.rollback()
+        return jsonify({'success': False, 'error': 'Formato de pedidos inválido'}), 400
+    
+    conflictos = sum(1 for resultado in resultados if not resultado['ok'])
+    return jsonify({'success': conflictos == 0, 'conflictos': conflictos, 'resultados': resultados})
+
+@delivery_bp.route('/api/pedidos/<int:pedido_id>/entregado', methods=['POST'])
+@limitar('api_admin')
+@requiere_login
+@requiere_repartidor
+def entregado(pedido_id):
+    resultado = transicionar(db_session, pedido_id, 'entregado')
+    if resultado['ok']:
+        db_session.commit()
+        return jsonify({'success': True, 'estado': resultado['estado'], 'version': resultado['version']})
+    
+    db_session.rollback()
+    return respuesta_conflicto(resultado)
@@ -1,76 +1,233 @@
 # src/routes/orders.py
-from flask import Blueprint, render_template, request, redirect, session, url_for, current_app
-from src.database import SessionLocal
-from src.database.models import Pedido, DetallePedido, Producto, Notificacion
-from datetime import datetime
-import uuid
-from src.extensions import socketio
-
-orders_bp = Blueprint("orders", __name__, url_prefix="/orders")
-
-@orders_bp.route("/create", methods=["POST"])
-def create_order():
-    db = SessionLocal()
-    user_id = session.get("user_id")
-
-    # ejemplo: formulario envía listas producto_id[] y cantidad[]
-    carrito = request.form.getlist("producto_id")
-    cantidades = request.form.getlist("cantidad")
-
-    total = 0
-    detalles = []
-
-    for prod_id, cant in zip(carrito, cantidades):
-        producto = db.query(Producto).get(int(prod_id))
-        precio = float(producto.precio) * int(cant)
-        total += precio
-        detalles.append({
-            "id_producto": int(prod_id),
-            "cantidad": int(cant),
-            "precio_unitario": producto.precio
-        })
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from database import db_session
+from rate_limit import limitar
+from order_status import registrar_creacion
+from order_summary import resumir_items
+from dispatch import normalizar_colonia
+from serialization import PEDIDO_RESUMEN
+from archive import buscar_pedido
+from database.models import Pedido, DetallePedido
+from helpers import get_usuario_actual, get_perfil_usuario_actual, requiere_login, generar_codigo_pedido
+import re
+from decimal import Decimal, InvalidOperation
+
+orders_bp = Blueprint("orders", __name__)
+
+@orders_bp.route('/carrito')
+@requiere_login
+def carrito():
+    """Página del carrito de compras"""
+    # ELIMINA esta condición:
+    # if es_admin():
+    #     return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('client/carrito.html')
+
+@orders_bp.route('/orders')
+@requiere_login
+def orders():
+    """Página de checkout/confirmación de pedido"""
+    # ELIMINA esta condición:
+    # if es_admin():
+    #     return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('client/orders.html')
+
+@orders_bp.route('/mis_pedidos')
+@requiere_login
+def mis_pedidos():
+    # ELIMINA esta condición:
+    # if es_admin():
+    #     return redirect(url_for('admin.admin_dashboard'))
+    
+    usuario = get_usuario_actual()
+    pedidos = db_session.query(Pedido).filter_by(id_usuario=usuario.id_usuario)\
+                             .order_by(Pedido.fecha_creacion.desc()).all()
+    return render_template('client/view_orders.html', pedidos=pedidos)
+
+@orders_bp.route('/debug_pedidos')
+@limitar('api_cliente')
+@requiere_login
+def debug_pedidos():
+    """Ruta para debug - ver pedidos del usuario actual"""
+    usuario = get_usuario_actual()
+    pedidos = db_session.query(Pedido).filter_by(id_usuario=usuario.id_usuario).all()
+    
+    return jsonify({
+        'usuario_id': usuario.id_usuario,
+        'usuario_nombre': usuario.nombre_usuario,
+        'total_pedidos': len(pedidos),
+        'pedidos': [PEDIDO_RESUMEN(p) for p in pedidos]
+    })
+
+@orders_bp.route('/order_details/<int:pedido_id>')
+@requiere_login
+def order_details(pedido_id):
+    # if es_admin():
+    #     return redirect(url_for('admin.admin_dashboard'))
+    
+    usuario = get_usuario_actual()
+    # Los pedidos antiguos pueden estar en el archivo
+    pedido = buscar_pedido(db_session, pedido_id, usuario.id_usuario)
+
+    if not pedido:
+        flash('Pedido no encontrado o no te pertenece.', 'danger')
+        return redirect(url_for('orders.mis_pedidos'))
+
+    subtotal_pedido = pedido.subtotal
+    if subtotal_pedido is None:
+        # Pedido anterior al resumen que aún no se rellena (flask resumir-pedidos)
+        subtotal_pedido = sum((detalle.cantidad * detalle.precio_unitario for detalle in pedido.detalles), Decimal('0.00'))
+    
+    return render_template('client/order_details.html', pedido=pedido, subtotal_pedido=subtotal_pedido)
 
-    nuevo_pedido = Pedido(
-        codigo_pedido=str(uuid.uuid4())[:8],
-        id_usuario=user_id,
-        total=total,
-        estado="recibido"  # "recibido" indica que ya llegó al sistema
-    )
-
-    db.add(nuevo_pedido)
-    db.commit()
-
-    # Añadir detalles
-    for d in detalles:
-        detalle = DetallePedido(
-            id_pedido=nuevo_pedido.id_pedido,
-            id_producto=d["id_producto"],
-            cantidad=d["cantidad"],
-            precio_unitario=d["precio_unitario"]
+@orders_bp.route('/generar_pedido', methods=['POST'])
+@limitar('generar_pedido')
+@requiere_login
+def generar_pedido():
+    usuario = get_usuario_actual()
+    
+    try:
+        form_data = request.form
+        
+        nombre = form_data.get('nombre')
+        telefono = form_data.get('telefono')
+        colonia = form_data.get('colonia')
+        calle = form_data.get('calle')
+        no_exterior = form_data.get('no_exterior')
+        notas = form_data.get('notas')
+        
+        if not all([nombre, telefono, colonia, calle, no_exterior]):
+            flash('Faltan datos obligatorios para generar el pedido.', 'danger')
+            return redirect(url_for('orders.orders'))
+        
+        items_pedido = []
+        
+        items_map = {}
+        for key, value in form_data.items():
+            match = re.search(r'items\[(\d+)\]\[(cantidad|precio)\]', key)
+            if match:
+                product_id = int(match.group(1))
+                field = match.group(2)
+                
+                if product_id not in items_map:
+                    items_map[product_id] = {'id': product_id, 'cantidad': 0, 'precio_unitario': Decimal('0.00')}
+                    
+                if field == 'cantidad':
+                    try:
+                        items_map[product_id]['cantidad'] = int(value)
+                    except ValueError:
+                        items_map[product_id]['cantidad'] = 0
+                elif field == 'precio':
+                    try:
+                        items_map[product_id]['precio_unitario'] = Decimal(str(value))
+                    except:
+                        items_map[product_id]['precio_unitario'] = Decimal('0.00')
+
+        items_pedido = [item for item in items_map.values() if item['cantidad'] > 0]
+
+        if not items_pedido:
+            flash('El carrito está vacío. Agrega productos para generar un pedido.', 'danger')
+            return redirect(url_for('orders.carrito'))
+
+        # Subtotal, impuestos y resumen se guardan en el mismo INSERT del pedido
+        resumen = resumir_items(db_session, items_pedido)
+        subtotal_pedido = resumen['subtotal']
+            
+        if subtotal_pedido <= Decimal('0.00'):
+            flash('El total del pedido debe ser mayor a cero.', 'danger')
+            return redirect(url_for('orders.carrito'))
+            
+        total_con_impuestos = subtotal_pedido + resumen['impuestos']
+            
+        nuevo_pedido = Pedido(
+            codigo_pedido=generar_codigo_pedido(), 
+            id_usuario=usuario.id_usuario,
+            total=total_con_impuestos,
+            estado='pendiente', 
+            notas=notas or None,
+            # Dirección por campos (recortada al largo de cada columna) para agrupar el reparto
+            nombre_entrega=nombre.strip()[:100],
+            telefono_entrega=telefono.strip()[:20],
+            calle_entrega=calle.strip()[:150],
+            no_exterior_entrega=no_exterior.strip()[:20],
+            colonia_entrega=normalizar_colonia(colonia)[:100],
+            **resumen
         )
-        db.add(detalle)
-
-    # Notificación a admin (guardar en DB)
-    # Nota: aquí asumo admin con id = 1; ideal: buscar todos los usuarios con rol admin
-    noti_admin = Notificacion(
-        id_usuario=1,
-        tipo="nuevo_pedido",
-        titulo="Nuevo pedido",
-        mensaje=f"Nuevo pedido {nuevo_pedido.codigo_pedido}",
-        id_pedido=nuevo_pedido.id_pedido
-    )
-    db.add(noti_admin)
-
-    db.commit()
-
-    # Emitir evento SocketIO para admin (namespace opcional '/notifications')
-    payload = {
-        "id_pedido": nuevo_pedido.id_pedido,
-        "codigo_pedido": nuevo_pedido.codigo_pedido,
-        "total": str(nuevo_pedido.total),
-        "fecha_creacion": nuevo_pedido.fecha_creacion.isoformat()
-    }
-    # Emitir a todos (o a un room de admins si luego lo implementas)
-    socketio.emit("new_order", payload, namespace="/notifications")
-
-    return redirect(url_for("products.menu"))
+        db_session.add(nuevo_pedido)
+        db_session.flush()
+
+        detalles = []
+        for item in items_pedido:
+            detalle = DetallePedido(
+                id_pedido=nuevo_pedido.id_pedido,
+                id_producto=item['id'],
+                cantidad=item['cantidad'],
+                precio_unitario=item['precio_unitario']
+            )
+            db_session.add(detalle)
+            detalles.append(detalle)
+        
+        registrar_creacion(db_session, nuevo_pedido, detalles)
+            
+        perfil = get_perfil_usuario_actual()
+        if perfil:
+            if nombre and ' ' in nombre:
+                partes_nombre = nombre.split(' ', 1)
+                perfil.nombre = partes_nombre[0]
+                if len(partes_nombre) > 1:
+                    perfil.apellidoP = partes_nombre[1]
+            
+            usuario.telefono = telefono
+            
+            perfil.colonia = colonia
+            perfil.calle = calle
+            perfil.no_exterior = no_exterior
+
+        db_session.commit()
+        
+        flash(f'¡Pedido #{nuevo_pedido.codigo_pedido} generado con éxito! Total: ${total_con_impuestos:.2f} (incluye impuestos)', 'success')
+        
+        return redirect(url_for('orders.order_details', pedido_id=nuevo_pedido.id_pedido))
+
+    except Exception as e:
+        db_session.rollback()
+        flash(f'Error al generar el pedido: {str(e)}', 'danger')
+        return redirect(url_for('orders.orders'))
+
+@orders_bp.route('/api/agregar_al_carrito', methods=['POST'])
+@limitar('api_cliente')
+@requiere_login
+def agregar_al_carrito():
+    """API para agregar productos al carrito (usada desde el menú)"""
+    try:
+        data = request.get_json()
+        product_id = data.get('product_id')
+        nombre = data.get('nombre')
+        precio = data.get('precio')
+        
+        if not all([product_id, nombre, precio]):
+            return jsonify({'success': False, 'message': 'Datos incompletos'}), 400
+        
+        try:
+            product_id = int(product_id)
+            precio = Decimal(str(precio))
+            if not precio.is_finite() or precio <= 0:
+                raise InvalidOperation
+        except (InvalidOperation, ValueError, TypeError):
+            return jsonify({'success': False, 'message': 'Producto o precio inválido'}), 400
+        
+        return jsonify({
+            'success': True,
+            'message': f'{nombre} agregado al carrito',
+            'producto': {
+                'id': product_id,
+                'nombre': nombre,
+                'precio': precio,
+                'cantidad': 1
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
@@ -1,11 +1,226 @@
-from flask import Blueprint, render_template
-from src.database import SessionLocal
-from src.database.models import Producto
+# src/routes/products.py
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, send_from_directory, abort, current_app
+from database import db_session
+from rate_limit import limitar
+from product_import import importar_productos, abrir_texto
+from database.models import Producto
+from helpers import allowed_file, es_admin, requiere_login, requiere_admin
+from serialization import PRODUCTO
+import os
+import io
+from decimal import Decimal
 
 products_bp = Blueprint("products", __name__)
 
-@products_bp.route("/menu")
+@products_bp.route('/menu')
+@requiere_login
 def menu():
-    db = SessionLocal()
-    productos = db.query(Producto).filter_by(disponible=True).all()
-    return render_template("client/menu.html", productos=productos)
+    # Si es admin, mostrar menú pero con indicador
+    productos = db_session.query(Producto).filter_by(disponible=True).all()
+    
+    # Agregar un mensaje flash si es admin
+    if es_admin():
+        flash('🔧 Estás viendo el menú en modo administrador. Puedes regresar al panel en cualquier momento.', 'info')
+    
+    return render_template('client/menu.html', productos=productos)
+
+# O crear una ruta separada para admin
+@products_bp.route('/admin/menu_preview')
+@requiere_login
+@requiere_admin
+def admin_menu_preview():
+    """Vista previa del menú para administradores"""
+    productos = db_session.query(Producto).filter_by(disponible=True).all()
+    return render_template('client/menu.html', 
+                          productos=productos, 
+                          es_admin=True,
+                          mostrar_boton_admin=True)
+
+@products_bp.route('/product_image/<int:product_id>')
+def product_image(product_id):
+    producto = db_session.query(Producto).get(product_id)
+    
+    if producto and producto.imagen:
+        return send_file(
+            io.BytesIO(producto.imagen),
+            mimetype='image/jpeg', 
+            as_attachment=False
+        )
+    
+    try:
+        image_directory = os.path.join(current_app.root_path, 'static', 'images')
+        return send_from_directory(
+            image_directory, 
+            'default_product.png'
+        )
+    except Exception:
+        abort(404)
+
+@products_bp.route('/admin/products', methods=['GET', 'POST'])
+@requiere_login
+@requiere_admin
+def admin_products():
+    if request.method == 'POST':
+        nombre = request.form.get('nombre')
+        descripcion = request.form.get('descripcion')
+        precio = request.form.get('precio')
+        tiempo = request.form.get('tiempo_preparacion')
+        imagen = request.files.get('imagen_producto')
+        
+        if not all([nombre, descripcion, precio, tiempo]):
+            flash('Todos los campos son obligatorios', 'danger')
+            return redirect(url_for('products.admin_products'))
+            
+        try:
+            precio_float = Decimal(precio)
+            tiempo_int = int(tiempo)
+            if precio_float <= 0 or tiempo_int <= 0:
+                 raise ValueError("El precio y el tiempo deben ser positivos.")
+        except ValueError:
+            flash('Precio y Tiempo de preparación deben ser números válidos y positivos.', 'danger')
+            return redirect(url_for('products.admin_products'))
+
+        imagen_data = None
+        if imagen and imagen.filename and allowed_file(imagen.filename):
+            try:
+                imagen_data = imagen.read()
+            except Exception as e:
+                flash(f'Error al leer la imagen: {str(e)}', 'warning')
+                
+        try:
+            nuevo_producto = Producto(
+                nombre=nombre,
+                descripcion=descripcion,
+                precio=precio_float,
+                tiempo_preparacion=tiempo_int,
+                imagen=imagen_data, 
+                disponible=True
+            )
+            
+            db_session.add(nuevo_producto)
+            db_session.commit()
+            flash(f'Producto "{nombre}" agregado con éxito.', 'success')
+        except Exception as e:
+            db_session.rollback()
+            flash(f"Error de base de datos al agregar producto: {str(e)}", 'danger')
+        
+        return redirect(url_for('products.admin_products'))
+
+    productos = db_session.query(Producto).order_by(Producto.nombre).all()
+    return render_template('admin/products.html', productos=productos)
+
+@products_bp.route('/admin/api/edit_product/<int:product_id>', methods=['POST'])
+@requiere_login
+@requiere_admin
+def edit_product(product_id):
+    producto = db_session.query(Producto).get(product_id)
+    if not producto:
+        flash('Producto no encontrado', 'danger')
+        return redirect(url_for('products.admin_products'))
+    
+    try:
+        nombre = request.form.get('nombre')
+        descripcion = request.form.get('descripcion')
+        precio = request.form.get('precio')
+        tiempo = request.form.get('tiempo_preparacion')
+        imagen = request.files.get('imagen_producto_edit')
+        
+        precio_decimal = Decimal(precio)
+        tiempo_int = int(tiempo)
+
+        producto.nombre = nombre
+        producto.descripcion = descripcion
+        producto.precio = precio_decimal
+        producto.tiempo_preparacion = tiempo_int
+        
+        if imagen and imagen.filename and allowed_file(imagen.filename):
+            producto.imagen = imagen.read()
+        
+        db_session.commit()
+        flash(f'Producto "{producto.nombre}" actualizado con éxito.', 'success')
+        
+    except Exception as e:
+        db_session.rollback()
+        flash(f'Error al actualizar producto: {str(e)}', 'danger')
+        
+    return redirect(url_for('products.admin_products'))
+
+@products_bp.route('/admin/products/import', methods=['POST'])
+@requiere_login
+@requiere_admin
+def import_products():
+    """Alta/actualización masiva desde CSV (con zip de imágenes opcional)"""
+    archivo = request.files.get('archivo_csv')
+    imagenes = request.files.get('imagenes_zip')
+    if not archivo or not archivo.filename:
+        flash('Selecciona un archivo CSV', 'danger')
+        return redirect(url_for('products.admin_products'))
+    
+    try:
+        reporte = importar_productos(
+            db_session,
+            abrir_texto(archivo.stream),
+            imagenes.stream if imagenes and imagenes.filename else None,
+            aplicar=not request.form.get('solo_validar')
+        )
+    except Exception as e:
+        flash(f'Error al importar productos: {str(e)}', 'danger')
+        return redirect(url_for('products.admin_products'))
+    
+    if reporte['errores']:
+        flash(f"No se aplicó ningún cambio: {len(reporte['errores'])} fila(s) con errores.", 'danger')
+        for error in reporte['errores'][:10]:
+            flash(f"Línea {error['linea']} ({error.get('sku') or 'sin sku'}): {'; '.join(error['errores'])}", 'warning')
+    elif request.form.get('solo_validar'):
+        flash(f"Archivo válido: {reporte['filas']} fila(s) listas para importar.", 'info')
+    else:
+        flash(f"Importación completa: {reporte['creados']} creados, {reporte['actualizados']} actualizados.", 'success')
+    return redirect(url_for('products.admin_products'))
+
+@products_bp.route('/admin/api/toggle_product_status', methods=['POST'])
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def toggle_product_status():
+    data = request.get_json(silent=True) or request.form
+    product_id = data.get('product_id') or request.args.get('product_id')
+    
+    # Usar Session.get() en lugar de Query.get()
+    producto = db_session.get(Producto, product_id)
+    if producto:
+        producto.disponible = not producto.disponible
+        db_session.commit()
+        return jsonify({'success': True, 'disponible': producto.disponible})
+    
+    return jsonify({'success': False, 'error': 'Producto no encontrado'})
+
+@products_bp.route('/admin/api/delete_product/<int:product_id>', methods=['DELETE'])
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def delete_product(product_id):
+    # Usar Session.get() en lugar de Query.get()
+    producto = db_session.get(Producto, product_id)
+    if not producto:
+        return jsonify({'success': False, 'message': 'Producto no encontrado'}), 404
+        
+    try:
+        db_session.delete(producto)
+        db_session.commit()
+        return jsonify({'success': True, 'message': 'Producto eliminado correctamente'})
+        
+    except Exception as e:
+        db_session.rollback()
+        return jsonify({'success': False, 'message': f'Error al eliminar el producto: {str(e)}'}), 500
+
+@products_bp.route('/admin/api/get_product/<int:product_id>', methods=['GET'])
+@limitar('api_admin')
+@requiere_login
+@requiere_admin
+def get_product(product_id):
+    # Usar Session.get() en lugar de Query.get()
+    producto = db_session.get(Producto, product_id)
+    if not producto:
+        return jsonify({'success': False, 'message': 'Producto no encontrado'}), 404
+    
+    return jsonify({'success': True, **PRODUCTO(producto)})
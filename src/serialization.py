@@ -0,0 +1,120 @@
+# src/serialization.py
+# Serialización de las respuestas de la API. El proveedor JSON de la app usa
+# orjson si está instalado (si no, json de la biblioteca estándar). Decimal
+# sale como texto exacto (el dinero nunca pasa por float) y las fechas en ISO
+# 8601. Los serializadores por modelo se arman una sola vez con attrgetter.
+# Con Accept: application/msgpack, responder() contesta en MessagePack
+# (tabletas de cocina) si el paquete msgpack está instalado.
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+
+from flask import current_app, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+def _orjson():
+    """Módulo orjson si está instalado (dependencia opcional)"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def _msgpack():
+    """Módulo msgpack si está instalado (dependencia opcional)"""
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+orjson = _orjson()
+msgpack = _msgpack()
+
+MIME_MSGPACK = 'application/msgpack'
+# OPT_NON_STR_KEYS: claves numéricas como en json.dumps
+OPCIONES_ORJSON = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+def convertir(valor):
+    """default= de los codificadores: tipos que JSON/MessagePack no conocen"""
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f'{type(valor).__name__} no se puede serializar')
+
+class ProveedorJSON(DefaultJSONProvider):
+    """Proveedor de app.json: jsonify y request.get_json pasan por aquí"""
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', convertir)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=convertir, option=OPCIONES_ORJSON).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Sin el paso por str: orjson ya entrega bytes UTF-8
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=convertir, option=OPCIONES_ORJSON), mimetype=self.mimetype
+        )
+
+def responder(datos, estado=200):
+    """jsonify, o MessagePack si el cliente lo prefiere y está disponible"""
+    if msgpack and request.accept_mimetypes.best_match(('application/json', MIME_MSGPACK)) == MIME_MSGPACK:
+        respuesta = current_app.response_class(
+            msgpack.packb(datos, default=convertir), status=estado, mimetype=MIME_MSGPACK
+        )
+    else:
+        respuesta = jsonify(datos)
+        respuesta.status_code = estado
+    respuesta.vary.add('Accept')
+    return respuesta
+
+def serializador(**campos):
+    """
+    Arma una función objeto -> dict. Cada campo es la ruta de un atributo
+    ('producto.nombre') o una función del objeto para valores calculados.
+    """
+    claves = tuple(clave for clave, origen in campos.items() if isinstance(origen, str))
+    calculados = tuple((clave, origen) for clave, origen in campos.items() if not isinstance(origen, str))
+    obtener = attrgetter(*(campos[clave] for clave in claves))
+    if len(claves) == 1:
+        unico = obtener
+        obtener = lambda obj: (unico(obj),)
+
+    def serializar(obj):
+        datos = dict(zip(claves, obtener(obj)))
+        for clave, funcion in calculados:
+            datos[clave] = funcion(obj)
+        return datos
+    return serializar
+
+# ----------------------------------------------------------------------
+## Serializadores por modelo
+# ----------------------------------------------------------------------
+
+PRODUCTO = serializador(
+    id='id_producto', nombre='nombre', descripcion='descripcion', precio='precio',
+    tiempo_preparacion='tiempo_preparacion', disponible='disponible',
+    has_image=lambda producto: producto.imagen is not None,
+)
+
+DETALLE = serializador(
+    producto='producto.nombre', cantidad='cantidad', precio='precio_unitario', nota='nota',
+    subtotal=lambda detalle: detalle.cantidad * detalle.precio_unitario,
+)
+
+PEDIDO_RESUMEN = serializador(
+    id='id_pedido', codigo='codigo_pedido', estado='estado', total='total', num_articulos='num_articulos',
+)
@@ -0,0 +1,283 @@
+# src/sessions.py
+# Sesiones del lado del servidor. La cookie firmada de Flask solo lleva un id
+# aleatorio ('sid'); el registro (usuario, nombre, rol, activo) vive en un
+# almacén compartido entre workers: la tabla sesiones por defecto o Redis con
+# SESSION_STORAGE_URL=redis://... (memory:// = LRU del proceso, solo para un
+# worker), con un LRU de pocos segundos delante para no consultarlo en cada
+# petición. Desactivar a un usuario o cambiarle el rol borra sus registros tras
+# el commit: el cierre de sesión es inmediato en el worker que hizo el cambio y
+# llega a los demás en SESSION_CACHE_SECONDS.
+
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+from flask import g, has_request_context, session
+from sqlalchemy import delete, event, insert, inspect, select, update
+
+from config import Config
+from database import DB_URL, RoutingSession, despues_de_commit, en_memoria, get_engine
+from database.models import SesionServidor, Usuario
+
+Registro = namedtuple('Registro', 'id_usuario nombre_usuario rol activo')
+
+class MemoriaSesiones:
+    """
+    LRU sid -> (Registro, vence). Con varios workers cada uno tendría el suyo y
+    la revocación solo alcanzaría al worker que la hizo: gunicorn no arranca
+    más de un worker con este almacén.
+    """
+
+    def __init__(self, max_sesiones=50_000, duracion=Config.SESSION_IDLE_SECONDS):
+        self.max_sesiones = max_sesiones
+        self.duracion = duracion
+        self._sesiones = OrderedDict()
+        self._por_usuario = {}
+        self._lock = threading.Lock()
+
+    def guardar(self, sid, registro):
+        with self._lock:
+            self._sesiones[sid] = (registro, time.monotonic() + self.duracion)
+            self._sesiones.move_to_end(sid)
+            self._por_usuario.setdefault(registro.id_usuario, set()).add(sid)
+            while len(self._sesiones) > self.max_sesiones:
+                self._quitar(next(iter(self._sesiones)))
+
+    def obtener(self, sid):
+        ahora = time.monotonic()
+        with self._lock:
+            guardado = self._sesiones.get(sid)
+            if guardado is None:
+                return None
+            if guardado[1] < ahora:
+                self._quitar(sid)
+                return None
+            # Expiración por inactividad: cada uso la renueva
+            self._sesiones[sid] = (guardado[0], ahora + self.duracion)
+            self._sesiones.move_to_end(sid)
+            return guardado[0]
+
+    def borrar(self, sid):
+        with self._lock:
+            self._quitar(sid)
+
+    def revocar_usuario(self, id_usuario):
+        """Borra todas las sesiones del usuario; devuelve cuántas había"""
+        with self._lock:
+            sids = self._por_usuario.pop(id_usuario, set())
+            for sid in sids:
+                self._sesiones.pop(sid, None)
+        return len(sids)
+
+    def _quitar(self, sid):
+        guardado = self._sesiones.pop(sid, None)
+        if guardado is not None:
+            sids = self._por_usuario.get(guardado[0].id_usuario)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._por_usuario[guardado[0].id_usuario]
+
+class BaseSesiones:
+    """
+    Tabla sesiones en la primaria, con conexiones propias (fuera de la
+    transacción y del ruteo a réplicas de la petición). El vencimiento se
+    renueva como mucho una vez cada RENOVAR_CADA segundos: leer una sesión no
+    escribe en cada petición. Las vencidas las borra la tarea purgar-sesiones.
+    """
+
+    RENOVAR_CADA = 60
+
+    def __init__(self, duracion=Config.SESSION_IDLE_SECONDS):
+        self.duracion = duracion
+
+    def guardar(self, sid, registro):
+        with get_engine().begin() as conn:
+            conn.execute(insert(SesionServidor).values(
+                sid=sid, id_usuario=registro.id_usuario, nombre_usuario=registro.nombre_usuario,
+                rol=registro.rol, activo=registro.activo,
+                vence=datetime.utcnow() + timedelta(seconds=self.duracion),
+            ))
+
+    def obtener(self, sid):
+        ahora = datetime.utcnow()
+        with get_engine().connect() as conn:
+            fila = conn.execute(
+                select(SesionServidor.id_usuario, SesionServidor.nombre_usuario, SesionServidor.rol,
+                       SesionServidor.activo, SesionServidor.vence)
+                .where(SesionServidor.sid == sid)
+            ).first()
+            if fila is None or fila.vence < ahora:
+                conn.rollback()
+                return None
+            # Expiración por inactividad: el uso la renueva
+            if fila.vence - ahora < timedelta(seconds=self.duracion - self.RENOVAR_CADA):
+                conn.execute(update(SesionServidor).where(SesionServidor.sid == sid)
+                             .values(vence=ahora + timedelta(seconds=self.duracion)))
+            conn.commit()
+        return Registro(fila.id_usuario, fila.nombre_usuario, fila.rol, bool(fila.activo))
+
+    def borrar(self, sid):
+        with get_engine().begin() as conn:
+            conn.execute(delete(SesionServidor).where(SesionServidor.sid == sid))
+
+    def revocar_usuario(self, id_usuario):
+        with get_engine().begin() as conn:
+            return conn.execute(delete(SesionServidor).where(SesionServidor.id_usuario == id_usuario)).rowcount
+
+def purgar_vencidas(db):
+    """Borra de la tabla las sesiones vencidas; devuelve cuántas"""
+    return db.execute(delete(SesionServidor).where(SesionServidor.vence < datetime.utcnow())).rowcount
+
+class RedisSesiones:
+    """Sesiones compartidas entre workers; requiere el paquete redis"""
+
+    def __init__(self, url, duracion=Config.SESSION_IDLE_SECONDS):
+        import redis
+        self._cliente = redis.Redis.from_url(url, decode_responses=True)
+        self.duracion = int(duracion)
+
+    def guardar(self, sid, registro):
+        tuberia = self._cliente.pipeline()
+        tuberia.hset(f'ses:{sid}', mapping={
+            'u': registro.id_usuario, 'n': registro.nombre_usuario,
+            'r': registro.rol, 'a': int(registro.activo),
+        })
+        tuberia.expire(f'ses:{sid}', self.duracion)
+        tuberia.sadd(f'ses:u:{registro.id_usuario}', sid)
+        tuberia.expire(f'ses:u:{registro.id_usuario}', self.duracion)
+        tuberia.execute()
+
+    def obtener(self, sid):
+        tuberia = self._cliente.pipeline()
+        tuberia.hgetall(f'ses:{sid}')
+        tuberia.expire(f'ses:{sid}', self.duracion)
+        datos, _ = tuberia.execute()
+        if not datos:
+            return None
+        return Registro(int(datos['u']), datos['n'], datos['r'], datos['a'] == '1')
+
+    def borrar(self, sid):
+        id_usuario = self._cliente.hget(f'ses:{sid}', 'u')
+        tuberia = self._cliente.pipeline()
+        tuberia.delete(f'ses:{sid}')
+        if id_usuario:
+            tuberia.srem(f'ses:u:{id_usuario}', sid)
+        tuberia.execute()
+
+    def revocar_usuario(self, id_usuario):
+        sids = self._cliente.smembers(f'ses:u:{id_usuario}')
+        self._cliente.delete(f'ses:u:{id_usuario}', *(f'ses:{sid}' for sid in sids))
+        return len(sids)
+
+class CacheSesiones:
+    """
+    LRU del proceso delante de un almacén compartido: una sesión leída hace
+    menos de SESSION_CACHE_SECONDS no vuelve a consultarlo. Lo que este proceso
+    borra o revoca sale del LRU al momento; en los otros workers una sesión
+    revocada dura como mucho esos segundos.
+    """
+
+    def __init__(self, almacen, ttl=Config.SESSION_CACHE_SECONDS, max_sesiones=10_000):
+        self.almacen = almacen
+        self.ttl = ttl
+        self.max_sesiones = max_sesiones
+        self._sesiones = OrderedDict()  # sid -> (Registro, vence en monotonic)
+        self._lock = threading.Lock()
+
+    def _poner(self, sid, registro):
+        with self._lock:
+            self._sesiones[sid] = (registro, time.monotonic() + self.ttl)
+            self._sesiones.move_to_end(sid)
+            while len(self._sesiones) > self.max_sesiones:
+                self._sesiones.popitem(last=False)
+
+    def guardar(self, sid, registro):
+        self.almacen.guardar(sid, registro)
+        self._poner(sid, registro)
+
+    def obtener(self, sid):
+        with self._lock:
+            guardado = self._sesiones.get(sid)
+        if guardado is not None and guardado[1] > time.monotonic():
+            return guardado[0]
+        registro = self.almacen.obtener(sid)
+        if registro is None:
+            with self._lock:
+                self._sesiones.pop(sid, None)
+        else:
+            self._poner(sid, registro)
+        return registro
+
+    def borrar(self, sid):
+        with self._lock:
+            self._sesiones.pop(sid, None)
+        self.almacen.borrar(sid)
+
+    def revocar_usuario(self, id_usuario):
+        with self._lock:
+            for sid in [sid for sid, (registro, _) in self._sesiones.items() if registro.id_usuario == id_usuario]:
+                del self._sesiones[sid]
+        return self.almacen.revocar_usuario(id_usuario)
+
+def crear_almacen(url):
+    # Una base en memoria vive en un solo proceso: la tabla no compartiría nada
+    if url == 'memory://' or (not url and en_memoria(DB_URL)):
+        return MemoriaSesiones()
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        compartido = RedisSesiones(url)
+    else:
+        compartido = BaseSesiones()
+    return CacheSesiones(compartido) if Config.SESSION_CACHE_SECONDS > 0 else compartido
+
+almacen = crear_almacen(Config.SESSION_STORAGE_URL)
+
+# ----------------------------------------------------------------------
+## Sesión de la petición actual
+# ----------------------------------------------------------------------
+
+def iniciar_sesion(usuario):
+    """Crea un sid nuevo en cada login (el anterior, si había, se descarta)"""
+    cerrar_sesion()
+    sid = secrets.token_urlsafe(24)
+    almacen.guardar(sid, Registro(
+        usuario.id_usuario, usuario.nombre_usuario,
+        usuario.rol.nombre if usuario.rol else 'cliente', bool(usuario.activo),
+    ))
+    session['sid'] = sid
+    g.pop('sesion', None)
+
+def cerrar_sesion():
+    sid = session.get('sid')
+    if sid:
+        almacen.borrar(sid)
+    session.clear()
+    g.pop('sesion', None)
+
+def sesion_actual():
+    """Registro de la sesión actual o None; una consulta al almacén por petición y ninguna a la base"""
+    if not has_request_context():
+        return None
+    if 'sesion' not in g:
+        sid = session.get('sid')
+        registro = almacen.obtener(sid) if sid else None
+        g.sesion = registro if registro and registro.activo else None
+    return g.sesion
+
+# ----------------------------------------------------------------------
+## Revocación
+# ----------------------------------------------------------------------
+
+# Cambios de Usuario que invalidan sus sesiones abiertas
+ATRIBUTOS_REVOCAN = ('activo', 'id_rol', 'rol')
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _revocar_por_cambios(db, flush_context):
+    for objeto in db.dirty:
+        if not isinstance(objeto, Usuario):
+            continue
+        estado = inspect(objeto)
+        if any(estado.attrs[atributo].history.has_changes() for atributo in ATRIBUTOS_REVOCAN):
+            despues_de_commit(db, lambda id_usuario=objeto.id_usuario: almacen.revocar_usuario(id_usuario))
@@ -0,0 +1,75 @@
+# src/shutdown.py
+# Apagado ordenado de un worker web. Con SIGTERM (deploy, `kill -HUP` al
+# maestro) gunicorn deja de aceptar conexiones, cierra las keep-alive y espera
+# hasta graceful_timeout a las peticiones en curso. Aquí va lo que gunicorn no
+# sabe hacer, enganchado desde gunicorn.conf.py:
+#  - los sockets abiertos reciben 'reconectar' con una ventana de espera (cada
+#    cliente elige un momento al azar dentro de ella) y se cierran: así no
+#    retienen al worker hasta el límite ni vuelven todos a la vez;
+#  - lo que corre en segundo plano (trabajador de tareas) deja de tomar trabajo;
+#  - al salir se escriben los buffers (bitácora, métricas) y se cierra el pool.
+
+import logging
+import threading
+import time
+
+import metrics
+from config import Config
+from database import cerrar_pool
+
+logger = logging.getLogger('kinoa.apagado')
+
+_drenando = threading.Event()
+_al_drenar = []
+
+def al_drenar(fn):
+    """Registra fn(); se llama una vez al empezar el apagado del proceso"""
+    _al_drenar.append(fn)
+    return fn
+
+def drenando():
+    return _drenando.is_set()
+
+def iniciar_drenado():
+    """Desde el manejador de SIGTERM: no bloquea (el trabajo va en otro hilo/greenlet)"""
+    if _drenando.is_set():
+        return
+    _drenando.set()
+    try:
+        from eventlet import patcher, spawn_n
+    except ImportError:
+        patcher = None
+    if patcher and patcher.is_monkey_patched('thread'):
+        # El manejador corre dentro del hub de eventlet: Thread.start() esperaría ahí mismo
+        spawn_n(_drenar)
+    else:
+        threading.Thread(target=_drenar, name='drenado', daemon=True).start()
+
+def _drenar():
+    for fn in _al_drenar:
+        try:
+            fn()
+        except Exception:
+            logger.exception('Error al detener %s', getattr(fn, '__qualname__', fn))
+    despedir_sockets()
+
+def despedir_sockets():
+    """Pide a los clientes Socket.IO que se reconecten más tarde y cierra sus conexiones"""
+    from extensions import socketio, emitir
+    if socketio.server is None:
+        return
+    # Solo los clientes de este worker: los de los demás siguen atendidos
+    emitir('reconectar', {'min_ms': Config.SOCKET_RECONNECT_MIN_MS, 'max_ms': Config.SOCKET_RECONNECT_MAX_MS},
+           namespace='/notifications', solo_local=True)
+    # Tiempo para que el aviso salga antes de cortar
+    time.sleep(Config.SHUTDOWN_SOCKET_GRACE_SECONDS)
+    socketio.server.eio.disconnect()
+
+def finalizar():
+    """Último paso del worker, con las peticiones ya terminadas"""
+    from order_events import bitacora
+    acumulados = bitacora.vaciar()
+    if acumulados:
+        logger.info('%d eventos de pedidos acumulados al apagar', acumulados)
+    metrics.volcar(forzar=True)
+    cerrar_pool()
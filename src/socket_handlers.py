@@ -1,10 +1,11 @@
 # src/socket_handlers.py
-from flask_socketio import emit, join_room, leave_room
-from src.extensions import socketio
-from flask import session, request
-from src.database import SessionLocal
-from src.database.models import Conexion
-from datetime import datetime
+from flask_socketio import emit, join_room, rooms
+from extensions import socketio
+from metrics import sockets_conectados, sockets_en_sala
+from flask import request
+from helpers import es_admin, es_repartidor
+from kitchen import SALA as SALA_COCINA
+from dispatch import SALA as SALA_REPARTO
 
 @socketio.on("connect", namespace="/notifications")
 def handle_connect():
@@ -12,6 +13,7 @@ def handle_connect():
     sid = request.sid
     # Si el usuario tiene sesión HTTP, el client puede mandar su user_id después
     print("SocketIO: client connected", sid)
+    sockets_conectados.inc(namespace="/notifications")
     emit("connected", {"sid": sid})
 
 @socketio.on("register_user", namespace="/notifications")
@@ -24,9 +26,33 @@ def handle_register_user(data):
     if not user_id:
         return
     room = f"user_{user_id}"
-    join_room(room)
+    if room not in rooms():
+        join_room(room)
+        sockets_en_sala.inc(namespace="/notifications", room=room)
     print(f"SocketIO: join room {room}")
 
+@socketio.on("join_cocina", namespace="/notifications")
+def handle_join_cocina():
+    """Tablero de cocina en vivo (solo administradores); el estado inicial se pide a /admin/api/cocina"""
+    if not es_admin():
+        return
+    if SALA_COCINA not in rooms():
+        join_room(SALA_COCINA)
+        sockets_en_sala.inc(namespace="/notifications", room=SALA_COCINA)
+
+@socketio.on("join_reparto", namespace="/notifications")
+def handle_join_reparto():
+    """Viajes de reparto en vivo (repartidores y administradores); el estado inicial se pide a /reparto/api/viajes"""
+    if not es_repartidor():
+        return
+    if SALA_REPARTO not in rooms():
+        join_room(SALA_REPARTO)
+        sockets_en_sala.inc(namespace="/notifications", room=SALA_REPARTO)
+
 @socketio.on("disconnect", namespace="/notifications")
 def handle_disconnect():
     print("SocketIO: client disconnected", request.sid)
+    sockets_conectados.dec(namespace="/notifications")
+    for room in rooms():
+        if room.startswith("user_") or room in (SALA_COCINA, SALA_REPARTO):
+            sockets_en_sala.dec(namespace="/notifications", room=room)
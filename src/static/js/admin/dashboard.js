@@ -0,0 +1,98 @@
+// Funcionalidad JavaScript para el modal de detalles del pedido (sin cambios)
+async function cargarDetallesPedido(pedidoId) {
+    try {
+        document.getElementById('modalDetalles').innerHTML = 
+            '<p class="text-center text-muted"><i class="bi bi-arrow-repeat spin me-2"></i> Cargando detalles...</p>';
+
+        const response = await fetch(`/admin/api/order_details/${pedidoId}`);
+        const data = await response.json();
+
+        if (data.error) {
+            document.getElementById('modalDetalles').innerHTML = 
+                `<p class="alert alert-danger text-center">Error: ${data.error}</p>`;
+            return;
+        }
+
+        const notas = data.notas && data.notas.trim() !== '' ? data.notas : 'N/A';
+        const entrega = data.entrega;
+        const direccion = entrega
+            ? `C. ${entrega.calle} No. ${entrega.no_exterior}, Col. ${entrega.colonia} (recibe ${entrega.nombre})`
+            : 'N/A';
+
+        let estadoClase = 'secondary';
+        if (data.estado === 'pendiente') estadoClase = 'warning text-dark';
+        else if (data.estado === 'preparando') estadoClase = 'info';
+        else if (data.estado === 'listo' || data.estado === 'enviado') estadoClase = 'primary';
+        else if (data.estado === 'entregado') estadoClase = 'success';
+        else if (data.estado === 'cancelado') estadoClase = 'danger';
+
+        let detallesHTML = `
+            <div class="row mb-3">
+                <div class="col-md-6">
+                    <p class="mb-1"><strong>Código:</strong> <span class="text-success">${data.codigo}</span></p>
+                    <p class="mb-1"><strong>Cliente:</strong> ${data.cliente}</p>
+                    <p class="mb-1"><strong>Estado:</strong> <span class="badge bg-${estadoClase} text-uppercase">${data.estado}</span></p>
+                </div>
+                <div class="col-md-6">
+                    <p class="mb-1"><strong>Total:</strong> <span class="fw-bold text-success fs-5">$${Number(data.total).toFixed(2)}</span></p>
+                    <p class="mb-1"><strong>Fecha:</strong> ${data.fecha}</p>
+                    <p class="mb-1"><strong>Teléfono:</strong> ${(entrega && entrega.telefono) || data.telefono || 'N/A'}</p>
+                </div>
+            </div>
+            <div class="alert alert-light border p-2">
+                <p class="mb-1"><strong><i class="bi bi-geo-alt me-1"></i> Entrega:</strong> ${direccion}</p>
+                <strong><i class="bi bi-sticky me-1"></i> Notas:</strong> ${notas}
+            </div>
+            <h6 class="mt-4 mb-3 text-success"><i class="bi bi-list-check me-1"></i> Productos en el Pedido</h6>
+            <div class="table-responsive">
+                <table class="table table-sm table-striped table-bordered">
+                    <thead>
+                        <tr>
+                            <th>Producto</th>
+                            <th class="text-center">Cant.</th>
+                            <th class="text-end">Precio Unitario</th>
+                            <th class="text-end">Subtotal</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+        `;
+
+        data.detalles.forEach(detalle => {
+            detallesHTML += `
+                <tr>
+                    <td>${detalle.producto}</td>
+                    <td class="text-center">${detalle.cantidad}</td>
+                    <td class="text-end">$${Number(detalle.precio).toFixed(2)}</td>
+                    <td class="text-end"><span class="fw-bold">$${Number(detalle.subtotal).toFixed(2)}</span></td>
+                </tr>
+            `;
+        });
+
+        detallesHTML += `
+                    </tbody>
+                </table>
+            </div>
+        `;
+
+        document.getElementById('modalDetalles').innerHTML = detallesHTML;
+
+        const modal = new bootstrap.Modal(document.getElementById('detallesModal'));
+        modal.show();
+
+    } catch (error) {
+        console.error('Error al cargar detalles:', error);
+        document.getElementById('modalDetalles').innerHTML = 
+            `<p class="alert alert-danger text-center">Error al cargar detalles. Intenta nuevamente.</p>`;
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const botonesDetalles = document.querySelectorAll('.btn-ver-detalles');
+
+    botonesDetalles.forEach(boton => {
+        boton.addEventListener('click', function() {
+            const pedidoId = this.getAttribute('data-pedido-id');
+            cargarDetallesPedido(pedidoId);
+        });
+    });
+});
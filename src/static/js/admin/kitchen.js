@@ -0,0 +1,64 @@
+// URLs generadas por Flask, llegan como data-* en la etiqueta <script>
+const URL_COCINA = document.currentScript.dataset.urlCocina;
+
+function escapar(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto == null ? '' : texto;
+    return div.innerHTML;
+}
+
+function pintarCocina(datos) {
+    document.getElementById('pedidos-pendiente').textContent = datos.pedidos.pendiente;
+    document.getElementById('pedidos-preparando').textContent = datos.pedidos.preparando;
+    document.getElementById('cocina-actualizado').textContent = new Date(datos.actualizado).toLocaleTimeString();
+
+    const cuerpo = document.getElementById('cocina-productos');
+    if (!datos.productos.length) {
+        cuerpo.innerHTML = '<tr><td colspan="5" class="text-center text-muted p-5">No hay nada por preparar.</td></tr>';
+        return;
+    }
+    cuerpo.innerHTML = datos.productos.map(p => `
+        <tr>
+            <td class="fw-bold">${escapar(p.nombre)}</td>
+            <td class="text-end fs-5 fw-bold">${p.total}×</td>
+            <td class="text-end">${p.pendiente}</td>
+            <td class="text-end">${p.preparando}</td>
+            <td>${p.notas.map(n => `<span class="badge bg-light text-dark me-1">${n.unidades}× ${escapar(n.nota)}</span>`).join('')}</td>
+        </tr>`).join('');
+}
+
+function cargarCocina() {
+    return fetch(URL_COCINA)
+        .then(respuesta => respuesta.json())
+        .then(datos => { if (datos.success) pintarCocina(datos); });
+}
+
+cargarCocina();
+
+// En vivo por Socket.IO; si no hay conexión se consulta cada 15 segundos
+if (window.io) {
+    // Si el servidor cae sin avisar, los reintentos de las tabletas se reparten en el tiempo
+    const socket = io('/notifications', {
+        reconnectionDelay: 2000,
+        reconnectionDelayMax: 30000,
+        randomizationFactor: 0.5
+    });
+    let ventanaReconexion = null;
+    socket.on('connect', () => {
+        socket.emit('join_cocina');
+        cargarCocina();
+    });
+    socket.on('cocina', pintarCocina);
+    // El worker se está reiniciando: avisa la ventana y luego cierra la conexión
+    socket.on('reconectar', ventana => { ventanaReconexion = ventana; });
+    socket.on('disconnect', motivo => {
+        // Un cierre del servidor no se reintenta solo: se reconecta en un momento al azar de la ventana
+        if (motivo !== 'io server disconnect') return;
+        const ventana = ventanaReconexion || {min_ms: 1000, max_ms: 15000};
+        ventanaReconexion = null;
+        setTimeout(() => socket.connect(), ventana.min_ms + Math.random() * (ventana.max_ms - ventana.min_ms));
+    });
+}
+setInterval(() => {
+    if (!window.io) cargarCocina();
+}, 15000);
@@ -0,0 +1,38 @@
+// URLs generadas por Flask, llegan como data-* en la etiqueta <script>
+const URL_CAMBIAR_ESTADO = document.currentScript.dataset.urlCambiarEstado;
+
+// ... Funciones JavaScript para btn-detalles ...
+
+// Cambia el estado enviando la versión que se mostró; si otra tablet ya lo
+// cambió el servidor responde 409 y se regresa el select al estado real.
+function updateOrderStatus(select) {
+    const indicador = document.getElementById('status-' + select.dataset.orderId);
+    const datos = new FormData();
+    datos.append('order_id', select.dataset.orderId);
+    datos.append('status', select.value);
+    datos.append('version', select.dataset.version);
+    indicador.textContent = 'Guardando...';
+
+    fetch(URL_CAMBIAR_ESTADO, { method: 'POST', body: datos })
+        .then(respuesta => respuesta.json())
+        .then(data => {
+            if (data.success) {
+                select.dataset.version = data.version;
+                select.dataset.estado = data.estado;
+                indicador.textContent = 'Actualizado';
+                return;
+            }
+            if (data.estado_actual) {
+                select.value = data.estado_actual;
+                select.dataset.estado = data.estado_actual;
+                select.dataset.version = data.version_actual;
+            } else {
+                select.value = select.dataset.estado;
+            }
+            indicador.textContent = data.error;
+        })
+        .catch(() => {
+            select.value = select.dataset.estado;
+            indicador.textContent = 'Error de conexión';
+        });
+}
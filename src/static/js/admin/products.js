@@ -0,0 +1,163 @@
+// URLs generadas por Flask, llegan como data-* en la etiqueta <script>
+const URL_EDITAR_PRODUCTO = document.currentScript.dataset.urlEditarProducto;
+const URL_IMAGEN_PRODUCTO = document.currentScript.dataset.urlImagenProducto;
+
+// Función auxiliar para renderizar alertas de Bootstrap
+function showFlashMessage(message, category) {
+    const container = document.querySelector('.container');
+    const alertHtml = `
+        <div class="alert alert-${category} alert-dismissible fade show" role="alert">
+            ${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+        </div>
+    `;
+    const flashesDiv = document.querySelector('.flashes');
+    if (flashesDiv) {
+        flashesDiv.innerHTML = alertHtml;
+    } else {
+        const newFlashesDiv = document.createElement('div');
+        newFlashesDiv.classList.add('flashes', 'mb-3');
+        newFlashesDiv.innerHTML = alertHtml;
+        container.insertBefore(newFlashesDiv, container.children[1]);
+    }
+}
+
+// 1. Alternar disponibilidad de producto (Lógica AJAX)
+document.querySelectorAll('.toggle-product').forEach(button => {
+    button.addEventListener('click', function() {
+        const productId = this.dataset.productId;
+        const currentButton = this;
+
+        currentButton.innerHTML = '<i class="bi bi-arrow-repeat spin"></i>';
+        currentButton.disabled = true;
+
+        fetch('/admin/api/toggle_product_status', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+            body: `product_id=${productId}`
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                if (data.disponible) {
+                    currentButton.classList.remove('btn-danger');
+                    currentButton.classList.add('btn-success');
+                    currentButton.innerHTML = '<i class="bi bi-check-lg"></i> Sí';
+                } else {
+                    currentButton.classList.remove('btn-success');
+                    currentButton.classList.add('btn-danger');
+                    currentButton.innerHTML = '<i class="bi bi-x-lg"></i> No';
+                }
+            } else {
+                showFlashMessage('Error al cambiar estado: ' + (data.error || 'Desconocido'), 'danger');
+                location.reload(); 
+            }
+            currentButton.disabled = false;
+        })
+        .catch(error => {
+            console.error('Error en la solicitud:', error);
+            showFlashMessage('Error de conexión con el servidor.', 'danger');
+            currentButton.disabled = false;
+            location.reload();
+        });
+    });
+});
+
+// 2. Lógica para el botón de Eliminar (Requiere confirmación)
+document.querySelectorAll('.btn-eliminar').forEach(button => {
+    button.addEventListener('click', function() {
+        const productId = this.dataset.id;
+        const productName = this.closest('tr').querySelector('td strong').textContent; // Obtener nombre
+
+        if (confirm(`¿Estás seguro de que quieres eliminar "${productName}" (ID: ${productId})? Esta acción no se puede deshacer.`)) {
+
+            fetch('/admin/api/delete_product/' + productId, {
+                method: 'DELETE', 
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    const row = document.getElementById(`row-${productId}`);
+                    if (row) {
+                        row.remove();
+                        showFlashMessage('Producto eliminado con éxito.', 'success');
+                    }
+                } else {
+                    showFlashMessage('Error al eliminar el producto: ' + (data.message || 'Desconocido'), 'danger');
+                }
+            })
+            .catch(error => {
+                console.error('Error en la solicitud de eliminación:', error);
+                showFlashMessage('Error de conexión con el servidor al intentar eliminar.', 'danger');
+            });
+        }
+    });
+});
+
+// 3. Lógica para el botón de Editar (Carga dinámica de datos)
+document.getElementById('editarProductoModal').addEventListener('show.bs.modal', function (event) {
+    const button = event.relatedTarget;
+    const productId = button.getAttribute('data-id');
+    const modalBody = this.querySelector('#editProductBody');
+    const editForm = this.querySelector('#editProductForm');
+
+    // 1. Establecer la acción del formulario al enviar
+    editForm.action = URL_EDITAR_PRODUCTO.replace('0', productId);
+
+    modalBody.innerHTML = '<p class="text-muted text-center"><i class="bi bi-arrow-repeat spin me-2"></i> Cargando datos del producto...</p>';
+
+    // 2. Fetch para obtener los datos del producto
+    fetch('/admin/api/get_product/' + productId)
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+
+            // 🌟 MODIFICACIÓN: Usamos 'has_image' que viene de la API
+            let imagePreviewHtml = '';
+            let currentImageStatus = 'No hay imagen subida.';
+
+            if (data.has_image) {
+                // URL dinámica para servir el binario
+                const imageUrl = URL_IMAGEN_PRODUCTO.replace('0', data.id);
+                imagePreviewHtml = `<img src="${imageUrl}" alt="Imagen Actual" class="img-fluid mb-2 border rounded" style="max-width: 100px;">`;
+                currentImageStatus = 'Imagen cargada en la DB. Reemplaza para cambiar.';
+            }
+
+            // 3. Rellenar dinámicamente el contenido del modal
+            modalBody.innerHTML = `
+                <input type="hidden" name="id_producto" value="${data.id}">
+                <div class="mb-3">
+                    <label for="nombreProductoEdit" class="form-label">Nombre del Producto</label>
+                    <input type="text" class="form-control" id="nombreProductoEdit" name="nombre" value="${data.nombre}" required>
+                </div>
+                <div class="mb-3">
+                    <label for="descripcionProductoEdit" class="form-label">Descripción</label>
+                    <textarea class="form-control" id="descripcionProductoEdit" name="descripcion" rows="3" required>${data.descripcion}</textarea>
+                </div>
+                <div class="row">
+                    <div class="col-md-6 mb-3">
+                        <label for="precioProductoEdit" class="form-label">Precio ($)</label>
+                        <input type="number" step="0.01" class="form-control" id="precioProductoEdit" name="precio" value="${data.precio}" required min="0.01">
+                    </div>
+                    <div class="col-md-6 mb-3">
+                        <label for="tiempoPreparacionEdit" class="form-label">Tiempo Prep. (min)</label>
+                        <input type="number" class="form-control" id="tiempoPreparacionEdit" name="tiempo_preparacion" value="${data.tiempo_preparacion}" required min="1">
+                    </div>
+                </div>
+                <div class="mb-3">
+                    <label class="form-label">Imagen Actual:</label>
+                    ${imagePreviewHtml}
+                    <p class="small text-muted">${currentImageStatus}</p>
+                    <label for="imagenProductoEdit" class="form-label">Cambiar Imagen</label>
+                    <input class="form-control" type="file" id="imagenProductoEdit" name="imagen_producto_edit" accept="image/*">
+                </div>
+            `;
+        } else {
+            modalBody.innerHTML = `<p class="alert alert-danger">Error: ${data.message}</p>`;
+        }
+    })
+    .catch(error => {
+        console.error('Error al cargar datos de edición:', error);
+        modalBody.innerHTML = '<p class="alert alert-danger">Error de conexión al obtener datos del producto.</p>';
+    });
+});
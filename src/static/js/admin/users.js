@@ -0,0 +1,62 @@
+// Alternar estado de usuario
+document.querySelectorAll('.toggle-user').forEach(button => {
+    button.addEventListener('click', function() {
+        const userId = this.dataset.userId;
+        const currentButton = this;
+
+        if (!confirm(`¿Estás seguro de que deseas cambiar el estado de actividad (Activar/Desactivar) de este usuario (ID: ${userId})?`)) return;
+
+        // Indicador visual de carga
+        currentButton.innerHTML = '<i class="bi bi-arrow-repeat spin"></i>';
+        currentButton.disabled = true;
+
+        // Usamos fetch con JSON en lugar de FormData para mayor compatibilidad moderna con API
+        fetch('/admin/api/toggle_user_status', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ user_id: userId })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // Actualizar botón
+                if (data.activo) {
+                    currentButton.classList.remove('btn-danger');
+                    currentButton.classList.add('btn-success');
+                    currentButton.innerHTML = '<i class="bi bi-check-lg"></i> Sí';
+                } else {
+                    currentButton.classList.remove('btn-success');
+                    currentButton.classList.add('btn-danger');
+                    currentButton.innerHTML = '<i class="bi bi-x-lg"></i> No';
+                }
+            } else {
+                alert('Error al cambiar estado: ' + (data.message || 'Fallo desconocido.'));
+                // Restaurar el botón si falla
+                location.reload(); 
+            }
+            currentButton.disabled = false;
+        })
+        .catch(error => {
+            console.error('Error en la solicitud:', error);
+            alert('Error de conexión con el servidor.');
+            currentButton.disabled = false;
+            // Restaurar el botón si falla
+            location.reload();
+        });
+    });
+});
+
+// Estilo para el spinner (Añadir un estilo simple para el efecto de carga)
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes spin {
+        0% { transform: rotate(0deg); }
+        100% { transform: rotate(360deg); }
+    }
+    .spin {
+        animation: spin 1s linear infinite;
+    }
+`;
+document.head.appendChild(style);
@@ -0,0 +1,53 @@
+// --- FUNCIÓN DE NOTIFICACIÓN GLOBAL (Toast) ---
+// Se define aquí para ser útil si en el futuro se quiere notificar acciones administrativas.
+
+function showNotification(message, type = 'info') {
+    const toastHtml = `
+        <div class="toast align-items-center text-white ${type === 'success' ? 'bg-success' : type === 'danger' ? 'bg-danger' : 'bg-info'} border-0" role="alert" aria-live="assertive" aria-atomic="true" data-bs-delay="4000">
+            <div class="d-flex">
+                <div class="toast-body">
+                    ${message}
+                </div>
+                <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
+            </div>
+        </div>
+    `;
+
+    let toastContainer = document.querySelector('.toast-container');
+    if (!toastContainer) {
+        // Crea el contenedor si no existe (se recomienda tenerlo en el base.html)
+        toastContainer = document.createElement('div');
+        toastContainer.className = 'toast-container position-fixed bottom-0 end-0 p-3';
+        toastContainer.style.zIndex = '9999';
+        document.body.appendChild(toastContainer);
+    }
+
+    // Añade el toast al contenedor
+    const tempDiv = document.createElement('div');
+    tempDiv.innerHTML = toastHtml.trim();
+    const toastElement = tempDiv.firstChild;
+    toastContainer.appendChild(toastElement);
+
+    // Muestra el toast usando la clase global de Bootstrap
+    if (typeof bootstrap !== 'undefined' && bootstrap.Toast) {
+         new bootstrap.Toast(toastElement).show();
+    } else {
+        console.warn("Bootstrap Toast no disponible. Notificación: " + message);
+        // Fallback si Bootstrap no carga
+        alert(message);
+    }
+}
+
+// --- LÓGICA ESPECÍFICA PARA EL PERFIL DE ADMIN ---
+document.addEventListener('DOMContentLoaded', function() {
+    // Se puede agregar lógica aquí si se usan modales o fetch para acciones como cambio de rol.
+
+    // Ejemplo: Manejar el éxito/error después del POST de cambiar estado
+    const statusForm = document.querySelector('form[action*="toggle_user_status"]');
+    if (statusForm) {
+        statusForm.addEventListener('submit', function(event) {
+            // Aquí podrías interceptar el submit si quisieras usar Fetch API
+            // en lugar de la recarga de página por defecto (que es la más simple).
+        });
+    }
+});
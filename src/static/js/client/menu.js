@@ -0,0 +1,385 @@
+// Variables Globales
+let cart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+
+// FUNCIÓN NUEVA: Inicializar contador del carrito
+function initializeCartCounter() {
+    const cartCount = document.getElementById('cart-item-count');
+    if (!cartCount) return;
+
+    const cart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+    let totalQuantity = 0;
+
+    cart.forEach(item => {
+        totalQuantity += item.cantidad || 0;
+    });
+
+    cartCount.textContent = totalQuantity;
+
+    // Efecto sutil en el contador
+    cartCount.style.transform = 'scale(1.2)';
+    setTimeout(() => cartCount.style.transform = 'scale(1)', 200);
+}
+
+// MODIFICAR la función updateCartCount para que sea más robusta
+window.updateCartCount = function() {
+    const cartCount = document.getElementById('cart-item-count');
+    if (!cartCount) return;
+
+    let totalQuantity = 0;
+    cart.forEach(item => {
+        totalQuantity += item.cantidad || 0;
+    });
+
+    cartCount.textContent = totalQuantity;
+
+    // Efecto sutil en el contador
+    cartCount.style.transform = 'scale(1.2)';
+    setTimeout(() => cartCount.style.transform = 'scale(1)', 200);
+}
+
+// Funciones del Carrito
+window.changeQuantity = function(productId, delta) {
+    const input = document.getElementById(`quantity-${productId}`);
+    if (input) {
+        let currentValue = parseInt(input.value) || 1;
+        const newValue = currentValue + delta;
+        if (newValue >= 1 && newValue <= 99) {
+            input.value = newValue;
+
+            // Efecto visual sutil
+            input.classList.add('bg-kinoa-claro');
+            setTimeout(() => input.classList.remove('bg-kinoa-claro'), 150);
+        }
+    }
+}
+
+window.addToCart = function(productId) {
+    const quantityInput = document.getElementById(`quantity-${productId}`);
+    if (!quantityInput) return;
+
+    const quantity = parseInt(quantityInput.value);
+    const card = quantityInput.closest('.product-card');
+    if (!card) return;
+
+    const productName = card.querySelector('.product-title').textContent;
+    const productPriceElement = card.querySelector('.product-price');
+    if (!productPriceElement) return;
+
+    const productPrice = parseFloat(productPriceElement.textContent.replace('$', ''));
+    if (!productPrice) return;
+
+    // Efecto visual rápido
+    const addBtn = card.querySelector('.add-to-cart-btn');
+    const originalHTML = addBtn.innerHTML;
+    const originalBg = addBtn.style.background;
+
+    addBtn.innerHTML = '<i class="fas fa-check me-1"></i><span>✓</span>';
+    addBtn.style.background = 'var(--kinoa-verde-exito)';
+
+    setTimeout(() => {
+        addBtn.innerHTML = originalHTML;
+        addBtn.style.background = originalBg;
+    }, 800);
+
+    // Agregar al carrito
+    const existingItemIndex = cart.findIndex(item => item.id == productId);
+
+    if (existingItemIndex > -1) {
+        cart[existingItemIndex].cantidad += quantity;
+    } else {
+        cart.push({ 
+            id: productId, 
+            nombre: productName, 
+            precio: productPrice, 
+            cantidad: quantity
+        });
+    }
+
+    localStorage.setItem('sushiCart', JSON.stringify(cart));
+    window.updateCartCount();
+    window.showNotification(`✓ ${productName} (x${quantity}) agregado`, 'success');
+
+    // Resetear cantidad
+    quantityInput.value = 1;
+}
+
+// Función para remover del carrito (mantenida por compatibilidad)
+window.removeFromCart = function(index) {
+    if (index >= 0 && index < cart.length) {
+        const removedItem = cart[index];
+        cart.splice(index, 1);
+        localStorage.setItem('sushiCart', JSON.stringify(cart));
+        window.updateCartCount();
+        window.showNotification(`✗ ${removedItem.nombre} eliminado`, 'warning');
+    }
+}
+
+window.showNotification = function(message, type = 'info') {
+    // Crear toast simple
+    const toast = document.createElement('div');
+    toast.className = 'position-fixed bottom-0 end-0 p-3';
+    toast.style.zIndex = '1050';
+
+    const bgColor = type === 'success' ? 'var(--kinoa-verde-exito)' : 
+                   type === 'warning' ? '#ff9800' : 
+                   'var(--kinoa-verde-oscuro)';
+
+    toast.innerHTML = `
+        <div class="custom-toast d-flex align-items-center" style="background: ${bgColor}; color: white;">
+            <div class="me-2" style="font-size: 1.1rem;">
+                ${type === 'success' ? '✓' : type === 'warning' ? '✗' : 'ℹ'}
+            </div>
+            <div style="font-size: 0.85rem;">${message}</div>
+            <button type="button" class="btn-close btn-close-white ms-3" 
+                    onclick="this.closest('.position-fixed').remove()"
+                    style="font-size: 0.7rem;"></button>
+        </div>
+    `;
+
+    document.body.appendChild(toast);
+
+    // Auto-remover
+    setTimeout(() => {
+        if (toast.parentNode) {
+            toast.remove();
+        }
+    }, 2000);
+}
+
+// Escuchar mensajes para actualizar el contador desde otras páginas
+window.addEventListener('message', function(event) {
+    if (event.data && event.data.type === 'UPDATE_CART_COUNT') {
+        const cartCount = document.getElementById('cart-item-count');
+        if (cartCount) {
+            cartCount.textContent = event.data.count;
+
+            // Actualizar también la variable local del carrito
+            const currentCart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+            if (currentCart.length === 0 && event.data.count === 0) {
+                // Carrito vacío, actualizar variable local
+                cart.length = 0;
+            }
+        }
+    }
+});
+
+// Filtros
+document.querySelectorAll('.filter-tag').forEach(tag => {
+    tag.addEventListener('click', function() {
+        document.querySelectorAll('.filter-tag').forEach(t => t.classList.remove('active'));
+        this.classList.add('active');
+
+        // Aquí iría la lógica de filtrado
+        window.showNotification(`Mostrando: ${this.textContent}`, 'info');
+    });
+});
+
+// **FUNCIÓN PARA INICIALIZAR EL CARRUSEL MANUALMENTE**
+function initCarouselManual() {
+    const carouselElement = document.getElementById('kinoaCarousel');
+    if (!carouselElement) return;
+
+    console.log('Inicializando carrusel manualmente...');
+
+    let currentSlide = 0;
+    const slides = carouselElement.querySelectorAll('.carousel-item');
+    const totalSlides = slides.length;
+
+    if (totalSlides <= 1) return; // No hay necesidad de carrusel con solo 1 slide
+
+    // Función para mostrar un slide específico
+    function showSlide(index) {
+        // Asegurar que el índice esté en rango
+        if (index < 0) index = totalSlides - 1;
+        if (index >= totalSlides) index = 0;
+
+        // Ocultar todos los slides
+        slides.forEach((slide, i) => {
+            slide.classList.remove('active');
+            slide.style.display = 'none';
+        });
+
+        // Mostrar el slide actual
+        slides[index].classList.add('active');
+        slides[index].style.display = 'block';
+
+        currentSlide = index;
+    }
+
+    // Función para siguiente slide
+    function nextSlide() {
+        showSlide(currentSlide + 1);
+    }
+
+    // Función para anterior slide
+    function prevSlide() {
+        showSlide(currentSlide - 1);
+    }
+
+    // Inicializar: mostrar primer slide
+    showSlide(0);
+
+    // Configurar controles manuales
+    const prevBtn = carouselElement.querySelector('.carousel-control-prev');
+    const nextBtn = carouselElement.querySelector('.carousel-control-next');
+
+    if (prevBtn) {
+        prevBtn.addEventListener('click', function(e) {
+            e.preventDefault();
+            e.stopPropagation();
+            prevSlide();
+        });
+    }
+
+    if (nextBtn) {
+        nextBtn.addEventListener('click', function(e) {
+            e.preventDefault();
+            e.stopPropagation();
+            nextSlide();
+        });
+    }
+
+    // Auto-play cada 3 segundos
+    const interval = setInterval(nextSlide, 3000);
+
+    // Pausar auto-play al pasar el mouse
+    carouselElement.addEventListener('mouseenter', () => {
+        clearInterval(interval);
+    });
+
+    // Reanudar auto-play al quitar el mouse
+    carouselElement.addEventListener('mouseleave', () => {
+        clearInterval(interval);
+        interval = setInterval(nextSlide, 12000);
+    });
+}
+
+// **FUNCIÓN PARA INICIALIZAR CON BOOTSTRAP SI ESTÁ DISPONIBLE**
+function initCarouselBootstrap() {
+    const carouselElement = document.getElementById('kinoaCarousel');
+    if (!carouselElement) return;
+
+    console.log('Intentando inicializar carrusel con Bootstrap...');
+
+    // Verificar si Bootstrap está disponible
+    if (typeof bootstrap === 'undefined' || !bootstrap.Carousel) {
+        console.log('Bootstrap no está disponible, usando carrusel manual');
+        initCarouselManual();
+        return;
+    }
+
+    try {
+        // Inicializar carrusel de Bootstrap
+        const carousel = new bootstrap.Carousel(carouselElement, {
+            interval: 3000,
+            wrap: true,
+            ride: 'carousel'
+        });
+
+        console.log('Carrusel de Bootstrap inicializado correctamente');
+
+        // Asegurar que los controles funcionen
+        const prevBtn = carouselElement.querySelector('.carousel-control-prev');
+        const nextBtn = carouselElement.querySelector('.carousel-control-next');
+
+        if (prevBtn) {
+            prevBtn.addEventListener('click', function(e) {
+                e.preventDefault();
+                carousel.prev();
+            });
+        }
+
+        if (nextBtn) {
+            nextBtn.addEventListener('click', function(e) {
+                e.preventDefault();
+                carousel.next();
+            });
+        }
+
+    } catch (error) {
+        console.error('Error al inicializar carrusel de Bootstrap:', error);
+        console.log('Usando carrusel manual como respaldo');
+        initCarouselManual();
+    }
+}
+
+// Delegación de Eventos
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('Documento cargado, inicializando...');
+
+    // **INICIALIZAR EL CARRUSEL** - Primero intenta con Bootstrap, luego manual
+    initCarouselBootstrap();
+
+    // Delegación para botones de productos
+    document.addEventListener('click', function(event) {
+        const target = event.target.closest('button');
+
+        if (target && target.dataset.productId) {
+            const productId = target.dataset.productId;
+
+            if (target.classList.contains('decrease-btn')) {
+                window.changeQuantity(productId, -1);
+            } else if (target.classList.contains('increase-btn')) {
+                window.changeQuantity(productId, 1);
+            } else if (target.classList.contains('add-to-cart-btn')) {
+                window.addToCart(productId);
+            }
+        }
+    });
+
+    // INICIALIZAR: Usar la nueva función initializeCartCounter
+    initializeCartCounter();
+
+    // Verificar si hay cambios en el localStorage cada segundo
+    setInterval(() => {
+        const storedCart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+        if (JSON.stringify(storedCart) !== JSON.stringify(cart)) {
+            // Actualizar la variable local y el contador
+            cart = storedCart;
+            initializeCartCounter();
+        }
+    }, 1000);
+
+    // Verificar imágenes del carrusel
+    setTimeout(() => {
+        const carouselImages = document.querySelectorAll('#kinoaCarousel img');
+        carouselImages.forEach((img, index) => {
+            if (img.complete) {
+                console.log(`Imagen ${index + 1} cargada: ${img.src}`);
+            } else {
+                img.onload = () => console.log(`Imagen ${index + 1} cargada: ${img.src}`);
+                img.onerror = () => {
+                    console.warn(`Error cargando imagen ${index + 1}: ${img.src}`);
+                    // Usar imagen de respaldo
+                    img.src = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='800' height='400' viewBox='0 0 800 400'%3E%3Crect width='800' height='400' fill='%232e602e'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' font-family='Arial' font-size='48' fill='white'%3EKinoa Rolls%3C/text%3E%3C/svg%3E";
+                };
+            }
+        });
+    }, 500);
+});
+
+// **FUNCIÓN DE EMERGENCIA - Si nada funciona, ejecuta esto en la consola del navegador**
+window.fixCarousel = function() {
+    console.log('Forzando inicialización del carrusel...');
+    initCarouselManual();
+
+    // Mostrar botones de ayuda
+    const helpDiv = document.createElement('div');
+    helpDiv.style.cssText = `
+        position: fixed;
+        top: 10px;
+        right: 10px;
+        background: white;
+        padding: 10px;
+        border-radius: 5px;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        z-index: 9999;
+    `;
+    helpDiv.innerHTML = `
+        <strong>Carrusel Forzado</strong><br>
+        <small>Usando versión manual</small>
+    `;
+    document.body.appendChild(helpDiv);
+
+    setTimeout(() => helpDiv.remove(), 3000);
+};
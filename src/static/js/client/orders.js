@@ -0,0 +1,251 @@
+// URLs generadas por Flask, llegan como data-* en la etiqueta <script>
+const URL_MENU = document.currentScript.dataset.urlMenu;
+
+document.addEventListener('DOMContentLoaded', function() {
+    const cart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+    const summaryItems = document.getElementById('summary-items');
+    const hiddenItemsContainer = document.getElementById('hidden-items-container');
+    const emptyCartMessage = document.getElementById('empty-cart-message');
+    const form = document.getElementById('checkoutForm');
+    const submitBtn = document.getElementById('submitBtn');
+    const summarySubtotal = document.getElementById('summary-subtotal');
+    const summaryTax = document.getElementById('summary-tax');
+    const summaryTotal = document.getElementById('summary-total');
+
+    // Renderizar resumen y campos ocultos
+    function renderSummary() {
+        if (cart.length === 0) {
+            summaryItems.innerHTML = `
+                <div class="empty-cart-message" id="empty-cart-message">
+                    <i class="bi bi-cart-x fs-1 mb-3"></i>
+                    <p>Tu carrito está vacío</p>
+                    <a href="${URL_MENU}" class="btn btn-primary btn-sm">
+                        <i class="bi bi-arrow-left me-1"></i>Volver al Menú
+                    </a>
+                </div>
+            `;
+            summarySubtotal.textContent = '$0.00';
+            summaryTax.textContent = '$0.00';
+            summaryTotal.textContent = '$0.00';
+            submitBtn.disabled = true;
+            hiddenItemsContainer.innerHTML = '';
+            return;
+        }
+
+        let html = '';
+        let subtotal = 0;
+        let hiddenHtml = '';
+
+        cart.forEach((item, index) => {
+            // Validar y convertir valores
+            const itemId = item.id ? parseInt(item.id) : 0;
+            const itemPrecio = item.precio ? parseFloat(item.precio) : 0;
+            const itemCantidad = item.cantidad ? parseInt(item.cantidad) : 0;
+
+            // Solo procesar si tenemos valores válidos
+            if (itemId > 0 && itemPrecio > 0 && itemCantidad > 0) {
+                const itemTotal = itemPrecio * itemCantidad;
+                subtotal += itemTotal;
+
+                // Item visible en el resumen con botón para eliminar
+                html += `
+                    <div class="order-item-summary" data-index="${index}">
+                        <button type="button" class="delete-item-btn" onclick="removeItem(${index})">
+                            <i class="bi bi-x"></i>
+                        </button>
+                        <div class="item-details">
+                            <div class="d-flex justify-content-between">
+                                <strong>${item.nombre || 'Producto'}</strong>
+                                <strong class="text-danger">$${itemTotal.toFixed(2)}</strong>
+                            </div>
+                            <div class="item-quantity-control">
+                                <button type="button" class="qty-btn-small" onclick="updateItemQuantity(${index}, -1)">−</button>
+                                <input type="text" class="qty-input-small" value="${itemCantidad}" readonly id="item-qty-${index}">
+                                <button type="button" class="qty-btn-small" onclick="updateItemQuantity(${index}, 1)">+</button>
+                                <small class="text-muted ms-2">$${itemPrecio.toFixed(2)} c/u</small>
+                            </div>
+                        </div>
+                    </div>
+                `;
+
+                // Campos ocultos para el formulario
+                hiddenHtml += `
+                    <input type="hidden" name="items[${itemId}][cantidad]" value="${itemCantidad}" id="hidden-qty-${itemId}">
+                    <input type="hidden" name="items[${itemId}][precio]" value="${itemPrecio}" id="hidden-precio-${itemId}">
+                `;
+            }
+        });
+
+        // Si no hay items válidos después de filtrar
+        if (subtotal === 0) {
+            summaryItems.innerHTML = `
+                <div class="empty-cart-message" id="empty-cart-message">
+                    <i class="bi bi-cart-x fs-1 mb-3"></i>
+                    <p>Carrito vacío o datos inválidos</p>
+                    <a href="${URL_MENU}" class="btn btn-primary btn-sm">
+                        <i class="bi bi-arrow-left me-1"></i>Volver al Menú
+                    </a>
+                </div>
+            `;
+            summarySubtotal.textContent = '$0.00';
+            summaryTax.textContent = '$0.00';
+            summaryTotal.textContent = '$0.00';
+            submitBtn.disabled = true;
+            hiddenItemsContainer.innerHTML = '';
+            return;
+        }
+
+        const tax = subtotal * 0.12;
+        const total = subtotal + tax;
+
+        summaryItems.innerHTML = html;
+        hiddenItemsContainer.innerHTML = hiddenHtml;
+        summarySubtotal.textContent = `$${subtotal.toFixed(2)}`;
+        summaryTax.textContent = `$${tax.toFixed(2)}`;
+        summaryTotal.textContent = `$${total.toFixed(2)}`;
+        submitBtn.disabled = false;
+
+        // Ocultar mensaje de carrito vacío
+        if (emptyCartMessage) {
+            emptyCartMessage.style.display = 'none';
+        }
+    }
+
+    // Función para eliminar un item del carrito
+    window.removeItem = function(index) {
+        if (index >= 0 && index < cart.length) {
+            if (confirm('¿Eliminar este producto del carrito?')) {
+                cart.splice(index, 1);
+                localStorage.setItem('sushiCart', JSON.stringify(cart));
+                renderSummary();
+                updateCartCounter();
+                showNotification('Producto eliminado del carrito', 'warning');
+            }
+        }
+    };
+
+    // Función para actualizar cantidad de un item
+    window.updateItemQuantity = function(index, delta) {
+        if (cart[index]) {
+            const newQty = cart[index].cantidad + delta;
+            if (newQty >= 1 && newQty <= 99) {
+                cart[index].cantidad = newQty;
+                localStorage.setItem('sushiCart', JSON.stringify(cart));
+                renderSummary();
+                updateCartCounter();
+            }
+        }
+    };
+
+    // Función para actualizar el contador del carrito en el navbar
+    function updateCartCounter() {
+        // Actualizar contador en esta página
+        const cartCount = document.getElementById('cart-item-count');
+        if (cartCount) {
+            const totalItems = cart.reduce((sum, item) => sum + item.cantidad, 0);
+            cartCount.textContent = totalItems;
+        }
+
+        // También intentar actualizar en la página del menú (si está abierta)
+        if (window.opener && !window.opener.closed) {
+            try {
+                window.opener.postMessage({ type: 'UPDATE_CART_COUNT', count: cart.reduce((sum, item) => sum + item.cantidad, 0) }, '*');
+            } catch (e) {
+                console.log('No se pudo actualizar el contador en la ventana padre');
+            }
+        }
+    }
+
+    // Función para mostrar notificaciones
+    function showNotification(message, type = 'info') {
+        const toast = document.createElement('div');
+        toast.className = 'position-fixed top-0 end-0 p-3';
+        toast.style.zIndex = '9999';
+
+        toast.innerHTML = `
+            <div class="toast show" role="alert">
+                <div class="toast-header ${type === 'warning' ? 'bg-warning' : 'bg-info text-white'}">
+                    <strong class="me-auto">Kinoa Rolls</strong>
+                    <button type="button" class="btn-close ${type !== 'warning' ? 'btn-close-white' : ''}" 
+                            onclick="this.closest('.toast').remove()"></button>
+                </div>
+                <div class="toast-body">
+                    ${message}
+                </div>
+            </div>
+        `;
+
+        document.body.appendChild(toast);
+
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.remove();
+            }
+        }, 3000);
+    }
+
+    // Validar formulario antes de enviar
+    form.addEventListener('submit', function(e) {
+        const cart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+        if (cart.length === 0) {
+            e.preventDefault();
+            alert('Tu carrito está vacío. Agrega productos antes de continuar.');
+            return false;
+        }
+
+        // Validar campos de dirección
+        const colonia = document.getElementById('colonia').value.trim();
+        const calle = document.getElementById('calle').value.trim();
+        const noExterior = document.getElementById('no_exterior').value.trim();
+
+        if (!colonia || !calle || !noExterior) {
+            e.preventDefault();
+            alert('Por favor completa todos los campos de dirección obligatorios.');
+            return false;
+        }
+
+        // Validar nombre y teléfono
+        const nombre = document.getElementById('nombre').value.trim();
+        const telefono = document.getElementById('telefono').value.trim();
+
+        if (!nombre || !telefono) {
+            e.preventDefault();
+            alert('Por favor completa tu nombre y teléfono.');
+            return false;
+        }
+
+        // Mostrar loader en el botón
+        submitBtn.innerHTML = '<i class="bi bi-arrow-clockwise spin"></i> Procesando...';
+        submitBtn.disabled = true;
+
+        // IMPORTANTE: Limpiar el carrito después de enviar el pedido
+        setTimeout(() => {
+            localStorage.removeItem('sushiCart');
+        }, 1000);
+
+        // Continuar con el envío del formulario
+        return true;
+    });
+
+    // Inicializar
+    renderSummary();
+    updateCartCounter();
+
+    // Escuchar mensajes para actualizar el contador
+    window.addEventListener('message', function(event) {
+        if (event.data && event.data.type === 'UPDATE_CART_COUNT') {
+            const cartCount = document.getElementById('cart-item-count');
+            if (cartCount) {
+                cartCount.textContent = event.data.count;
+            }
+        }
+    });
+
+    // Verificar carrito cada 5 segundos
+    setInterval(() => {
+        const currentCart = JSON.parse(localStorage.getItem('sushiCart')) || [];
+        if (JSON.stringify(currentCart) !== JSON.stringify(cart)) {
+            location.reload();
+        }
+    }, 5000);
+});